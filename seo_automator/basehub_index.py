@@ -0,0 +1,211 @@
+import sqlite3
+import threading
+import time
+
+import requests
+
+import http_client
+from title_dedup import normalize_title
+
+# Newest changes first, so an incremental sync can stop at the first page that
+# only holds posts it has already seen. Pages are keyed on lastModifiedAt rather
+# than an offset: a post edited mid-sync jumps to the front of the ordering, which
+# shifts every offset after it, but never moves the posts after a given timestamp.
+POSTS_PAGE_QUERY = '''
+query PostsPage($first: Int!, $skip: Int!, $before: String!) {
+  site {
+    blog {
+      posts(first: $first, skip: $skip, orderBy: _sys_lastModifiedAt__DESC,
+            filter: {_sys_lastModifiedAt: {lte: $before}}) {
+        items {
+          _id
+          _title
+          _slug
+          publishedAt
+          _sys {
+            lastModifiedAt
+          }
+        }
+      }
+    }
+  }
+}
+'''
+
+# Sorts after every real ISO 8601 timestamp, for the first page.
+END_OF_TIME = '9999-12-31T23:59:59.999Z'
+
+
+class BasehubIndex:
+    """
+    Local SQLite copy of the id, title, slug and publish date of every blog post
+    in Basehub, kept current by sync(). Lets the publisher and the duplicate
+    title filter know what is already live without querying Basehub per post.
+    Safe to share across threads.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.create_function('normalize_title', 1, normalize_title, deterministic=True)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS posts (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                slug TEXT NOT NULL,
+                published_at TEXT,
+                last_modified TEXT NOT NULL,
+                sync_id INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS posts_slug ON posts (slug)")
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def fetch_page(self, api_url, token, first, before, skip=0, limiter=None):
+        """
+        Returns one page of posts last modified at or before `before`, most
+        recently modified first, passing over the first `skip` of them.
+        """
+        response = http_client.post(
+            api_url,
+            json={"query": POSTS_PAGE_QUERY, "variables": {"first": first, "skip": skip, "before": before}},
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+            idempotent=True, # Read-only query, safe to retry
+            limiter=limiter
+        )
+        response.raise_for_status()
+        try:
+            body = response.json()
+            if body.get("errors"):
+                raise ValueError(body["errors"])
+            return body['data']['site']['blog']['posts']['items']
+        except (KeyError, TypeError, ValueError) as e:
+            raise requests.exceptions.RequestException(f"Could not read posts page before {before}: {e}")
+
+    def sync(self, api_url, token, page_size=100, full=False, limiter=None):
+        """
+        Pulls posts page by page into the index.
+
+        An incremental sync stops at the first post modified before the newest
+        change seen by the previous sync, so it costs one page plus whatever
+        changed since, however large the blog grows. A full sync (also used
+        the first time) reads every page and drops posts deleted from Basehub.
+
+        Returns {"pages", "fetched", "changed", "removed", "seconds"}.
+        """
+        started = time.monotonic()
+        with self._lock:
+            cursor = None if full else self._meta('last_modified')
+            sync_id = int(self._meta('sync_id') or 0) + 1
+        full = cursor is None
+
+        pages, fetched, changed, newest = self._pull(api_url, token, page_size, cursor, sync_id, limiter)
+        if full and newest:
+            # A post edited while the pages were read jumped ahead of them. One more pass
+            # from the top catches it, so it is not dropped as deleted below.
+            more = self._pull(api_url, token, page_size, newest, sync_id, limiter)
+            pages, fetched, changed = pages + more[0], fetched + more[1], changed + more[2]
+            newest = max(newest, more[3] or newest)
+
+        removed = 0
+        with self._lock:
+            self.conn.execute("BEGIN")
+            if full:
+                removed = self.conn.execute("DELETE FROM posts WHERE sync_id != ?", (sync_id,)).rowcount
+            if newest:
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_modified', ?)", (newest,))
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('sync_id', ?)", (str(sync_id),))
+            self.conn.execute("COMMIT")
+
+        return {"pages": pages, "fetched": fetched, "changed": changed, "removed": removed,
+                "seconds": round(time.monotonic() - started, 2)}
+
+    def _pull(self, api_url, token, page_size, cursor, sync_id, limiter):
+        """
+        Upserts posts newest first down to `cursor` (every post when None) and
+        returns (pages, fetched, changed, newest timestamp seen). Each page
+        starts at the last timestamp of the one before; only posts sharing that
+        exact timestamp are skipped by count, and ids already read are ignored,
+        so an edit made meanwhile cannot push an unread post out of reach.
+        """
+        pages = fetched = changed = 0
+        newest = cursor
+        before, ties = END_OF_TIME, 0
+        seen = set()
+        while True:
+            items = self.fetch_page(api_url, token, page_size, before, ties, limiter=limiter)
+            pages += 1
+            rows = []
+            reached_cursor = False
+            for item in items:
+                last_modified = (item.get('_sys') or {}).get('lastModifiedAt') or ''
+                # ISO 8601 timestamps from one source compare correctly as strings.
+                # Equal timestamps are re-read, since upserting them again is harmless.
+                if cursor and last_modified < cursor:
+                    reached_cursor = True
+                    break
+                if item['_id'] in seen:
+                    continue
+                seen.add(item['_id'])
+                rows.append((item['_id'], item['_title'], item['_slug'], item.get('publishedAt'), last_modified, sync_id))
+                if newest is None or last_modified > newest:
+                    newest = last_modified
+            fetched += len(rows)
+
+            with self._lock:
+                self.conn.execute("BEGIN")
+                for row in rows:
+                    current = self.conn.execute(
+                        "SELECT title, slug, published_at, last_modified FROM posts WHERE id = ?", (row[0],)
+                    ).fetchone()
+                    if current != row[1:5]:
+                        changed += 1
+                self.conn.executemany("INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self.conn.execute("COMMIT")
+
+            if reached_cursor or len(items) < page_size:
+                return pages, fetched, changed, newest
+            last = (items[-1].get('_sys') or {}).get('lastModifiedAt') or ''
+            same = sum(1 for item in items if ((item.get('_sys') or {}).get('lastModifiedAt') or '') == last)
+            # A page full of one timestamp moves on by count within it; otherwise start at its last timestamp.
+            ties = ties + same if last == before else same
+            before = last
+
+    def get_by_slug(self, slug):
+        """Returns the indexed post with this slug as a dict, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id, title, slug, published_at FROM posts WHERE slug = ?", (slug,)
+            ).fetchone()
+        return dict(zip(("id", "title", "slug", "published_at"), row)) if row else None
+
+    def get_by_title(self, title):
+        """Returns an indexed post whose title matches after normalize_title(), or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id, title, slug, published_at FROM posts WHERE normalize_title(title) = ? LIMIT 1",
+                (normalize_title(title),)
+            ).fetchone()
+        return dict(zip(("id", "title", "slug", "published_at"), row)) if row else None
+
+    def posts(self):
+        """Returns every indexed post as a dict, most recently published first."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, title, slug, published_at FROM posts ORDER BY published_at DESC"
+            ).fetchall()
+        return [dict(zip(("id", "title", "slug", "published_at"), row)) for row in rows]
+
+    def titles(self):
+        """Returns (title, slug) pairs, as used by the duplicate title filter."""
+        with self._lock:
+            return self.conn.execute("SELECT title, slug FROM posts").fetchall()
@@ -1,8 +1,8 @@
 import os
 from dotenv import load_dotenv
 load_dotenv()
-import requests
 import json
+import http_client
 from datetime import datetime
 
 BASEHUB_API_URL = os.environ.get('BASEHUB_API_URL', 'https://api.basehub.com/graphql')
@@ -67,7 +67,8 @@ headers = {
     "Content-Type": "application/json"
 }
 
-response = requests.post(
+# Only connection failures and 429s are retried, so the test post can't be created twice.
+response = http_client.post(
     BASEHUB_API_URL,
     json={"query": mutation, "variables": variables},
     headers=headers
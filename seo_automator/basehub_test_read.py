@@ -1,52 +1,24 @@
 import os
+import sys
 from dotenv import load_dotenv
 load_dotenv()
 import requests
+from basehub_index import BasehubIndex
 
 BASEHUB_API_URL = os.environ.get('BASEHUB_API_URL', 'https://api.basehub.com/graphql')
 BASEHUB_TOKEN = os.environ.get('BASEHUB_TOKEN', '')
+BASEHUB_INDEX_PATH = os.environ.get('BASEHUB_INDEX_PATH', 'seo_automator/basehub_index.sqlite')
 
-# GraphQL query to fetch latest blog posts (adjust the query if your schema differs)
-query = '''
-query BlogPosts {
-  site {
-    blog {
-      posts {
-        items {
-          _title
-          _slug
-          publishedAt
-          authors {
-            _id
-            _title
-          }
-        }
-      }
-    }
-  }
-}
-'''
+# Pass --full to re-read every post instead of only the ones changed since the last sync.
+index = BasehubIndex(BASEHUB_INDEX_PATH)
+try:
+    stats = index.sync(BASEHUB_API_URL, BASEHUB_TOKEN, full='--full' in sys.argv)
+    print(f"Synced {stats['fetched']} posts in {stats['pages']} page(s) "
+          f"({stats['changed']} changed, {stats['removed']} removed) in {stats['seconds']}s.")
+except requests.exceptions.RequestException as e:
+    print("Could not sync posts from Basehub; showing the local index.", e)
 
-headers = {
-    "Authorization": f"Bearer {BASEHUB_TOKEN}",
-    "Content-Type": "application/json"
-}
-
-response = requests.post(
-    BASEHUB_API_URL,
-    json={"query": query},
-    headers=headers
-)
-
-print("Status Code:", response.status_code)
-print("Response:", response.text)
-
-if response.status_code == 200:
-    data = response.json()
-    try:
-        posts = data['data']['site']['blog']['posts']['items']
-        print("\nLatest Blog Posts:")
-        for post in posts:
-            print(f"- {post['_title']} (slug: {post['_slug']}, published: {post['publishedAt']}), authors: {post['authors']}")
-    except Exception as e:
-        print("Could not parse posts from response.", e) 
\ No newline at end of file
+posts = index.posts()
+print(f"\nLatest Blog Posts ({len(posts)}):")
+for post in posts:
+    print(f"- {post['title']} (slug: {post['slug']}, published: {post['published_at']}, id: {post['id']})")
@@ -0,0 +1,182 @@
+"""
+In-process stand-in for google.generativeai's GenerativeModel. It recognizes
+the prompts the automation sends and answers in the format each one expects,
+after a sampled latency, optionally streaming the answer in chunks.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+
+WORDS = (
+    "founder growth marketing startup pipeline launch signal channel audience content search ranking "
+    "campaign budget revenue funnel outbound inbound product positioning narrative brand experiment "
+    "metric retention activation onboarding pricing landing conversion strategy automation agent"
+).split()
+
+
+class ResourceExhausted(Exception):
+    """Quota error shaped like google.api_core's, so GeminiAI retries it."""
+    code = 429
+
+
+class DeadlineExceeded(Exception):
+    """Timeout error shaped like google.api_core's, raised when a call outlives its route's timeout."""
+    code = 504
+
+
+class FakeUsage:
+    def __init__(self, tokens):
+        self.candidates_token_count = tokens
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = FakeUsage(len(text) // 4 + 1)
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStream:
+    """Iterable of chunks, spreading the generation time across them like a real stream."""
+    def __init__(self, text, delay, chunk_chars=400):
+        self.text = text
+        self.delay = delay
+        self.chunk_chars = chunk_chars
+        self.usage_metadata = FakeUsage(len(text) // 4 + 1)
+
+    def __iter__(self):
+        chunks = [self.text[i:i + self.chunk_chars] for i in range(0, len(self.text), self.chunk_chars)] or ['']
+        for chunk in chunks:
+            time.sleep(self.delay / len(chunks))
+            yield FakeChunk(chunk)
+
+
+class FakeGenerativeModel:
+    """
+    Drop-in for a GeminiAI model. latency is a fake_services.Latency; error_rate
+    is the share of calls that raise, half as 429 (retried by GeminiAI) and
+    half as a hard error. article_words sets the size of generated articles.
+    truncate_rate is the share of JSON answers cut off part way, as if they hit
+    the output token limit; a continuation prompt gets the rest. straggler_rate
+    is the share of calls that hang for ten times their sampled latency.
+    """
+    def __init__(self, latency, error_rate=0.0, time_scale=1.0, article_words=1600, pillar_words=2600,
+                 truncate_rate=0.0, straggler_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.time_scale = time_scale
+        self.article_words = article_words
+        self.pillar_words = pillar_words
+        self.truncate_rate = truncate_rate
+        self.straggler_rate = straggler_rate
+        self.rng = random.Random(seed)
+        self.remainders = {} # Tail of a cut-off answer -> the rest of it
+        self.calls = defaultdict(int)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _draw(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+            delay = self.latency.sample(self.rng, self.time_scale)
+            if self.rng.random() < self.straggler_rate:
+                delay *= 10
+            roll = self.rng.random()
+            words = [self.rng.choice(WORDS) for _ in range(12)]
+        if roll < self.error_rate / 2:
+            self.errors[kind] += 1
+            time.sleep(delay * 0.1)
+            raise ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+        if roll < self.error_rate:
+            self.errors[kind] += 1
+            time.sleep(delay * 0.5)
+            raise RuntimeError("500 An internal error has occurred.")
+        return delay, words
+
+    def _body(self, words, count):
+        sections = []
+        for n in range(0, count, 150):
+            sections.append(f"## Section {n // 150 + 1}: {' '.join(words[:4]).title()}\n\n")
+            sections.append(' '.join((words * 13)[:min(150, count - n)]) + ".\n\n")
+        return ''.join(sections)
+
+    @staticmethod
+    def kind(prompt):
+        """Tells which of the automation's prompts this is."""
+        if 'was cut off before the JSON object' in prompt:
+            return 'continuation' # Checked first: it quotes the original prompt
+        if 'Keyword: ' in prompt:
+            return 'keyword_titles'
+        if '"titles"' in prompt:
+            return 'topics'
+        if 'mapping each ID' in prompt:
+            return 'image_prompts'
+        if 'image generation prompt' in prompt:
+            return 'image_prompt'
+        if 'words too short' in prompt:
+            return 'sections'
+        if 'pillar page' in prompt:
+            return 'pillar'
+        return 'article'
+
+    def answer(self, kind, prompt, words):
+        """Returns response text in the format the automation expects for this kind of prompt."""
+        if kind == 'continuation':
+            tail = re.search(r'<<<\n    (.*)\n    >>>', prompt, re.DOTALL).group(1)
+            with self._lock:
+                return self.remainders.get(tail[-200:], '')
+        if kind == 'topics':
+            count = int(re.search(r'list of (\d+) unique', prompt).group(1))
+            # Distinct words per title keep the duplicate filter from dropping them.
+            titles = [f"{' '.join(WORDS[(n * 7 + k) % len(WORDS)] for k in range(4)).title()} Playbook {n}"
+                      for n in range(count)]
+            return json.dumps({"titles": titles})
+        if kind == 'keyword_titles':
+            keywords = re.findall(r'^\s*ID: (\d+)\n\s*Keyword: (.*)$', prompt, re.MULTILINE)
+            return json.dumps({"titles": {n: f"{keyword.title()}: A Founder's Playbook" for n, keyword in keywords}})
+        if kind == 'image_prompts':
+            ids = re.findall(r'^\s*ID: (\d+)$', prompt, re.MULTILINE)
+            return json.dumps({n: f"An abstract render of {' '.join(words[:6])}" for n in ids})
+        if kind == 'image_prompt':
+            return f"An abstract, conceptual render of {' '.join(words[:8])}, soft light, no text."
+        if kind == 'sections':
+            missing = int(re.search(r'about (\d+) words too short', prompt).group(1))
+            return self._body(words, missing + 50)
+        body = self._body(words, self.pillar_words if kind == 'pillar' else self.article_words)
+        return json.dumps({"description": ' '.join(words[:20]), "article_body": body})
+
+    def generate_content(self, prompt, stream=False, generation_config=None, request_options=None):
+        kind = self.kind(prompt)
+        delay, words = self._draw(kind)
+        timeout = (request_options or {}).get('timeout')
+        if timeout and delay > timeout * self.time_scale:
+            with self._lock:
+                self.errors[kind] += 1
+            time.sleep(timeout * self.time_scale)
+            raise DeadlineExceeded("504 Deadline Exceeded")
+        text = self.answer(kind, prompt, words)
+        if kind in ('topics', 'article', 'pillar') and self.truncate_rate:
+            text = self._maybe_truncate(text)
+        if stream:
+            return FakeStream(text, delay)
+        time.sleep(delay)
+        return FakeResponse(text)
+
+    def _maybe_truncate(self, text):
+        with self._lock:
+            if self.rng.random() >= self.truncate_rate:
+                return text
+            cut = int(len(text) * self.rng.uniform(0.4, 0.9))
+            self.remainders[text[:cut][-200:]] = text[cut:]
+        return text[:cut]
+
+    def stats(self):
+        with self._lock:
+            return {kind: {"calls": self.calls[kind], "errors": self.errors[kind]} for kind in self.calls}
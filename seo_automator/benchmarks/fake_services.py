@@ -0,0 +1,355 @@
+"""
+Local stand-ins for the HTTP services the automation talks to: the DALL-E
+images endpoint, the CDN it returns URLs on, an S3-compatible object store
+and the Basehub GraphQL API. Every endpoint sleeps for a latency drawn from
+a configurable distribution and can fail at a configurable rate, so runs
+behave like production without spending anything.
+
+Run in its own process (see start_services) so the client's peak RSS is not
+inflated by the servers.
+"""
+import base64
+import json
+import math
+import multiprocessing
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+class Latency:
+    """Log-normal latency given its median and 99th percentile in seconds."""
+    def __init__(self, median, p99=None):
+        self.median = median
+        p99 = p99 if p99 and p99 > median else median
+        self.sigma = math.log(p99 / median) / 2.326 if median > 0 else 0.0
+
+    @classmethod
+    def parse(cls, value):
+        """Parses 'median' or 'median:p99'."""
+        median, _, p99 = value.partition(':')
+        return cls(float(median), float(p99) if p99 else None)
+
+    def sample(self, rng, scale=1.0):
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(self.sigma * rng.gauss(0, 1)) * scale
+
+
+# Production-like defaults, per service: (latency, error rate).
+DEFAULT_PROFILES = {
+    'gemini': (Latency(25, 90), 0.01),
+    'gemini_flash': (Latency(6, 20), 0.01), # The flash tier serving short routes
+    'images': (Latency(12, 40), 0.02),
+    'cdn': (Latency(0.3, 2), 0.0),
+    's3': (Latency(0.15, 1), 0.0),
+    'basehub': (Latency(0.4, 2), 0.01),
+}
+
+
+IMAGE_WIDTH = 1024 # Like DALL-E's 1024x1024 renders; the height follows from image_bytes
+
+
+class ServiceConfig:
+    """Latency, failure and payload settings shared by the fake services."""
+    def __init__(self, profiles=None, time_scale=1.0, throttle_share=0.5, image_bytes=1_500_000, seed=0):
+        self.profiles = {**DEFAULT_PROFILES, **(profiles or {})}
+        self.time_scale = time_scale
+        # Share of injected failures returned as 429 + Retry-After rather than 503.
+        self.throttle_share = throttle_share
+        self.image_bytes = image_bytes
+        self.seed = seed
+
+
+class FakeState:
+    def __init__(self, config):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.requests = defaultdict(lambda: defaultdict(int))
+        self.bytes_in = defaultdict(int)
+        self.objects = {}
+        self.uploads = {}
+        self.posts = []
+        self.transactions = 0
+        self.image = None
+
+    def draw(self, service):
+        """Returns (delay seconds, failure status or None) for one request."""
+        latency, error_rate = self.config.profiles[service]
+        with self.lock:
+            delay = latency.sample(self.rng, self.config.time_scale)
+            failed = self.rng.random() < error_rate
+            throttled = self.rng.random() < self.config.throttle_share
+        if not failed:
+            return delay, None
+        return delay, 429 if throttled else 503
+
+    def image_body(self, tag=b''):
+        """
+        The fake image: a valid RGB PNG of noise about config.image_bytes big.
+        A tag (e.g. a render id) is stamped over its first pixels so renders differ.
+        """
+        with self.lock:
+            if self.image is None:
+                rows = max(1, self.config.image_bytes // (IMAGE_WIDTH * 3))
+                self.image = random.Random(self.config.seed).randbytes(IMAGE_WIDTH * 3 * rows)
+            pixels = tag + self.image[len(tag):]
+        return _png(IMAGE_WIDTH, len(pixels) // (IMAGE_WIDTH * 3), pixels)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": {service: dict(statuses) for service, statuses in self.requests.items()},
+                "bytes_in": dict(self.bytes_in),
+                "objects": len(self.objects),
+                "posts": len(self.posts),
+                "transactions": self.transactions,
+            }
+
+
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Keep-alive, like the real services
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    # --- plumbing ---
+
+    def _body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            data = b''
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if size == 0:
+                    while self.rfile.readline().strip():
+                        pass
+                    break
+                data += self.rfile.read(size)
+                self.rfile.readline()
+        else:
+            data = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if 'aws-chunked' in self.headers.get('Content-Encoding', ''):
+            data = _decode_aws_chunked(data)
+        return data
+
+    def _send(self, status, body=b'', content_type='application/json', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        # HEAD answers carry the headers of the matching GET but no body.
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _serve(self, service, handler):
+        """Reads the body, applies latency and failure injection, then runs handler(body)."""
+        body = self._body()
+        delay, failure = self.state.draw(service)
+        time.sleep(delay)
+        with self.state.lock:
+            self.state.bytes_in[service] += len(body)
+        if failure:
+            self._count(service, failure)
+            retry_after = {'Retry-After': f"{max(0.01, self.state.config.time_scale):.2f}"} if failure == 429 else {}
+            return self._send(failure, {"error": {"message": "injected failure"}}, headers=retry_after)
+        status = handler(body)
+        self._count(service, status)
+
+    def _count(self, service, status):
+        with self.state.lock:
+            self.state.requests[service][str(status)] += 1
+
+    def _dispatch(self):
+        url = urlparse(self.path)
+        if url.path == '/__stats':
+            self._body()
+            self._send(200, self.state.stats())
+        elif url.path == '/v1/images/generations':
+            self._serve('images', self._images)
+        elif url.path.startswith('/cdn/'):
+            self._serve('cdn', self._cdn)
+        elif url.path == '/graphql':
+            self._serve('basehub', self._graphql)
+        else:
+            self._serve('s3', lambda body: self._s3(url, body))
+
+    do_GET = do_POST = do_PUT = do_HEAD = do_DELETE = _dispatch
+
+    # --- DALL-E and its CDN ---
+
+    def _images(self, body):
+        payload = json.loads(body or b'{}')
+        if payload.get('response_format') == 'b64_json':
+            item = {"b64_json": base64.b64encode(self.state.image_body(uuid.uuid4().bytes)).decode('ascii')}
+        else:
+            host = self.headers.get('Host')
+            item = {"url": f"http://{host}/cdn/{uuid.uuid4().hex}.png"}
+        self._send(200, {"created": int(time.time()), "data": [item]})
+        return 200
+
+    def _cdn(self, body):
+        render_id = bytes.fromhex(self.path.rsplit('/', 1)[-1].split('.')[0])
+        self._send(200, self.state.image_body(render_id), content_type='image/png')
+        return 200
+
+    # --- S3 (path-style: /bucket/key) ---
+
+    def _s3(self, url, body):
+        query = parse_qs(url.query, keep_blank_values=True)
+        key = url.path
+        if self.command == 'PUT' and 'uploadId' in query:
+            etag = f'"{uuid.uuid4().hex}"'
+            with self.state.lock:
+                self.state.uploads.setdefault(query['uploadId'][0], 0)
+                self.state.uploads[query['uploadId'][0]] += len(body)
+            self._send(200, headers={'ETag': etag})
+        elif self.command == 'PUT' and self.headers.get('x-amz-copy-source'):
+            source = '/' + unquote(self.headers['x-amz-copy-source']).lstrip('/')
+            with self.state.lock:
+                size = self.state.objects.get(source)
+                if size is not None:
+                    self.state.objects[key] = size
+            if size is None:
+                self._send(404, _xml('Error', Code='NoSuchKey'), content_type='application/xml')
+                return 404
+            self._send(200, _xml('CopyObjectResult', ETag='"copied"'), content_type='application/xml')
+        elif self.command == 'PUT':
+            with self.state.lock:
+                self.state.objects[key] = len(body)
+            self._send(200, headers={'ETag': f'"{uuid.uuid4().hex}"'})
+        elif self.command == 'DELETE':
+            with self.state.lock:
+                self.state.objects.pop(key, None)
+            self._send(204)
+            return 204
+        elif self.command == 'POST' and 'uploads' in query:
+            upload_id = uuid.uuid4().hex
+            self._send(200, _xml('InitiateMultipartUploadResult', Bucket=key.split('/')[1],
+                                 Key=key.split('/', 2)[-1], UploadId=upload_id), content_type='application/xml')
+        elif self.command == 'POST' and 'uploadId' in query:
+            with self.state.lock:
+                self.state.objects[key] = self.state.uploads.pop(query['uploadId'][0], 0)
+            self._send(200, _xml('CompleteMultipartUploadResult', Bucket=key.split('/')[1],
+                                 Key=key.split('/', 2)[-1], ETag=f'"{uuid.uuid4().hex}-1"'),
+                       content_type='application/xml')
+        elif self.command in ('HEAD', 'GET'):
+            with self.state.lock:
+                size = self.state.objects.get(key)
+            if size is None:
+                self._send(404, _xml('Error', Code='NoSuchKey'), content_type='application/xml')
+                return 404
+            self._send(200, self.state.image_body()[:size], content_type='image/png', headers={'ETag': '"stored"'})
+        else:
+            self._send(405, _xml('Error', Code='MethodNotAllowed'), content_type='application/xml')
+            return 405
+        return 200
+
+    # --- Basehub GraphQL ---
+
+    def _graphql(self, body):
+        request = json.loads(body or b'{}')
+        query = request.get('query', '')
+        variables = request.get('variables') or {}
+
+        if 'transaction(' in query:
+            aliases = re.findall(r'(\w+)\s*:\s*transaction\(', query) or ['transaction']
+            values = [variables[name] for name in sorted(variables, key=_natural_key)]
+            data = {}
+            for alias, value in zip(aliases, values):
+                data[alias] = self._apply_transaction(json.loads(value))
+            self._send(200, {"data": data})
+        elif 'PostsPage' in query:
+            with self.state.lock:
+                posts = sorted(self.state.posts, key=lambda p: p['_sys']['lastModifiedAt'], reverse=True)
+            if variables.get('before'):
+                posts = [p for p in posts if p['_sys']['lastModifiedAt'] <= variables['before']]
+            page = posts[variables.get('skip', 0):variables.get('skip', 0) + variables.get('first', 100)]
+            self._send(200, {"data": {"site": {"blog": {"posts": {"items": page}}}}})
+        elif 'PostByTitle' in query:
+            with self.state.lock:
+                items = [{"_id": p['_id']} for p in self.state.posts if p['_title'] == variables.get('title')]
+            self._send(200, {"data": {"site": {"blog": {"posts": {"items": items[:1]}}}}})
+        else:
+            self._send(200, {"errors": [{"message": "unsupported query in benchmark stub"}]})
+        return 200
+
+    def _apply_transaction(self, operation):
+        now = time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+        with self.state.lock:
+            self.state.transactions += 1
+            if operation.get('type') == 'update':
+                for post in self.state.posts:
+                    if post['_id'] == operation.get('id'):
+                        post['_sys']['lastModifiedAt'] = now
+            else:
+                title = operation.get('data', {}).get('title', '')
+                self.state.posts.append({
+                    "_id": uuid.uuid4().hex, "_title": title,
+                    "_slug": re.sub(r'[^\w]+', '-', title.lower()).strip('-'),
+                    "publishedAt": operation.get('data', {}).get('value', {}).get('publishedAt', {}).get('value'),
+                    "_sys": {"lastModifiedAt": now},
+                })
+        return uuid.uuid4().hex
+
+
+def _xml(root, **fields):
+    inner = ''.join(f"<{name}>{value}</{name}>" for name, value in fields.items())
+    return f'<?xml version="1.0" encoding="UTF-8"?><{root}>{inner}</{root}>'
+
+
+def _png(width, height, pixels):
+    """Encodes raw RGB rows as a PNG. Noise does not compress, so the data is stored rather than deflated."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    stride = width * 3
+    raw = b''.join(b'\0' + pixels[row * stride:(row + 1) * stride] for row in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 0)) + chunk(b'IEND', b''))
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def _decode_aws_chunked(data):
+    """Strips aws-chunked framing ('<hex size>[;ext]\\r\\n<data>\\r\\n' ... '0\\r\\n<trailers>')."""
+    out, position = b'', 0
+    while position < len(data):
+        line_end = data.index(b'\r\n', position)
+        size = int(data[position:line_end].split(b';')[0], 16)
+        if size == 0:
+            break
+        out += data[line_end + 2:line_end + 2 + size]
+        position = line_end + 2 + size + 2
+    return out
+
+
+def _serve_forever(config, port_queue):
+    FakeServiceHandler.state = FakeState(config)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeServiceHandler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_services(config):
+    """Starts the fake services in a child process. Returns (process, base_url)."""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve_forever, args=(config, port_queue), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{port_queue.get(timeout=30)}"
@@ -0,0 +1,309 @@
+"""
+Offline end-to-end benchmark of seo_content_automation.py.
+
+Runs a full N-article job (topics, articles, images, pillar pages, publishing)
+against local stand-ins for Gemini, DALL-E, its CDN, S3 and Basehub, then
+reports articles/minute, per-stage latency percentiles, peak RSS and request
+counts. Nothing leaves the machine and nothing is billed.
+
+    python seo_automator/benchmarks/run_benchmark.py --articles 50 --pipeline --time-scale 0.05
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR)) # The automation's own modules
+
+from fake_services import DEFAULT_PROFILES, Latency, ServiceConfig, start_services
+from fake_gemini import FakeGenerativeModel
+
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+
+def gemini_stats(fakes):
+    """Calls and errors per prompt kind, summed over the fake models."""
+    totals = {}
+    for fake in fakes:
+        for kind, stats in fake.stats().items():
+            for outcome in ("calls", "errors"):
+                totals[f"{kind} {outcome}"] = totals.get(f"{kind} {outcome}", 0) + stats[outcome]
+    return dict(sorted(totals.items()))
+
+
+def parse_service_values(value, convert):
+    """Parses 'images=8:20,s3=0.1' into {'images': convert('8:20'), 's3': convert('0.1')}."""
+    values = {}
+    for pair in filter(None, value.split(',')):
+        name, _, setting = pair.partition('=')
+        if name.strip() not in DEFAULT_PROFILES or not setting:
+            raise argparse.ArgumentTypeError(f"invalid service setting: '{pair}'")
+        values[name.strip()] = convert(setting.strip())
+    return values
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the SEO automation against local fake services.")
+    parser.add_argument('--articles', type=int, default=20, help="Number of articles in the job (default: 20).")
+    parser.add_argument('--pipeline', action='store_true', help="Use the staged pipeline.")
+    parser.add_argument('--workers', type=int, default=1, help="Concurrent articles without --pipeline.")
+    parser.add_argument('--stage-workers', default='', help="Per-stage workers for --pipeline, e.g. 'text=8'.")
+    parser.add_argument('--stream', action='store_true', help="Stream article text and start images early.")
+    parser.add_argument('--batch-publish', action='store_true', help="Publish in batched mutations at the end.")
+    parser.add_argument('--image-transport', choices=['url', 'b64', 'stream'], default='url')
+    parser.add_argument('--latency', type=lambda v: parse_service_values(v, Latency.parse), default={},
+                        help="Per-service latency as median[:p99] seconds, e.g. 'gemini=20:60,images=10:30'. "
+                             f"Services: {', '.join(DEFAULT_PROFILES)}.")
+    parser.add_argument('--error-rate', type=lambda v: parse_service_values(v, float), default={},
+                        help="Per-service share of failed requests, e.g. 'images=0.05,basehub=0.02'.")
+    parser.add_argument('--time-scale', type=float, default=0.05,
+                        help="Multiplier on every latency, backoff and batch wait, so long jobs finish quickly "
+                             "(default: 0.05; 1 replays production timings).")
+    parser.add_argument('--rate-limits', choices=['off', 'scaled'], default='off',
+                        help="'scaled' keeps the production quotas, sped up by the time scale; 'off' lifts them.")
+    parser.add_argument('--image-kb', type=int, default=1500, help="Size of each fake image (default: 1500 KB).")
+    parser.add_argument('--article-words', type=int, default=1600, help="Words per fake article (default: 1600).")
+    parser.add_argument('--truncate-rate', type=float, default=0.0,
+                        help="Share of Gemini JSON answers cut off part way, to exercise continuations.")
+    parser.add_argument('--straggler-rate', type=float, default=0.0,
+                        help="Share of Gemini calls that hang for 10x their latency, to exercise --hedge.")
+    parser.add_argument('--hedge', action='store_true', help="Hedge straggling Gemini and DALL-E calls.")
+    parser.add_argument('--keywords', metavar='CSV',
+                        help="Take titles from this keyword export, written as articles are generated, instead of "
+                             "one topics call; --articles caps the keywords used.")
+    parser.add_argument('--queue-workers', type=int, default=0,
+                        help="Serve articles from the work queue to this many queue workers, each with its own "
+                             "queue connection and worker id as separate processes would have (default: off).")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for latency and failure sampling.")
+    parser.add_argument('--save', metavar='PATH', help="Write the report as JSON, e.g. as a regression baseline.")
+    parser.add_argument('--compare', metavar='PATH', help="Fail if this run regresses against a saved report.")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="Allowed relative regression for --compare (default: 0.15).")
+    return parser.parse_args()
+
+
+def configure_environment(args, base_url, workdir):
+    """Points the automation at the fake services. Must run before it is imported."""
+    scale = args.time_scale
+    os.environ.update({
+        'GEMINI_API_KEY': 'benchmark',
+        'IMAGE_API_URL': f"{base_url}/v1/images/generations",
+        'OPENAI_IMAGE_API_KEY': 'benchmark',
+        'S3_ENDPOINT_URL': base_url,
+        'S3_BUCKET_NAME': 'benchmark',
+        'AWS_ACCESS_KEY_ID': 'benchmark',
+        'AWS_SECRET_ACCESS_KEY': 'benchmark',
+        'BASEHUB_API_URL': f"{base_url}/graphql",
+        'BASEHUB_TOKEN': 'benchmark',
+        'IMAGE_TRANSPORT': args.image_transport,
+        'RUNS_DIR': os.path.join(workdir, 'runs'),
+        'LLM_CACHE_DIR': '',
+        'GEMINI_CONTEXT_CACHE': '0', # The fake model has no context caching; preambles go inline
+        'HEDGE_REQUESTS': '1' if args.hedge else '0',
+        'HTTP_BACKOFF_BASE': str(1.0 * scale),
+        'HTTP_BACKOFF_MAX': str(60.0 * scale),
+    })
+    # Tunables keep any value set in the environment, so concurrency settings can be sized with them.
+    os.environ.setdefault('IMAGE_PROMPT_BATCH_WAIT', str(20 * scale))
+    quotas = {'GEMINI_RPM': 150, 'OPENAI_IMAGES_PER_MINUTE': 7, 'BASEHUB_RPM': 60}
+    for name, per_minute in quotas.items():
+        os.environ[name] = str(10 ** 6 if args.rate_limits == 'off' else max(1, int(per_minute / scale)))
+
+
+def timed(func, durations):
+    """Wraps func so each call's duration is appended to durations."""
+    def wrapper(*args, **kwargs):
+        started = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            durations.append(time.monotonic() - started)
+    return wrapper
+
+
+def run_job(sca, args, ai_client, pillar_durations):
+    """Runs the job through the automation's own run_content_job(). Returns the article stages and successes."""
+    from response_cache import DiskCache
+    from run_journal import RunJournal
+    from work_queue import WorkQueue
+    from keyword_source import KeywordSource
+
+    if sca.IMAGE_CACHE_DIR:
+        sca.image_cache = DiskCache(sca.IMAGE_CACHE_DIR)
+
+    start_date = datetime.now()
+    journal = RunJournal.create(sca.RUNS_DIR)
+    title_batches = None
+    if args.keywords:
+        journal.start([], start_date, keywords={"path": os.path.abspath(args.keywords), "limit": args.articles,
+                                                "dedup_threshold": 0})
+        title_batches = sca.journal_keyword_titles(journal, sca.keyword_titles(
+            ai_client, KeywordSource(args.keywords), "AgentWeb benchmark run.", args.articles))
+    else:
+        journal.start(ai_client.generate_blog_topics("AgentWeb benchmark run.", num_topics=args.articles), start_date)
+
+    # Queue workers each get their own connection and worker id, as separate processes would have.
+    work_queue = WorkQueue(journal.path, worker_id="benchmark-0") if args.queue_workers else None
+    sca.process_pillar_page = timed(sca.process_pillar_page, pillar_durations)
+    stages = sca.run_content_job(
+        ai_client, journal, start_date, title_batches, total=args.articles, work_queue=work_queue,
+        queue_workers=max(1, args.queue_workers), workers=args.workers, pipeline=args.pipeline,
+        stage_workers=sca.parse_stage_workers(args.stage_workers) if args.stage_workers else {},
+        defer_publish=args.batch_publish, stream=args.stream)
+
+    succeeded = sum(1 for article in journal.items('article') if article["state"] in ('file_written', 'published'))
+    return stages, succeeded
+
+
+def latency_summary(durations, failed=0):
+    if not durations:
+        return {"count": 0, "failed": failed, "p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+    return {"count": len(durations), "failed": failed, "p50": round(float(p50), 3), "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3), "mean": round(float(np.mean(durations)), 3)}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def format_report(report):
+    lines = [
+        f"📊 {report['succeeded']}/{report['articles']} articles in {report['elapsed_seconds']}s "
+        f"(time scale {report['config']['time_scale']})",
+        f"   {report['articles_per_minute']:.1f} articles/min measured, "
+        f"≈{report['articles_per_minute_at_full_latency']:.2f} at production latency",
+        f"   peak RSS {report['peak_rss_mb']} MB",
+        f"⏱️  {'stage':<14}{'count':>7}{'fail':>6}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}",
+    ]
+    for name, s in report['stages'].items():
+        lines.append(f"   {name:<14}{s['count']:>7}{s['failed']:>6}{s['p50']:>9.3f}{s['p95']:>9.3f}{s['p99']:>9.3f}")
+    lines.append("📡 requests by service and status:")
+    for service, statuses in report['requests'].items():
+        lines.append(f"   {service:<14}{', '.join(f'{status}: {count}' for status, count in sorted(statuses.items()))}")
+    lines.append(f"   S3 objects stored: {report['objects_stored']}, Basehub transactions: {report['transactions']}")
+    return "\n".join(lines)
+
+
+def find_regressions(report, baseline, tolerance):
+    """Lists the ways this report is worse than the baseline by more than tolerance."""
+    regressions = []
+    if report['articles_per_minute'] < baseline['articles_per_minute'] * (1 - tolerance):
+        regressions.append(f"articles/min {baseline['articles_per_minute']:.1f} -> {report['articles_per_minute']:.1f}")
+    if report['peak_rss_mb'] and baseline.get('peak_rss_mb') and \
+            report['peak_rss_mb'] > baseline['peak_rss_mb'] * (1 + tolerance):
+        regressions.append(f"peak RSS {baseline['peak_rss_mb']} MB -> {report['peak_rss_mb']} MB")
+    for name, stage in report['stages'].items():
+        before = baseline['stages'].get(name)
+        # Ignore sub-10ms differences; they are scheduling noise, not regressions.
+        if before and stage['p95'] > before['p95'] * (1 + tolerance) and stage['p95'] - before['p95'] > 0.01:
+            regressions.append(f"{name} p95 {before['p95']}s -> {stage['p95']}s")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    profiles = {
+        name: (args.latency.get(name, latency), args.error_rate.get(name, error_rate))
+        for name, (latency, error_rate) in DEFAULT_PROFILES.items()
+    }
+    config = ServiceConfig(profiles=profiles, time_scale=args.time_scale,
+                           image_bytes=args.image_kb * 1024, seed=args.seed)
+    services, base_url = start_services(config)
+
+    # Resolve report paths before moving into the scratch directory.
+    args.save = args.save and os.path.abspath(args.save)
+    args.compare = args.compare and os.path.abspath(args.compare)
+    args.keywords = args.keywords and os.path.abspath(args.keywords)
+    workdir = tempfile.mkdtemp(prefix='seo-benchmark-')
+    configure_environment(args, base_url, workdir)
+    os.chdir(workdir) # Generated files land under workdir/seo_automator/
+    import seo_content_automation as sca
+
+    ai_client = sca.GeminiAI(api_key='benchmark')
+    # One fake per model tier, so routed short tasks get the flash latency profile.
+    fakes = {
+        tier: FakeGenerativeModel(*profiles[tier], time_scale=args.time_scale, article_words=args.article_words,
+                                  truncate_rate=args.truncate_rate, straggler_rate=args.straggler_rate,
+                                  seed=args.seed + n)
+        for n, tier in enumerate(('gemini', 'gemini_flash'))
+    }
+    ai_client.models = {
+        route.model: fakes['gemini_flash' if route.model == sca.GEMINI_FLASH_MODEL else 'gemini']
+        for route in sca.GEMINI_ROUTES.values()
+    }
+
+    log_path = os.path.join(workdir, 'benchmark.log')
+    print(f"🏁 Running {args.articles}-article job against {base_url}; automation output goes to {log_path}")
+    pillar_durations = []
+    started = time.monotonic()
+    logging.basicConfig(filename=log_path, filemode='w', level=logging.INFO, format='%(message)s')
+    sca.metrics.configure(jsonl_path=os.path.join(workdir, 'metrics.jsonl'),
+                          prometheus_path=os.path.join(workdir, 'metrics.prom'))
+    stages, succeeded = run_job(sca, args, ai_client, pillar_durations)
+    sca.variant_pool.shutdown()
+    sca.HEDGER.shutdown()
+    sca.metrics.write_prometheus()
+    elapsed = time.monotonic() - started
+
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        service_stats = json.load(response)
+    services.terminate()
+
+    articles_per_minute = succeeded / elapsed * 60 if elapsed else 0.0
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ('latency', 'error_rate')},
+        "articles": args.articles,
+        "succeeded": succeeded,
+        "elapsed_seconds": round(elapsed, 2),
+        "articles_per_minute": round(articles_per_minute, 2),
+        "articles_per_minute_at_full_latency": round(articles_per_minute * args.time_scale, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {stage.name: latency_summary(stage.durations, stage.failed) for stage in stages},
+        "requests": {
+            "gemini": gemini_stats(fakes.values()),
+            **service_stats["requests"],
+        },
+        "objects_stored": service_stats["objects"],
+        "transactions": service_stats["transactions"],
+        "operations": sca.metrics.summary(),
+        "routes": ai_client.router.stats(),
+        "hedging": sca.HEDGER.stats(),
+    }
+    report["stages"]["pillar"] = latency_summary(pillar_durations)
+    print(format_report(report))
+    print(sca.metrics.format_summary())
+    print(ai_client.router.format_stats())
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to '{args.save}'.")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = find_regressions(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%} against '{args.compare}'.")
+
+
+if __name__ == "__main__":
+    main()
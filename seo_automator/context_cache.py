@@ -0,0 +1,133 @@
+import time
+import hashlib
+import logging
+import datetime
+import threading
+from concurrent.futures import Future
+
+import google.generativeai as genai
+from google.generativeai import caching
+
+from model_router import min_context_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class ContextCache:
+    """
+    Registers the static preamble of a prompt (persona, rules, output format)
+    with Gemini's explicit context caching, once per distinct preamble per run,
+    so each call only sends its variable part.
+
+    model_for() returns a GenerativeModel bound to the cached preamble on the
+    given model (a cache only works with the model it was created for), or None
+    when the caller should send the preamble inline as the prompt prefix: when
+    caching is disabled, the preamble is under Gemini's minimum cacheable size
+    for that model, or creating the cache failed. min_tokens is that minimum,
+    either one number or a function of the model name. Caches are kept alive while in use and
+    deleted by close().
+    """
+    def __init__(self, ttl_seconds=3600, min_tokens=min_context_tokens, enabled=True):
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.enabled = enabled
+        # (model name, sha256 of preamble) -> Future of {"cache", "model", "refreshed"}, or of None when sent inline.
+        # The lock only guards the dict: network calls run outside it, and callers wanting
+        # a preamble that is still being registered wait on its future instead.
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def model_for(self, model_name, preamble, name='prompt'):
+        if not self.enabled or not preamble:
+            return None
+        key = (model_name, hashlib.sha256(preamble.encode('utf-8')).hexdigest())
+        with self._lock:
+            future = self._entries.get(key)
+            creating = future is None
+            if creating:
+                future = self._entries[key] = Future()
+        if creating:
+            entry = None
+            try:
+                entry = self._create(model_name, preamble, name)
+            finally:
+                future.set_result(entry)
+        entry = future.result()
+        if not entry:
+            return None
+
+        # One caller extends the TTL; the others keep using the cache meanwhile.
+        with self._lock:
+            refresh = (not entry.get("refreshing")
+                       and time.monotonic() - entry["refreshed"] > self.ttl_seconds / 2)
+            if refresh:
+                entry["refreshing"] = True
+        if refresh:
+            try:
+                entry["cache"].update(ttl=datetime.timedelta(seconds=self.ttl_seconds))
+                entry["refreshed"] = time.monotonic()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not extend the cached '{name}' context, sending it inline from now on: {e}")
+                with self._lock:
+                    if self._entries.get(key) is future:
+                        self._entries[key] = _resolved(None)
+                return None
+            finally:
+                entry["refreshing"] = False
+        return entry["model"]
+
+    def _create(self, model_name, preamble, name):
+        tokens = len(preamble) // 4
+        min_tokens = self.min_tokens(model_name) if callable(self.min_tokens) else self.min_tokens
+        if tokens < min_tokens:
+            logger.info(f"📎 The '{name}' preamble (~{tokens} tokens) is under {model_name}'s {min_tokens}-token "
+                        "minimum for context caching; sending it inline as the prompt prefix.")
+            return None
+        try:
+            cache = caching.CachedContent.create(
+                model=model_name if model_name.startswith('models/') else f"models/{model_name}",
+                display_name=f"seo-automator-{name}",
+                system_instruction=preamble,
+                ttl=datetime.timedelta(seconds=self.ttl_seconds)
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cache the '{name}' context, sending it inline: {e}")
+            return None
+        logger.info(f"📎 Cached the '{name}' context (~{tokens} tokens) for {model_name} as {cache.name}.")
+        return {"cache": cache, "model": genai.GenerativeModel.from_cached_content(cache), "refreshed": time.monotonic()}
+
+    def discard(self, model_name, preamble):
+        """Stops using the cached copy of a preamble, e.g. after it expired, so later calls send it inline."""
+        key = (model_name, hashlib.sha256(preamble.encode('utf-8')).hexdigest())
+        with self._lock:
+            future = self._entries.get(key)
+            self._entries[key] = _resolved(None)
+        if future:
+            future.add_done_callback(self._delete_entry)
+
+    def close(self):
+        """Deletes every cache this run created; cached tokens are billed for as long as they are stored."""
+        with self._lock:
+            futures = list(self._entries.values())
+            self._entries.clear()
+        for future in futures:
+            # A cache still being created is deleted as soon as it exists.
+            future.add_done_callback(self._delete_entry)
+
+    def _delete_entry(self, future):
+        entry = future.result()
+        if entry:
+            self._delete(entry["cache"])
+
+    @staticmethod
+    def _delete(cache):
+        try:
+            cache.delete()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not delete cached context {cache.name}; it expires on its own: {e}")
+
+
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
@@ -0,0 +1,205 @@
+import math
+import time
+import logging
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RollingHistogram:
+    """
+    Latency histogram over the last `window` samples. Buckets are log-spaced,
+    5% wide, from 10 ms to about an hour, so adding a sample and reading a
+    percentile cost the same whatever the window size. Percentiles are
+    reported as their bucket's upper bound.
+    """
+    FLOOR = 0.01
+    GROWTH = 1.05
+    BUCKETS = 250
+
+    def __init__(self, window=500):
+        self.window = window
+        self.counts = [0] * self.BUCKETS
+        self.samples = deque()
+
+    def add(self, seconds):
+        if seconds <= self.FLOOR:
+            index = 0
+        else:
+            index = min(self.BUCKETS - 1, math.ceil(math.log(seconds / self.FLOOR, self.GROWTH)))
+        self.samples.append(index)
+        self.counts[index] += 1
+        if len(self.samples) > self.window:
+            self.counts[self.samples.popleft()] -= 1
+
+    def __len__(self):
+        return len(self.samples)
+
+    def percentile(self, fraction):
+        """The latency below which `fraction` of the window falls, or None if it is empty."""
+        if not self.samples:
+            return None
+        rank = fraction * (len(self.samples) - 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen > rank:
+                return self.FLOOR * self.GROWTH ** index
+        return self.FLOOR * self.GROWTH ** (self.BUCKETS - 1)
+
+
+class Hedger:
+    """
+    Opt-in request hedging against stragglers. A call that is still running
+    after the given percentile of recent latencies for its kind (e.g.
+    'gemini.article' or 'openai_images.render') gets one duplicate, and
+    whichever succeeds first is returned. Python threads cannot be cancelled,
+    so the slower call is left to finish and its result is ignored.
+
+    Hedges are capped at max_rate of all calls, so at most that share of extra
+    cost, and start only once a kind has min_samples latencies to go on.
+
+    Calls run on a pool of `workers` threads; size it to the provider
+    concurrency limits of the hedged calls, so a call never waits for a thread
+    and queueing is never mistaken for a straggler. Counters that the calls
+    add to metrics land on the caller's open span.
+    """
+    def __init__(self, enabled=False, percentile=0.95, max_rate=0.05, min_samples=20, window=500, workers=32):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self.window = window
+        self.workers = workers
+        self._histograms = defaultdict(lambda: RollingHistogram(self.window))
+        self._counts = {"calls": 0, "hedged": 0, "hedge_wins": 0, "vetoed": 0}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def record(self, kind, seconds):
+        with self._lock:
+            self._histograms[kind].add(seconds)
+
+    def delay(self, kind):
+        """How long a call of this kind may run before it is hedged, or None while there is too little history."""
+        with self._lock:
+            histogram = self._histograms[kind]
+            if len(histogram) < self.min_samples:
+                return None
+            return histogram.percentile(self.percentile)
+
+    def _timed(self, kind, fn, parent=None):
+        started = time.monotonic()
+        with metrics.attach(parent):
+            result = fn()
+        # Stragglers are recorded too, even when a hedge beat them, so the percentile stays honest.
+        self.record(kind, time.monotonic() - started)
+        return result
+
+    def _take_hedge(self):
+        with self._lock:
+            if self._counts["hedged"] + 1 > self.max_rate * self._counts["calls"]:
+                return False
+            self._counts["hedged"] += 1
+            return True
+
+    def _hedge(self, kind, fn, on_hedge, parent):
+        if on_hedge:
+            try:
+                on_hedge() # May raise (e.g. the run budget is spent) to call the hedge off
+            except Exception:
+                self._veto()
+                raise
+        return self._timed(kind, fn, parent)
+
+    def _veto(self):
+        with self._lock:
+            self._counts["vetoed"] += 1
+
+    def call(self, kind, fn, on_hedge=None, limit=None):
+        """
+        Runs fn() and returns its result, hedging it if it straggles. on_hedge
+        is called before a duplicate is sent, e.g. to take a rate limiter slot
+        or charge the run budget; if it raises, only the first call is awaited.
+        If both calls fail, the first call's exception is raised.
+
+        limit is the provider's concurrency semaphore, which the caller holds
+        for the first call. A hedge is only sent if it can take a second slot
+        without waiting, and that slot is kept until both calls have ended, so
+        a losing call still counts against the limit after the caller returns.
+        """
+        if not self.enabled:
+            return fn()
+        with self._lock:
+            self._counts["calls"] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='hedge')
+        delay = self.delay(kind)
+        if delay is None:
+            return self._timed(kind, fn)
+
+        parent = metrics.current()
+        primary = self._executor.submit(self._timed, kind, fn, parent)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+        if limit is not None and not limit.acquire(blocking=False):
+            self._veto() # Every slot is busy: a duplicate would only add load
+            return primary.result()
+        if not self._take_hedge():
+            if limit is not None:
+                limit.release()
+            return primary.result()
+
+        logger.info(f"🪂 {kind} call still running after {delay:.1f}s (p{round(self.percentile * 100)}); "
+                    "sending a hedged duplicate.")
+        metrics.add('hedges')
+        hedge = self._executor.submit(self._hedge, kind, fn, on_hedge, parent)
+        if limit is not None:
+            self._release_when_settled(limit, primary, hedge)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self._counts["hedge_wins"] += 1
+                    return future.result()
+                if future is hedge:
+                    logger.debug("Hedged %s call failed or was called off: %s", kind, future.exception())
+        raise primary.exception()
+
+    @staticmethod
+    def _release_when_settled(limit, *futures):
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def settled(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                limit.release()
+
+        for future in futures:
+            future.add_done_callback(settled)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        counts["hedge_rate"] = round(counts["hedged"] / counts["calls"], 4) if counts["calls"] else 0.0
+        return counts
+
+    def shutdown(self):
+        """Stops the worker threads without waiting for ignored stragglers."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
@@ -0,0 +1,142 @@
+import os
+import time
+import logging
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# --- HTTP Configuration ---
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 10))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 180)) # DALL-E renders can take a minute or more
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 4))
+HTTP_BACKOFF_BASE = float(os.environ.get('HTTP_BACKOFF_BASE', 1.0))
+HTTP_BACKOFF_MAX = float(os.environ.get('HTTP_BACKOFF_MAX', 60.0))
+# Number of distinct hosts to keep pools for, and keep-alive connections per host.
+HTTP_POOL_HOSTS = int(os.environ.get('HTTP_POOL_HOSTS', 10))
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 32))
+
+# Statuses worth retrying. 429 means the server refused the request outright;
+# the 5xx codes may or may not have been applied before the failure.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Returns the shared keep-alive session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            # The adapter keeps one connection pool per host, so Gemini, OpenAI,
+            # the image CDN and Basehub each reuse their own warm TLS connections.
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+
+def retry_after_seconds(response):
+    """Parses a Retry-After header (seconds or HTTP date) into seconds, or None."""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, response=None):
+    """Full-jitter exponential backoff, overridden by the server's Retry-After when present."""
+    retry_after = retry_after_seconds(response)
+    if retry_after is not None:
+        return min(retry_after, HTTP_BACKOFF_MAX)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+
+def request(method, url, retries=None, idempotent=None, already_applied=None, limiter=None, **kwargs):
+    """
+    Sends a request through the shared session with a default timeout and
+    retries with jittered exponential backoff that honour Retry-After.
+
+    Requests that are not idempotent (POST by default) are only retried when it
+    is certain the server did not act on them: a failed connect or a 429. After
+    an ambiguous failure (read timeout, dropped connection, 5xx) they are retried
+    only if an `already_applied()` callback is given and reports that the first
+    attempt did not land. If it reports that it did, None is returned instead of
+    sending a duplicate.
+
+    If a rate limiter is given, every attempt waits for it and 429s and
+    successes are reported back to it so it can adapt.
+
+    Returns the final response (callers still call raise_for_status) or raises
+    the last connection error once retries run out.
+    """
+    retries = HTTP_MAX_RETRIES if retries is None else retries
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    kwargs.setdefault('timeout', (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    session = get_session()
+
+    for attempt in range(retries + 1):
+        response = None
+        if limiter:
+            limiter.acquire()
+        try:
+            response = session.request(method, url, **kwargs)
+            if response.status_code == 429 and limiter:
+                limiter.on_throttled(retry_after_seconds(response))
+            if response.status_code not in RETRY_STATUSES:
+                if limiter:
+                    limiter.on_success()
+                return response
+            safe_to_retry = idempotent or response.status_code == 429
+            error = None
+        except requests.exceptions.ConnectTimeout as e:
+            safe_to_retry, error = True, e
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            safe_to_retry, error = idempotent, e
+
+        if attempt == retries:
+            break
+        if not safe_to_retry:
+            if already_applied is None:
+                break
+            if already_applied():
+                logger.info(f"ℹ️  {method} {url} already took effect before the failure; not resending.")
+                return None
+
+        delay = backoff_delay(attempt, response)
+        reason = f"HTTP {response.status_code}" if response is not None else type(error).__name__
+        if response is not None:
+            response.close()
+        logger.warning(f"🔁 {method} {url} failed ({reason}); retry {attempt + 1}/{retries} in {delay:.1f}s...")
+        metrics.add('retries') # Counted on the caller's open span, if any
+        time.sleep(delay)
+
+    if response is not None:
+        return response
+    raise error
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
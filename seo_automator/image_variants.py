@@ -0,0 +1,84 @@
+import io
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, features
+except ImportError: # listed in requirements.txt; without it only the original PNG is stored
+    Image = None
+
+CONTENT_TYPES = {'webp': 'image/webp', 'avif': 'image/avif', 'png': 'image/png'}
+
+
+def _has_codec(fmt):
+    return fmt == 'png' or features.check(fmt) # PNG is built into Pillow and has no feature flag
+
+
+def available_formats(formats):
+    """The subset of formats this Pillow build can encode (none without Pillow)."""
+    if Image is None:
+        return []
+    return [fmt for fmt in formats if fmt in CONTENT_TYPES and _has_codec(fmt)]
+
+
+def unavailable_formats(formats):
+    """Maps each format this Pillow build cannot encode to the reason why."""
+    if Image is None:
+        return {fmt: "Pillow is not installed" for fmt in formats}
+    missing = {}
+    for fmt in formats:
+        if fmt not in CONTENT_TYPES:
+            missing[fmt] = "not a supported variant format"
+        elif not _has_codec(fmt):
+            missing[fmt] = f"this Pillow build has no {fmt} codec"
+    return missing
+
+
+def make_variants(source, widths, formats, quality=80):
+    """
+    Re-encodes an image at each width (never upscaling) in each format.
+    source is the image bytes or a path to it. Only the pixels are re-encoded,
+    so EXIF, ICC profiles and text chunks are dropped. Runs in a worker process.
+
+    Returns a list of {"width", "height", "format", "data"} dicts, widest first.
+    """
+    image = Image.open(source if isinstance(source, str) else io.BytesIO(source))
+    image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    variants = []
+    for width in sorted({min(width, image.width) for width in widths}, reverse=True):
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            resized.save(buffer, format=fmt.upper(), quality=quality)
+            variants.append({"width": width, "height": height, "format": fmt, "data": buffer.getvalue()})
+    return variants
+
+
+class VariantPool:
+    """
+    Lazily started process pool for make_variants, so resizing and encoding
+    never hold the GIL of the threads doing network I/O. Workers are spawned
+    rather than forked, since the parent is full of threads.
+    """
+    def __init__(self, workers=None):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, source, widths, formats, quality=80):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+        return self._executor.submit(make_variants, source, widths, formats, quality)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
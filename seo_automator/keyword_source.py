@@ -0,0 +1,165 @@
+import re
+import csv
+import math
+import heapq
+import hashlib
+import logging
+import unicodedata
+from itertools import islice
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Header names recognized in keyword exports (Google Keyword Planner, Search
+# Console, Ahrefs, Semrush...), compared after normalize_keyword().
+KEYWORD_COLUMNS = ('keyword', 'keywords', 'query', 'top queries', 'search term', 'search query', 'term', 'topic')
+SCORE_COLUMNS = ('volume', 'search volume', 'avg monthly searches', 'score', 'impressions', 'clicks', 'traffic')
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_NUMBER = re.compile(r'(\d+(?:\.\d+)?)\s*([km]?)', re.IGNORECASE)
+_SUFFIXES = {'': 1, 'k': 1_000, 'm': 1_000_000}
+
+
+def normalize_keyword(keyword):
+    """Folds Unicode compatibility forms, lowercases, strips punctuation and collapses whitespace."""
+    return ' '.join(_PUNCTUATION.sub(' ', unicodedata.normalize('NFKC', keyword).lower()).split())
+
+
+def parse_score(value):
+    """Reads '12,100', '1.5K' or a '1K – 10K' range (its lower bound) as a number; anything else is 0."""
+    value = value.replace(',', '')
+    try:
+        score = float(value)
+        return score if math.isfinite(score) else 0.0
+    except ValueError:
+        pass
+    match = _NUMBER.search(value)
+    if not match:
+        return 0.0
+    return float(match.group(1)) * _SUFFIXES[match.group(2).lower()]
+
+
+class BloomFilter:
+    """
+    Fixed-size set of strings for deduplicating streams too big to hold in
+    memory. Membership is checked a whole chunk at a time with numpy. A key is
+    never reported new twice, but about error_rate of keys that really are new
+    are taken for duplicates once `capacity` keys have been added.
+    """
+    def __init__(self, capacity=10_000_000, error_rate=0.001):
+        self.size = max(64, int(-capacity * np.log(error_rate) / np.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * np.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self._steps = np.arange(self.hashes, dtype=np.uint64)
+
+    def add_many(self, keys):
+        """Adds distinct keys and returns a boolean array, True where a key was not seen before."""
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        digests = b''.join(hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest() for key in keys)
+        h1, h2 = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2).T
+        # Double hashing: the k bit positions are h1 + i*h2, wrapping mod 2**64 on purpose.
+        with np.errstate(over='ignore'):
+            positions = (h1[:, None] + self._steps * (h2[:, None] | np.uint64(1))) % np.uint64(self.size)
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        offsets = (positions >> np.uint64(3)).astype(np.int64)
+        new = ((self.bits[offsets] & masks) == 0).any(axis=1)
+        np.bitwise_or.at(self.bits, offsets[new].ravel(), masks[new].ravel())
+        return new
+
+
+class KeywordSource:
+    """
+    Streams keywords out of a CSV export of any size, in chunks of chunk_rows
+    rows, with memory bounded by the chunk, the Bloom filter and the number of
+    keywords asked for. Keywords are deduplicated after normalize_keyword().
+    When the file has a volume/score column they come out highest score first,
+    otherwise in file order. Columns are found by header name unless given;
+    a missing file or column raises OSError or ValueError right away.
+    """
+    def __init__(self, path, keyword_column=None, score_column=None, chunk_rows=50_000,
+                 dedup_capacity=10_000_000, error_rate=0.001):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            self.header = next(csv.reader(f), None)
+        if not self.header:
+            raise ValueError(f"{path} is empty.")
+        self.keyword_at, self.score_at = self._columns(keyword_column, score_column)
+        self.ranked = self.score_at is not None
+        self.seen = BloomFilter(dedup_capacity, error_rate)
+        self.stats = {"rows": 0, "blank": 0, "duplicates": 0, "unique": 0}
+
+    def _columns(self, keyword_column, score_column):
+        names = [normalize_keyword(name) for name in self.header]
+
+        def find(wanted, candidates):
+            if wanted:
+                if normalize_keyword(wanted) not in names:
+                    raise ValueError(f"Column '{wanted}' not found in {self.path}; it has {self.header}.")
+                return names.index(normalize_keyword(wanted))
+            return next((names.index(name) for name in candidates if name in names), None)
+
+        keyword = find(keyword_column, KEYWORD_COLUMNS)
+        if keyword is None:
+            if len(self.header) != 1:
+                raise ValueError(f"No keyword column in {self.path} (columns: {self.header}); name one explicitly.")
+            keyword = 0
+        return keyword, find(score_column, SCORE_COLUMNS)
+
+    def chunks(self):
+        """Yields lists of (keyword, score) for first sightings only; score is None without a score column."""
+        keyword_at, score_at = self.keyword_at, self.score_at
+        logger.info(f"🔑 Reading keywords from column '{self.header[keyword_at]}'"
+                    + (f", ranked by '{self.header[score_at]}'." if self.ranked else ", in file order."))
+        with open(self.path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            next(reader, None) # The header
+            while True:
+                rows = list(islice(reader, self.chunk_rows))
+                if not rows:
+                    return
+                self.stats["rows"] += len(rows)
+                # Duplicates within the chunk are folded first, so the filter only sees distinct keys.
+                chunk, blank = {}, 0
+                for row in rows:
+                    keyword = row[keyword_at].strip() if len(row) > keyword_at else ''
+                    key = normalize_keyword(keyword)
+                    if not key:
+                        blank += 1
+                        continue
+                    score = parse_score(row[score_at]) if score_at is not None and len(row) > score_at else None
+                    if key not in chunk or (score or 0) > (chunk[key][1] or 0):
+                        chunk[key] = (keyword, score)
+                new = self.seen.add_many(list(chunk))
+                fresh = [entry for entry, is_new in zip(chunk.values(), new) if is_new]
+                self.stats["blank"] += blank
+                self.stats["unique"] += len(fresh)
+                self.stats["duplicates"] += len(rows) - blank - len(fresh)
+                yield fresh
+
+    def keywords(self, limit):
+        """
+        Yields up to `limit` keywords. In file order they are yielded as they are
+        read; ranked by score, the file is read through once keeping a bounded
+        heap of the best `limit`, which are then yielded highest first.
+        """
+        chunks = self.chunks()
+        if not self.ranked:
+            yield from islice((keyword for chunk in chunks for keyword, _ in chunk), limit)
+            return
+
+        heap = [] # (score, -row, keyword): the smallest score, then the latest row, is evicted first
+        row = 0
+        for chunk in chunks:
+            for keyword, score in chunk:
+                entry = (score, -row, keyword)
+                row += 1
+                if len(heap) < limit:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+        logger.info(f"🔑 Kept the top {len(heap)} of {self.stats['unique']} unique keywords by score.")
+        for score, _, keyword in sorted(heap, reverse=True):
+            yield keyword
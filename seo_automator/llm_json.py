@@ -0,0 +1,152 @@
+import re
+import json
+
+
+class JsonStringFieldStream:
+    """
+    Incrementally decodes one string field of a JSON object as the text streams in.
+
+    feed() takes the next raw chunk of the model's response and returns whatever
+    new, already-unescaped characters of the field's value it completed, so the
+    value can be written out long before the closing brace arrives.
+    """
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self, field):
+        self.start_pattern = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self.started = False
+        self.done = False
+        self._pending = ''
+
+    def feed(self, chunk):
+        if self.done:
+            return ''
+        self._pending += chunk
+        if not self.started:
+            match = self.start_pattern.search(self._pending)
+            if not match:
+                # Keep only a tail long enough to hold a key split across chunks.
+                self._pending = self._pending[-200:]
+                return ''
+            self.started = True
+            self._pending = self._pending[match.end():]
+        return self._decode()
+
+    def _decode(self):
+        out = []
+        text = self._pending
+        i = 0
+        while i < len(text):
+            char = text[i]
+            if char == '"':
+                self.done = True
+                self._pending = ''
+                return ''.join(out)
+            if char != '\\':
+                out.append(char)
+                i += 1
+                continue
+            # Escape sequence: wait for more input if it is split across chunks.
+            if i + 1 >= len(text):
+                break
+            code = text[i + 1]
+            if code != 'u':
+                out.append(self._ESCAPES.get(code, code))
+                i += 2
+                continue
+            if i + 6 > len(text):
+                break
+            codepoint = int(text[i + 2:i + 6], 16)
+            if 0xD800 <= codepoint < 0xDC00:
+                # High surrogate: needs the following \uXXXX low half before it can be decoded.
+                if i + 12 > len(text):
+                    break
+                out.append(json.loads('"' + text[i:i + 12] + '"'))
+                i += 12
+            else:
+                out.append(chr(codepoint))
+                i += 6
+        self._pending = text[i:]
+        return ''.join(out)
+
+
+class TruncatedJsonError(ValueError):
+    """The response stops part way through its JSON object, e.g. at the output token limit."""
+
+
+# strict=False tolerates raw newlines and tabs inside strings, which models often emit.
+_DECODER = json.JSONDecoder(strict=False)
+_STRUCTURE = re.compile(r'[{}\[\]"\\]')
+_OPENING_FENCE = re.compile(r'^\s*```[\w-]*[ \t]*\n?')
+
+
+def is_truncated(text, start):
+    """True if the JSON value starting at text[start] is still open (unclosed string or brackets) at the end."""
+    depth = 0
+    in_string = False
+    skip_until = -1
+    for match in _STRUCTURE.finditer(text, start):
+        position = match.start()
+        if position < skip_until:
+            continue
+        char = match.group()
+        if in_string:
+            if char == '\\':
+                skip_until = position + 2 # The escaped character is not structure
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 0:
+                return False
+    return True
+
+
+def parse_json_response(text):
+    """
+    Parses the JSON object in a model response, ignoring ```json fences, any
+    prose before or after it and raw newlines inside strings.
+
+    Every '{' is tried in turn, skipping those inside the valid part of an
+    earlier attempt, so a stray brace in the prose does not hide the object.
+    Raises TruncatedJsonError if the last object tried is cut off before it
+    closes, and ValueError if there is no parseable object at all.
+    """
+    start = text.find('{')
+    if start == -1:
+        raise ValueError("no JSON object found in response")
+    error = None
+    open_at = None # Where the last object tried starts, if it is still open at the end
+    while start != -1:
+        try:
+            return _DECODER.raw_decode(text, start)[0]
+        except json.JSONDecodeError as e:
+            error = e
+            open_at = start if is_truncated(text, start) else None
+            # Braces before the error are nested in what did parse, not objects of their own.
+            start = text.find('{', max(start + 1, e.pos))
+    if open_at is not None:
+        raise TruncatedJsonError(f"response ends inside its JSON object ({len(text) - open_at} characters in)")
+    raise ValueError(f"no parseable JSON object in response: {error}")
+
+
+def salvage_string_field(text, field):
+    """Decodes one string field out of a broken or cut-off JSON response, or returns ''."""
+    stream = JsonStringFieldStream(field)
+    return stream.feed(text)
+
+
+def merge_continuation(text, continuation, min_overlap=20):
+    """
+    Appends a model's continuation of a cut-off response. A repeated opening
+    fence is dropped, as is any tail of text the model repeated at the start.
+    """
+    continuation = _OPENING_FENCE.sub('', continuation, count=1) if continuation.lstrip().startswith('```') else continuation
+    for size in range(min(len(text), len(continuation), 500), min_overlap - 1, -1):
+        if text.endswith(continuation[:size]):
+            return text + continuation[size:]
+    return text + continuation
@@ -0,0 +1,121 @@
+import re
+from collections import Counter
+
+# The formatting rules every article and pillar page prompt asks for.
+HOMEPAGE_URL = "https://www.agentweb.pro"
+CTA_OPENING = "Ready to put your marketing on autopilot?"
+CTA = (f"{CTA_OPENING} [Book a call with Harsha](https://calendly.com/harsha-agentweb/30min) to walk through "
+       "your current marketing workflow and see how AgentWeb can help you scale.")
+# Added when the model left out the homepage link.
+HOMEPAGE_SENTENCE = ("Founders who would rather spend their week on product than on campaigns can hand the whole job to a "
+                     f"[done-for-you marketing service]({HOMEPAGE_URL}).")
+
+FENCE = re.compile(r'^\s*(```|~~~)')
+HEADING = re.compile(r'^(#{1,6})[ \t]+(.*?)[ \t#]*$')
+# A level label: "H2:", "**H3:**" or "H2 -", then whitespace, so "H1-B Visa" is left alone.
+_LABEL = r'\**\s*H([1-6])(?:\s*:\**|\s+[-–—]\**)\s+\**\s*'
+# "H2: Title", "**H3:** Title" and the like, at the start of a heading.
+HEADING_LABEL = re.compile(r'^' + _LABEL, re.IGNORECASE)
+# A plain line that is only a labelled heading, e.g. "H2: Why Now".
+LABELLED_LINE = re.compile(r'^\s*' + _LABEL + r'(.+?)\s*\**\s*$', re.IGNORECASE)
+# A markdown link to the homepage, or a bare homepage URL (but not /build, /pricing...).
+HOMEPAGE_LINK = re.compile(
+    r'\[([^\]]*)\]\(\s*<?https?://(?:www\.)?agentweb\.pro/?>?(?:\s+"[^"]*")?\s*\)'
+    r'|(?<![(\[<\w/])https?://(?:www\.)?agentweb\.pro/?(?![\w/-]|\.\w)'
+)
+# Whitespace-separated tokens that are markup rather than words.
+MARKUP_TOKENS = frozenset(['#', '##', '###', '####', '#####', '######', '-', '*', '+', '>', '|', '—', '–',
+                           '---', '***', '```', '~~~'])
+PARAGRAPH_BREAK = re.compile(r'\n[ \t]*\n')
+CLOSING_HEADING = re.compile(r'^##[ \t]+.*\b(conclusion|final thoughts|wrapping up|key takeaways|next steps)\b',
+                             re.IGNORECASE | re.MULTILINE)
+
+
+def count_words(markdown):
+    """
+    Counts words in markdown the way a word processor would, skipping bare
+    markup tokens. A link counts as the words of its text.
+    """
+    tokens = markdown.split()
+    return len(tokens) - sum(map(MARKUP_TOKENS.__contains__, tokens))
+
+
+def fix_markdown(markdown, min_words=0):
+    """
+    Repairs an article's markdown against the prompt's rules in one pass:
+    headings become H2/H3 (H1 is the page title, so body H1s are demoted and
+    H4+ promoted), "H2:" style labels are stripped, exactly one homepage link
+    is kept (or added), and the body ends with the exact CTA paragraph.
+    Fenced code is left alone.
+
+    Returns (markdown, report) where report holds the fixes made, the word
+    count and how many words short of min_words the text still is.
+    """
+    fixes = Counter()
+    homepage_links = 0
+
+    def keep_first_homepage_link(match):
+        nonlocal homepage_links
+        homepage_links += 1
+        if homepage_links == 1:
+            return match.group(0)
+        fixes['extra homepage links removed'] += 1
+        return match.group(1) if match.group(1) is not None else "AgentWeb"
+
+    lines = []
+    in_fence = False
+    for line in markdown.split('\n'):
+        first = line.lstrip()[:1]
+        if first in '`~' and FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            # Cheap first-character checks keep the regexes off ordinary prose lines.
+            heading = HEADING.match(line) if first == '#' else None
+            labelled = LABELLED_LINE.match(line) if first in 'Hh*' and not heading else None
+            if heading or labelled:
+                level = len(heading.group(1)) if heading else int(labelled.group(1))
+                title = heading.group(2) if heading else labelled.group(2)
+                if labelled or HEADING_LABEL.match(title):
+                    fixes['heading labels stripped'] += 1
+                    title = HEADING_LABEL.sub('', title).strip('* ') or title
+                if level < 2:
+                    fixes['headings demoted'] += 1
+                elif level > 3:
+                    fixes['headings promoted'] += 1
+                line = '#' * min(max(level, 2), 3) + ' ' + title
+            if 'agentweb.pro' in line:
+                line = HOMEPAGE_LINK.sub(keep_first_homepage_link, line)
+        lines.append(line)
+
+    paragraphs = PARAGRAPH_BREAK.split('\n'.join(lines).strip())
+    ctas = [n for n, paragraph in enumerate(paragraphs) if paragraph.lstrip(' >*"_').startswith(CTA_OPENING)]
+    if ctas != [len(paragraphs) - 1] or paragraphs[-1] != CTA:
+        fixes['CTA replaced' if ctas else 'CTA added'] += 1
+        paragraphs = [paragraph for n, paragraph in enumerate(paragraphs) if n not in ctas and paragraph]
+        paragraphs.append(CTA)
+    if not homepage_links:
+        fixes['homepage link added'] += 1
+        paragraphs.insert(len(paragraphs) - 1, HOMEPAGE_SENTENCE)
+
+    fixed = '\n\n'.join(paragraphs)
+    words = count_words(fixed)
+    return fixed, {"fixes": dict(fixes), "words": words, "short_by": max(0, min_words - words)}
+
+
+def outline(markdown):
+    """The H2/H3 heading lines of a markdown text."""
+    return [line for line in markdown.split('\n') if line.startswith('## ') or line.startswith('### ')]
+
+
+def insert_sections(markdown, sections):
+    """
+    Inserts extra markdown sections before the closing section (a final
+    "Conclusion", "Key Takeaways"... heading) if there is one, else before
+    the CTA paragraph at the end.
+    """
+    sections = re.sub(r'^\s*```\w*\n|\n```\s*$', '', sections.strip()).strip()
+    closing = list(CLOSING_HEADING.finditer(markdown))
+    at = closing[-1].start() if closing else markdown.rfind(CTA)
+    if at == -1:
+        at = len(markdown)
+    return f"{markdown[:at].rstrip()}\n\n{sections}\n\n{markdown[at:]}".strip()
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Histogram buckets (seconds) for the Prometheus textfile; they span a fast S3
+# PUT up to a slow 2500-word Gemini generation.
+DURATION_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+# Numeric span fields that are summed per operation.
+COUNTED_FIELDS = ['bytes_in', 'bytes_out', 'prompt_tokens', 'response_tokens', 'cached_tokens', 'retries', 'hedges']
+
+_lock = threading.Lock()
+_local = threading.local()
+_operations = defaultdict(lambda: {"outcomes": defaultdict(int), "durations": [], "totals": defaultdict(int)})
+_configured = False
+_jsonl = None
+_pending = [] # Span records finished before configure() named a JSONL file
+_prometheus_path = None
+_flusher = None
+
+
+def configure(jsonl_path=None, prometheus_path=None, flush_interval=30):
+    """
+    Sets where span records (JSONL, one line per span) and the Prometheus
+    textfile go. Spans recorded before this call are written out now. The
+    textfile is rewritten every flush_interval seconds and by write_prometheus().
+    """
+    global _configured, _jsonl, _prometheus_path, _flusher
+    with _lock:
+        _configured = True
+        if jsonl_path:
+            os.makedirs(os.path.dirname(jsonl_path) or '.', exist_ok=True)
+            _jsonl = open(jsonl_path, 'a', encoding='utf-8')
+            for record in _pending:
+                _jsonl.write(json.dumps(record, default=str) + "\n")
+            _jsonl.flush()
+        _pending.clear()
+        _prometheus_path = prometheus_path
+    if prometheus_path and _flusher is None and flush_interval:
+        _flusher = threading.Thread(target=_flush_periodically, args=(flush_interval,), daemon=True)
+        _flusher.start()
+
+
+def _flush_periodically(interval):
+    while True:
+        time.sleep(interval)
+        write_prometheus()
+
+
+@contextmanager
+def span(operation, **fields):
+    """
+    Times one operation. Yields a dict the caller can add fields to (bytes_in,
+    bytes_out, prompt_chars, response_chars, prompt_tokens, response_tokens,
+    outcome...). The outcome defaults to 'ok', or 'error' if an exception escapes.
+    """
+    record = {"operation": operation, "outcome": "ok", **fields}
+    stack = _local.__dict__.setdefault('stack', [])
+    stack.append(record)
+    started = time.monotonic()
+    try:
+        yield record
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            record["outcome"] = "error"
+            record.setdefault("error", str(e)[:200])
+        raise
+    finally:
+        stack.remove(record)
+        record["duration_s"] = round(time.monotonic() - started, 4)
+        record["ts"] = time.time()
+        _record(record)
+
+
+def add(field, amount=1):
+    """Adds to a numeric field of the innermost open span on this thread, if any."""
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        with _lock: # The span may be attached to several threads
+            stack[-1][field] = stack[-1].get(field, 0) + amount
+
+
+def current():
+    """The innermost open span on this thread, or None; hand it to attach() on a helper thread."""
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def attach(record):
+    """Makes add() on this thread count towards a span that another thread opened (see current())."""
+    if record is None:
+        yield
+        return
+    stack = _local.__dict__.setdefault('stack', [])
+    stack.append(record)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def _record(record):
+    with _lock:
+        stats = _operations[record["operation"]]
+        stats["outcomes"][record["outcome"]] += 1
+        stats["durations"].append(record["duration_s"])
+        for field in COUNTED_FIELDS:
+            stats["totals"][field] += record.get(field) or 0
+        if _jsonl:
+            _jsonl.write(json.dumps(record, default=str) + "\n")
+            _jsonl.flush()
+        elif not _configured:
+            _pending.append(record)
+
+
+def summary():
+    """Returns one row per operation with counts, latency percentiles and totals."""
+    rows = []
+    with _lock:
+        for operation, stats in sorted(_operations.items()):
+            durations = sorted(stats["durations"])
+            count = len(durations)
+            rows.append({
+                "operation": operation,
+                "count": count,
+                "errors": sum(n for outcome, n in stats["outcomes"].items() if outcome in ('error', 'failed')),
+                "p50": durations[int(0.50 * (count - 1))] if count else 0.0,
+                "p95": durations[int(0.95 * (count - 1))] if count else 0.0,
+                "total_s": sum(durations),
+                **{field: stats["totals"][field] for field in COUNTED_FIELDS},
+            })
+    return rows
+
+
+def format_summary():
+    lines = [f"📈 {'operation':<26}{'count':>6}{'err':>5}{'p50 s':>8}{'p95 s':>8}{'total s':>9}"
+             f"{'MB in':>8}{'MB out':>8}{'tokens':>9}{'retry':>6}"]
+    for row in summary():
+        lines.append(
+            f"   {row['operation']:<26}{row['count']:>6}{row['errors']:>5}{row['p50']:>8.2f}{row['p95']:>8.2f}"
+            f"{row['total_s']:>9.1f}{row['bytes_in'] / 1e6:>8.2f}{row['bytes_out'] / 1e6:>8.2f}"
+            f"{row['prompt_tokens'] + row['response_tokens']:>9}{row['retries']:>6}"
+        )
+    return "\n".join(lines)
+
+
+def write_prometheus(path=None):
+    """Writes every metric in Prometheus text format, atomically, for node_exporter's textfile collector."""
+    path = path or _prometheus_path
+    if not path:
+        return
+    lines = [
+        "# HELP seo_operation_total Instrumented operations by outcome.",
+        "# TYPE seo_operation_total counter",
+    ]
+    histogram = ["# HELP seo_operation_duration_seconds Duration of instrumented operations.",
+                 "# TYPE seo_operation_duration_seconds histogram"]
+    totals = {field: [f"# TYPE seo_operation_{field}_total counter"] for field in COUNTED_FIELDS}
+    with _lock:
+        for operation, stats in sorted(_operations.items()):
+            label = f'operation="{operation}"'
+            for outcome, count in sorted(stats["outcomes"].items()):
+                lines.append(f'seo_operation_total{{{label},outcome="{outcome}"}} {count}')
+            for bucket in DURATION_BUCKETS:
+                count = sum(1 for d in stats["durations"] if d <= bucket)
+                histogram.append(f'seo_operation_duration_seconds_bucket{{{label},le="{bucket}"}} {count}')
+            histogram.append(f'seo_operation_duration_seconds_bucket{{{label},le="+Inf"}} {len(stats["durations"])}')
+            histogram.append(f'seo_operation_duration_seconds_sum{{{label}}} {sum(stats["durations"]):.4f}')
+            histogram.append(f'seo_operation_duration_seconds_count{{{label}}} {len(stats["durations"])}')
+            for field in COUNTED_FIELDS:
+                totals[field].append(f'seo_operation_{field}_total{{{label}}} {stats["totals"][field]}')
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines + histogram + [line for field in COUNTED_FIELDS for line in totals[field]]) + "\n")
+    os.replace(temporary, path) # A scrape never sees a half-written file
@@ -0,0 +1,86 @@
+import threading
+from collections import defaultdict, deque, namedtuple
+
+# A model tier plus the limits every call on it gets: a request timeout in
+# seconds and a cap on output tokens (which includes a thinking model's thoughts).
+ModelRoute = namedtuple('ModelRoute', ['model', 'timeout', 'max_output_tokens'])
+
+# The smallest context, in tokens, Gemini will cache for each model. Flash
+# accepts much smaller caches than Pro; models not listed get the largest minimum.
+MIN_CONTEXT_TOKENS = {
+    'gemini-2.5-flash': 1024,
+    'gemini-2.5-flash-lite': 1024,
+    'gemini-2.5-pro': 4096,
+}
+
+
+def min_context_tokens(model):
+    """Gemini's minimum cacheable context size for a model, e.g. 'gemini-2.5-flash' or 'models/gemini-2.5-pro'."""
+    return MIN_CONTEXT_TOKENS.get(model.removeprefix('models/'), max(MIN_CONTEXT_TOKENS.values()))
+
+
+def parse_route(value, default):
+    """
+    Parses 'model:timeout:max_output_tokens' into a ModelRoute. Any part may be
+    left empty to keep the default's, e.g. 'gemini-2.5-flash' or '::8192'.
+    """
+    parts = (value.split(':') + ['', ''])[:3]
+    return ModelRoute(
+        model=parts[0].strip() or default.model,
+        timeout=float(parts[1]) if parts[1].strip() else default.timeout,
+        max_output_tokens=int(parts[2]) if parts[2].strip() else default.max_output_tokens
+    )
+
+
+class ModelRouter:
+    """
+    Maps each kind of Gemini call (topics, article, image_prompt...) to a
+    ModelRoute and keeps a rolling window of each route's latencies, so
+    routes can be tuned from real numbers. Unknown tasks use the default route.
+    """
+    def __init__(self, routes, default='article', window=500):
+        self.routes = dict(routes)
+        self.default = default
+        self._latencies = defaultdict(lambda: deque(maxlen=window))
+        self._calls = defaultdict(lambda: {"ok": 0, "failed": 0})
+        self._lock = threading.Lock()
+
+    def route(self, task):
+        return self.routes.get(task) or self.routes[self.default]
+
+    def record(self, task, seconds, ok=True):
+        """Records one finished API call on a route; only successful calls count towards its latency."""
+        with self._lock:
+            self._calls[task]["ok" if ok else "failed"] += 1
+            if ok:
+                self._latencies[task].append(seconds)
+
+    def percentile(self, task, fraction):
+        """The given latency percentile (0-1) of a route's recent calls, or None before any."""
+        with self._lock:
+            latencies = sorted(self._latencies[task])
+        if not latencies:
+            return None
+        return latencies[int(fraction * (len(latencies) - 1))]
+
+    def stats(self):
+        """Returns {task: {"model", "ok", "failed", "p50", "p95"}} for every route that was called."""
+        with self._lock:
+            tasks = sorted(self._calls)
+        return {
+            task: {
+                "model": self.route(task).model,
+                **self._calls[task],
+                "p50": self.percentile(task, 0.50),
+                "p95": self.percentile(task, 0.95),
+            }
+            for task in tasks
+        }
+
+    def format_stats(self):
+        lines = [f"🧭 {'route':<14}{'model':<24}{'ok':>5}{'fail':>6}{'p50 s':>8}{'p95 s':>8}"]
+        for task, row in self.stats().items():
+            p50 = f"{row['p50']:>8.2f}" if row['p50'] is not None else f"{'-':>8}"
+            p95 = f"{row['p95']:>8.2f}" if row['p95'] is not None else f"{'-':>8}"
+            lines.append(f"   {task:<14}{row['model']:<24}{row['ok']:>5}{row['failed']:>6}{p50}{p95}")
+        return "\n".join(lines)
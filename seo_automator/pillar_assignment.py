@@ -0,0 +1,146 @@
+import math
+import re
+import zlib
+
+import numpy as np
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'for', 'from', 'how', 'in', 'into', 'is',
+    'it', 'its', 'of', 'on', 'or', 'our', 's', 'that', 'the', 'this', 'to', 'vs', 'what', 'when', 'why',
+    'with', 'without', 'you', 'your',
+}
+
+
+def _terms(text):
+    """Word unigrams and bigrams of a text, stopwords removed."""
+    words = [w for w in re.findall(r'\w+', text.lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def tfidf_rows(texts):
+    """
+    Builds L2-normalized TF-IDF vectors for texts in sparse (rows, cols, values)
+    form. Terms are hashed with crc32 and renumbered densely, so the number of
+    columns is the number of distinct terms actually seen.
+    """
+    rows, hashes = [], []
+    for row, text in enumerate(texts):
+        term_hashes = [zlib.crc32(term.encode('utf-8')) for term in _terms(text)]
+        rows.extend([row] * len(term_hashes))
+        hashes.extend(term_hashes)
+    rows = np.array(rows, dtype=np.int64)
+    vocabulary, cols = np.unique(np.array(hashes, dtype=np.uint32), return_inverse=True)
+
+    # Merge repeated terms within a text into one (row, col) entry with its count.
+    width = max(1, len(vocabulary))
+    pairs, counts = np.unique(rows * width + cols, return_counts=True)
+    rows, cols = np.divmod(pairs, width)
+    document_frequency = np.bincount(cols, minlength=len(vocabulary))
+    values = (1 + np.log(counts)) * (np.log((1 + len(texts)) / (1 + document_frequency[cols])) + 1)
+
+    norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(texts)))
+    values = values / np.where(norms[rows] > 0, norms[rows], 1)
+    return rows, cols, values, len(vocabulary)
+
+
+def assign_with_capacity(similarity, capacity, minimum=0):
+    """
+    Gives each row its most similar column without exceeding `capacity` rows
+    per column. Every round, all unplaced rows bid for their best open column
+    at once; an overbooked column keeps its most similar bidders and closes,
+    and the rest bid again next round. Rows similar to nothing are spread over
+    the least-loaded columns at the end. Columns left with fewer than `minimum`
+    rows are then topped up (see fill_minimum). Returns (assignment, load).
+    """
+    row_count, column_count = similarity.shape
+    assignment = np.full(row_count, -1)
+    load = np.zeros(column_count, dtype=np.int64)
+    is_open = np.ones(column_count, dtype=bool)
+    pending = np.flatnonzero(similarity.max(axis=1) > 0)
+    while len(pending) and is_open.any():
+        scores = np.where(is_open, similarity[pending], -np.inf)
+        choice = scores.argmax(axis=1)
+        best = scores[np.arange(len(pending)), choice]
+        # Rank the bidders for each column, most similar first.
+        order = np.lexsort((-best, choice))
+        sorted_choice = choice[order]
+        group_start = np.searchsorted(sorted_choice, sorted_choice, 'left')
+        rank = np.arange(len(order)) - group_start
+        accepted = order[rank < capacity - load[sorted_choice]]
+        assignment[pending[accepted]] = choice[accepted]
+        load += np.bincount(choice[accepted], minlength=column_count)
+        is_open &= load < capacity
+        pending = pending[assignment[pending] == -1]
+
+    for row in np.flatnonzero(assignment == -1):
+        column = int(np.argmin(np.where(load < capacity, load, np.iinfo(np.int64).max)))
+        assignment[row] = column
+        load[column] += 1
+    fill_minimum(similarity, assignment, load, minimum)
+    return assignment, load
+
+
+def fill_minimum(similarity, assignment, load, minimum):
+    """
+    Moves rows into columns holding fewer than `minimum` rows, in place. Each
+    move takes, from a column with rows to spare, the row that loses the least
+    similarity by switching, so a thin or off-topic column is never left empty.
+    """
+    rows = np.arange(len(assignment))
+    for column in np.flatnonzero(load < minimum):
+        while load[column] < minimum:
+            movable = load[assignment] > minimum
+            if not movable.any():
+                return
+            loss = np.where(movable, similarity[rows, assignment] - similarity[:, column], np.inf)
+            row = int(loss.argmin())
+            load[assignment[row]] -= 1
+            assignment[row] = column
+            load[column] += 1
+
+
+def assign_articles_to_pillars(article_texts, pillar_titles, capacity_slack=1.25, iterations=3):
+    """
+    Assigns every article to the pillar page whose centroid it is most similar to.
+
+    Pillar centroids start as the pillar titles and are refined a few times
+    towards the mean of the articles assigned to them. No pillar takes more
+    than ceil(articles / pillars * capacity_slack) articles, and none fewer
+    than floor(articles / pillars) (see assign_with_capacity); articles with
+    no terms in common with any pillar go to the least-loaded one.
+
+    Returns a list of article index lists, one per pillar.
+    """
+    article_count, pillar_count = len(article_texts), len(pillar_titles)
+    if not article_count or not pillar_count:
+        return [[] for _ in pillar_titles]
+    capacity = max(1, math.ceil(article_count / pillar_count * capacity_slack))
+    minimum = article_count // pillar_count
+
+    rows, cols, values, vocabulary_size = tfidf_rows(list(article_texts) + list(pillar_titles))
+    is_pillar = rows >= article_count
+    pillar_vectors = np.zeros((pillar_count, vocabulary_size))
+    pillar_vectors[rows[is_pillar] - article_count, cols[is_pillar]] = values[is_pillar]
+    rows, cols, values = rows[~is_pillar], cols[~is_pillar], values[~is_pillar]
+
+    # Entries are sorted by row, so each article's terms form one contiguous segment.
+    article_rows, segment_starts = np.unique(rows, return_index=True)
+
+    centroids = pillar_vectors
+    for _ in range(iterations):
+        # Cosine similarity of every article to every centroid in one pass:
+        # each sparse entry contributes value * centroid weight to its row.
+        similarity = np.zeros((article_count, pillar_count))
+        if len(rows):
+            term_weights = np.ascontiguousarray(centroids.T)[cols] # Row gathers are far cheaper than column ones
+            similarity[article_rows] = np.add.reduceat(values[:, None] * term_weights, segment_starts)
+
+        assignment, load = assign_with_capacity(similarity, capacity, minimum)
+
+        # The pillar title keeps anchoring its centroid so clusters cannot drift to another topic.
+        article_sums = np.bincount(assignment[rows] * vocabulary_size + cols, weights=values,
+                                   minlength=pillar_count * vocabulary_size).reshape(pillar_count, vocabulary_size)
+        centroids = pillar_vectors + article_sums / np.maximum(load, 1)[:, None]
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1), 1e-12)[:, None]
+
+    return [np.flatnonzero(assignment == pillar).tolist() for pillar in range(pillar_count)]
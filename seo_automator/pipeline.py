@@ -0,0 +1,206 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sentinel placed on a stage's queue to tell one of its workers to exit.
+_STOP = object()
+
+
+class Stage:
+    """
+    One step of the pipeline with its own worker threads and bounded input queue.
+
+    With batch_size > 1 the stage micro-batches: func receives a list of up to
+    batch_size items (collected for at most batch_wait seconds after the first
+    one arrives) and must return a list of the same length.
+
+    on_close, if given, is called by close() to release whatever func keeps
+    running between items, such as an executor of its own.
+    """
+    def __init__(self, name, func, workers=1, queue_size=None, batch_size=1, batch_wait=0.0, on_close=None):
+        self.name = name
+        self.func = func
+        self.on_close = on_close
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        # A bounded queue is what gives us backpressure: when this stage falls
+        # behind, the stage feeding it blocks on put() instead of racing ahead.
+        self.queue = queue.Queue(maxsize=queue_size or self.workers * self.batch_size * 2)
+        self.processed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+        self.durations = []
+        self._lock = threading.Lock()
+        self._started_at = None
+
+    def run_one(self, item):
+        """Runs the stage function on a single item, outside of any pipeline, and records its timing."""
+        with self._lock:
+            self.in_flight += 1
+            if self._started_at is None:
+                self._started_at = time.monotonic()
+        started = time.monotonic()
+        result = None
+        try:
+            result = self.func([item])[0] if self.batch_size > 1 else self.func(item)
+            return result
+        finally:
+            ok = result is not None
+            self.record(time.monotonic() - started, int(ok), int(not ok))
+
+    def close(self):
+        """Releases what the stage function holds once no more items will be run (see on_close)."""
+        if self.on_close:
+            self.on_close()
+
+    def record(self, duration, ok, failed=0):
+        """Records one call that processed `ok` items successfully and `failed` unsuccessfully."""
+        with self._lock:
+            self.in_flight -= ok + failed
+            self.busy_seconds += duration
+            self.durations.extend([duration] * (ok + failed))
+            self.processed += ok
+            self.failed += failed
+
+    def stats(self):
+        """Returns a snapshot of queue depth and throughput for this stage."""
+        with self._lock:
+            elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+            done = self.processed + self.failed
+            return {
+                "stage": self.name,
+                "workers": self.workers,
+                "queue_depth": self.queue.qsize(),
+                "in_flight": self.in_flight,
+                "processed": self.processed,
+                "failed": self.failed,
+                "per_minute": done / elapsed * 60 if elapsed else 0.0,
+                "avg_seconds": self.busy_seconds / done if done else 0.0,
+                # Share of worker time spent busy; the stage closest to 100% is the bottleneck.
+                "utilization": self.busy_seconds / (elapsed * self.workers) if elapsed else 0.0,
+            }
+
+
+class Pipeline:
+    """
+    Runs items through a list of stages joined by bounded queues.
+
+    Each stage function takes an item and returns the item to pass on, or None
+    to drop it. Exceptions are caught, recorded in `failures` and the item is dropped.
+
+    If given, on_complete(item, result) is called from the worker thread as soon
+    as an item leaves the pipeline, with result None if it failed.
+    """
+    def __init__(self, stages, report_interval=30, on_complete=None):
+        self.stages = stages
+        self.report_interval = report_interval
+        self.on_complete = on_complete
+        self.results = []
+        self.failures = []
+        self._results_lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _next_batch(self, stage):
+        """Blocks for the next item, then gathers up to batch_size within batch_wait. Returns (items, stopped)."""
+        item = stage.queue.get()
+        if item is _STOP:
+            return [], True
+        items = [item]
+        deadline = time.monotonic() + stage.batch_wait
+        while len(items) < stage.batch_size:
+            try:
+                item = stage.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        stopped = False
+        while not stopped:
+            items, stopped = self._next_batch(stage)
+            if not items:
+                continue
+            with stage._lock:
+                stage.in_flight += len(items)
+            started = time.monotonic()
+            try:
+                outputs = stage.func(items) if stage.batch_size > 1 else [stage.func(items[0])]
+                errors = [None if output is not None else "stage returned no result" for output in outputs]
+            except Exception as e:
+                outputs = [None] * len(items)
+                errors = [e] * len(items)
+            ok = sum(1 for output in outputs if output is not None)
+            stage.record(time.monotonic() - started, ok, len(items) - ok)
+
+            for item, output, error in zip(items, outputs, errors):
+                if output is None:
+                    with self._results_lock:
+                        self.failures.append((item, stage.name, error))
+                elif next_stage:
+                    next_stage.queue.put(output)
+                    continue
+                else:
+                    with self._results_lock:
+                        self.results.append(output)
+                if self.on_complete:
+                    self.on_complete(item, output)
+
+    def _reporter(self):
+        while not self._done.wait(self.report_interval):
+            logger.info(self.format_stats())
+
+    def stats(self):
+        return [stage.stats() for stage in self.stages]
+
+    def format_stats(self):
+        lines = [f"📊 {'stage':<14}{'queue':>6}{'busy':>6}{'done':>6}{'fail':>6}{'/min':>8}{'avg s':>8}{'util':>7}"]
+        for s in self.stats():
+            lines.append(
+                f"   {s['stage']:<14}{s['queue_depth']:>6}{s['in_flight']:>6}{s['processed']:>6}{s['failed']:>6}"
+                f"{s['per_minute']:>8.1f}{s['avg_seconds']:>8.1f}{s['utilization']:>7.0%}"
+            )
+        return "\n".join(lines)
+
+    def run(self, items):
+        """Feeds every item through the pipeline and blocks until all stages drain."""
+        threads = []
+        for index, stage in enumerate(self.stages):
+            stage._started_at = time.monotonic()
+            stage_threads = [
+                threading.Thread(target=self._worker, args=(index,), name=f"{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)
+            ]
+            for thread in stage_threads:
+                thread.start()
+            threads.append(stage_threads)
+
+        reporter = None
+        if self.report_interval:
+            reporter = threading.Thread(target=self._reporter, daemon=True)
+            reporter.start()
+
+        for item in items:
+            self.stages[0].queue.put(item)
+
+        # Shut stages down front to back: once every worker of a stage has seen
+        # its sentinel, nothing more can reach the next stage.
+        for stage, stage_threads in zip(self.stages, threads):
+            for _ in stage_threads:
+                stage.queue.put(_STOP)
+            for thread in stage_threads:
+                thread.join()
+
+        self._done.set()
+        if reporter:
+            reporter.join()
+        return self.results
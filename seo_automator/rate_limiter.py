@@ -0,0 +1,116 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExceeded(Exception):
+    """Raised when a call would take the run past one of its budget limits."""
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket for one provider that adapts to throttling.
+
+    Starts at the configured ceiling. A 429 halves the refill rate and pauses the
+    bucket for the server's Retry-After; every success nudges the rate back up
+    by a twentieth of the ceiling, so throughput settles just under the quota.
+    clock and sleep can be swapped for a fake clock in tests.
+    """
+    def __init__(self, name, requests_per_minute, burst=None, min_requests_per_minute=1,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.name = name
+        self.ceiling = requests_per_minute / 60.0
+        self.floor = min_requests_per_minute / 60.0
+        self.rate = self.ceiling
+        self.capacity = burst or max(1.0, self.ceiling * 5)
+        self.tokens = self.capacity
+        self.throttled = 0
+        self.waited_seconds = 0.0
+        self._paused_until = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self):
+        """Blocks until the bucket allows one more request."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now >= self._paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self.tokens) / self.rate)
+                self.waited_seconds += wait
+            self._sleep(wait)
+
+    def on_throttled(self, retry_after=None):
+        """Backs off after a 429: halve the rate and honour Retry-After if given."""
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.floor, self.rate / 2)
+            self.tokens = 0
+            if retry_after:
+                self._paused_until = max(self._paused_until, self._clock() + retry_after)
+        logger.warning(f"🐢 {self.name} throttled; slowing to {self.rate * 60:.1f} requests/min.")
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.ceiling, self.rate + self.ceiling / 20)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests_per_minute": round(self.rate * 60, 1),
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited_seconds, 1),
+            }
+
+
+class RunBudget:
+    """
+    Run-level spend limits on paid API requests, estimated tokens and images.
+    A limit of None means unlimited. Once any limit is hit the budget stays
+    exhausted, so callers can stop scheduling new work.
+    """
+    def __init__(self, max_requests=None, max_tokens=None, max_images=None):
+        self.limits = {"requests": max_requests, "tokens": max_tokens, "images": max_images}
+        self.used = {"requests": 0, "tokens": 0, "images": 0}
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def reserve(self, requests=0, tokens=0, images=0):
+        """Claims spend for one call, or raises BudgetExceeded if it would go over a limit."""
+        wanted = {"requests": requests, "tokens": tokens, "images": images}
+        with self._lock:
+            for name, amount in wanted.items():
+                limit = self.limits[name]
+                if limit is not None and amount and self.used[name] + amount > limit:
+                    self.exhausted = True
+                    raise BudgetExceeded(f"run budget for {name} exhausted ({self.used[name]}/{limit})")
+            for name, amount in wanted.items():
+                self.used[name] += amount
+
+    def record_tokens(self, tokens):
+        """Adds tokens that were only known after the call (e.g. output tokens)."""
+        with self._lock:
+            self.used["tokens"] += tokens
+            limit = self.limits["tokens"]
+            if limit is not None and self.used["tokens"] >= limit:
+                self.exhausted = True
+
+    def stats(self):
+        with self._lock:
+            return {name: f"{self.used[name]}/{self.limits[name] or '∞'}" for name in self.used}
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token) for budgeting before a call."""
+    return len(text) // 4 + 1 if text else 0
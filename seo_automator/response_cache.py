@@ -0,0 +1,112 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+CACHE_FILENAME = 'cache.sqlite'
+
+
+def cache_key(*parts):
+    """Content-addressed key: a SHA-256 over the given parts (e.g. model name and prompt)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    A size-bounded, optionally expiring key/value cache stored as SQLite on disk.
+
+    Least recently used entries are evicted once the total stored size exceeds
+    max_bytes, and entries older than ttl_seconds are treated as misses. Every
+    thread gets its own connection and SQLite's locking keeps concurrent workers
+    (threads or processes) safe.
+    """
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024, ttl_seconds=None):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILENAME)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, counter, amount=1):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, key):
+        """Returns the cached value for key, or None on a miss or expired entry."""
+        conn = self._conn()
+        row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            row = None
+        if row is None:
+            self._count('misses')
+            return None
+        conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        self._count('hits')
+        return row[0]
+
+    def set(self, key, value):
+        """Stores value under key, then evicts least recently used entries if over max_bytes."""
+        size = len(value.encode('utf-8'))
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", (key, value, size, now, now))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                for old_key, old_size in conn.execute(
+                    "SELECT key, size FROM entries WHERE key != ? ORDER BY last_access", (key,)
+                ).fetchall():
+                    conn.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                    evicted += 1
+                    total -= old_size
+                    if total <= self.max_bytes:
+                        break
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if evicted:
+            self._count('evictions', evicted)
+
+    def stats(self):
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,186 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+# Lifecycle of an article, in order. A stage whose state has already been
+# reached is skipped on --resume.
+ARTICLE_STATES = ['pending', 'text_done', 'image_uploaded', 'file_written', 'published']
+
+JOURNAL_FILENAME = 'journal.sqlite'
+
+
+def reached(item, state):
+    """True if the journaled item is already at or past the given state."""
+    return ARTICLE_STATES.index(item.get("state", "pending")) >= ARTICLE_STATES.index(state)
+
+
+class RunJournal:
+    """
+    Durable record of a bulk run, stored as SQLite in the run directory.
+
+    Keeps the topic list, the run's start date and, for every article and
+    pillar page, the furthest state it reached plus the artifacts produced so
+    far (description, body, image URL, slug...). Safe to share across threads,
+    and across worker processes writing to the same run directory.
+
+    WAL mode needs shared memory, so it only works for processes on one host;
+    pass shared_fs=True when the run directory is on a network filesystem.
+    """
+    def __init__(self, run_dir, shared_fs=False):
+        self.run_dir = run_dir
+        self.path = os.path.join(run_dir, JOURNAL_FILENAME)
+        self._lock = threading.Lock()
+        # Autocommit mode: every record() is durable as soon as it returns. The
+        # timeout lets concurrent worker processes wait their turn to write.
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=DELETE" if shared_fs else "PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                kind TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                artifacts TEXT NOT NULL DEFAULT '{}',
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (kind, idx)
+            )
+        """)
+
+    @classmethod
+    def create(cls, runs_dir, shared_fs=False):
+        """Creates a fresh run directory named after the current time."""
+        run_dir = os.path.join(runs_dir, datetime.now().strftime('%Y%m%d-%H%M%S'))
+        os.makedirs(run_dir, exist_ok=True)
+        return cls(run_dir, shared_fs)
+
+    @classmethod
+    def latest(cls, runs_dir, shared_fs=False):
+        """Opens the most recent run in runs_dir, or returns None if there is none."""
+        if not os.path.isdir(runs_dir):
+            return None
+        runs = sorted(
+            name for name in os.listdir(runs_dir)
+            if os.path.exists(os.path.join(runs_dir, name, JOURNAL_FILENAME))
+        )
+        return cls(os.path.join(runs_dir, runs[-1]), shared_fs) if runs else None
+
+    def start(self, titles, start_date, keywords=None):
+        """
+        Records the topic list and start date for a new run. For a run whose
+        titles come from a keyword file, `keywords` holds what is needed to read
+        on from where it got: {"path", "limit", "dedup_threshold"}.
+        """
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('topics', ?)", (json.dumps(titles),))
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('start_date', ?)", (start_date.isoformat(),))
+            if keywords:
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('keywords', ?)",
+                                  (json.dumps({**keywords, "used": 0, "done": False}),))
+            now = datetime.now().isoformat()
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO items (kind, idx, title, updated_at) VALUES ('article', ?, ?, ?)",
+                [(i, title, now) for i, title in enumerate(titles)]
+            )
+            self.conn.execute("COMMIT")
+
+    def extend(self, titles, keywords_used=0):
+        """
+        Appends more titles to a started run's topic list, for topics that arrive
+        in batches, and returns the new article items. keywords_used counts the
+        keywords these titles were written for, in the same transaction, so a
+        resumed keyword run reads on from exactly where this one stopped.
+        """
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'topics'").fetchone()
+            topics = json.loads(row[0]) if row else []
+            now = datetime.now().isoformat()
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO items (kind, idx, title, updated_at) VALUES ('article', ?, ?, ?)",
+                [(len(topics) + i, title, now) for i, title in enumerate(titles)]
+            )
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('topics', ?)", (json.dumps(topics + titles),))
+            if keywords_used:
+                row = self.conn.execute("SELECT value FROM meta WHERE key = 'keywords'").fetchone()
+                if row:
+                    keywords = json.loads(row[0])
+                    keywords["used"] += keywords_used
+                    self.conn.execute("UPDATE meta SET value = ? WHERE key = 'keywords'", (json.dumps(keywords),))
+            self.conn.execute("COMMIT")
+        return [{"index": len(topics) + i, "title": title, "state": 'pending'} for i, title in enumerate(titles)]
+
+    def finish_keywords(self):
+        """Notes that every title the run's keyword file had to give is in the topic list."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'keywords'").fetchone()
+            if row:
+                self.conn.execute("UPDATE meta SET value = ? WHERE key = 'keywords'",
+                                  (json.dumps({**json.loads(row[0]), "done": True}),))
+            self.conn.execute("COMMIT")
+
+    def _meta(self, key):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def topics(self):
+        value = self._meta('topics')
+        return json.loads(value) if value else []
+
+    def start_date(self):
+        value = self._meta('start_date')
+        return datetime.fromisoformat(value) if value else None
+
+    def keywords(self):
+        """The keyword file a run takes its titles from and how far it got, or None for other runs."""
+        value = self._meta('keywords')
+        return json.loads(value) if value else None
+
+    def _to_item(self, row):
+        idx, title, state, artifacts = row
+        return {"index": idx, "title": title, "state": state, **json.loads(artifacts)}
+
+    def items(self, kind):
+        """Returns every journaled item of a kind ('article' or 'pillar') in index order."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT idx, title, state, artifacts FROM items WHERE kind = ? ORDER BY idx", (kind,)
+            ).fetchall()
+        return [self._to_item(row) for row in rows]
+
+    def get(self, kind, index):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT idx, title, state, artifacts FROM items WHERE kind = ? AND idx = ?", (kind, index)
+            ).fetchone()
+        return self._to_item(row) if row else None
+
+    def record(self, kind, index, title, state=None, **artifacts):
+        """Merges new artifacts into an item and optionally advances its state."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            row = self.conn.execute(
+                "SELECT state, artifacts FROM items WHERE kind = ? AND idx = ?", (kind, index)
+            ).fetchone()
+            current_state, current = row if row else ('pending', '{}')
+            merged = {**json.loads(current), **artifacts}
+            self.conn.execute(
+                """INSERT INTO items (kind, idx, title, state, artifacts, updated_at) VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (kind, idx) DO UPDATE SET
+                       state = excluded.state, artifacts = excluded.artifacts, updated_at = excluded.updated_at""",
+                (kind, index, title, state or current_state, json.dumps(merged), datetime.now().isoformat())
+            )
+            self.conn.execute("COMMIT")
+
+    def summary(self, kind='article'):
+        """Counts items per state, e.g. {'published': 72, 'text_done': 1, 'pending': 27}."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT state, COUNT(*) FROM items WHERE kind = ? GROUP BY state", (kind,)
+            ).fetchall()
+        return dict(rows)
@@ -0,0 +1,77 @@
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyScheduler:
+    """
+    Runs tasks on a thread pool as soon as every item they depend on has settled.
+
+    Work happening elsewhere (a thread pool, the staged pipeline) reports each
+    item through complete(); a task whose dependencies have all settled is
+    submitted right away, so it overlaps with whatever work is still running.
+    A task receives the results of the dependencies that succeeded, in the
+    order they were listed.
+    """
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.futures = {}
+        self._tasks = {}
+        self._dependents = defaultdict(list)
+        self._settled = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, func, deps):
+        """Registers func(results) to run once every key in deps has been completed."""
+        with self._lock:
+            self._tasks[name] = {"func": func, "deps": list(deps), "waiting": set(deps) - set(self._settled)}
+            for dep in deps:
+                self._dependents[dep].append(name)
+            ready = not self._tasks[name]["waiting"]
+        if ready:
+            self._submit(name)
+
+    def complete(self, dep, result=None):
+        """Marks a dependency as settled; a result of None means it failed."""
+        ready = []
+        with self._lock:
+            if dep in self._settled:
+                return
+            self._settled[dep] = result
+            for name in self._dependents.pop(dep, []):
+                waiting = self._tasks[name]["waiting"]
+                waiting.discard(dep)
+                if not waiting:
+                    ready.append(name)
+        for name in ready:
+            self._submit(name)
+
+    def _submit(self, name):
+        task = self._tasks[name]
+        with self._lock:
+            results = [self._settled[dep] for dep in task["deps"] if self._settled[dep] is not None]
+        logger.info(f"🧩 All dependencies of '{name}' settled ({len(results)}/{len(task['deps'])} succeeded); starting it.")
+        self.futures[name] = self.executor.submit(task["func"], results)
+
+    def finish(self):
+        """
+        Treats every dependency that never reported as failed, waits for all
+        tasks and returns {name: result}. Tasks that raised map to None.
+        """
+        with self._lock:
+            unsettled = list(self._dependents)
+        for dep in unsettled:
+            self.complete(dep, None)
+
+        results = {}
+        for name, future in list(self.futures.items()):
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"❌ Task '{name}' failed: {e}")
+                results[name] = None
+        self.executor.shutdown()
+        return results
@@ -4,21 +4,56 @@ import requests
 import json
 import re
 from datetime import datetime, timedelta
+import io
+import tempfile
+import base64
+import hashlib
 import boto3
-from botocore.exceptions import NoCredentialsError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError, NoCredentialsError
 import time
 import uuid
+import argparse
+import logging
+import sys
+import threading
+from collections import deque
+from itertools import islice, takewhile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import google.generativeai as genai
+import http_client
+import metrics
+from pipeline import Pipeline, Stage
+from context_cache import ContextCache
+from model_router import ModelRoute, ModelRouter, min_context_tokens, parse_route
+from hedging import Hedger
+from llm_json import (JsonStringFieldStream, TruncatedJsonError, merge_continuation, parse_json_response,
+                      salvage_string_field)
+from run_journal import RunJournal, reached
+from work_queue import WorkQueue
+from keyword_source import KeywordSource
+from response_cache import DiskCache, cache_key
+from rate_limiter import AdaptiveRateLimiter, RunBudget, BudgetExceeded, estimate_tokens
+from basehub_index import BasehubIndex
+from scheduler import DependencyScheduler
+from pillar_assignment import assign_articles_to_pillars
+from markdown_rules import fix_markdown, insert_sections, outline
+from image_variants import CONTENT_TYPES, VariantPool, available_formats, unavailable_formats
+from title_dedup import TitleIndex, filter_duplicate_titles, read_generated_titles
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 def slugify(text):
     """
     Convert a string to a URL-friendly slug.
     """
     text = text.lower()
-    text = re.sub(r'[\\s_]+', '-', text)  # Replace spaces and underscores with hyphens
-    text = re.sub(r'[^\\w-]', '', text)   # Remove all non-word chars except hyphens
+    text = re.sub(r'[\s_]+', '-', text)  # Replace spaces and underscores with hyphens
+    text = re.sub(r'[^\w-]', '', text)   # Remove all non-word chars except hyphens
+    text = re.sub(r'-+', '-', text)      # Collapse runs left behind by removed punctuation
     text = text.strip('-')
     return text
 
@@ -30,59 +65,516 @@ GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
 OPENAI_IMAGE_API_KEY = os.environ.get('OPENAI_IMAGE_API_KEY', '')
 
 # This is the image generation endpoint from the original script
-IMAGE_API_URL = 'https://api.openai.com/v1/images/generations'
+IMAGE_API_URL = os.environ.get('IMAGE_API_URL', 'https://api.openai.com/v1/images/generations')
 
 # --- AWS S3 Configuration ---
 S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME')
 AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1') # Default to a common region
+# Point at an S3-compatible stand-in (e.g. MinIO on localhost) for testing and benchmarks.
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL', '')
+# Bodies above this size go up as a multipart upload.
+S3_MULTIPART_THRESHOLD_MB = int(os.environ.get('S3_MULTIPART_THRESHOLD_MB', 8))
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+    multipart_chunksize=S3_MULTIPART_THRESHOLD_MB * 1024 * 1024
+)
+
+# Images are stored under their SHA-256 (S3_IMAGE_PREFIX/<sha256>.png), so the
+# same bytes are only ever uploaded once.
+S3_IMAGE_PREFIX = os.environ.get('S3_IMAGE_PREFIX', 'images')
+# Maps image prompts to the S3 image already rendered for them, so a rerun with
+# the same prompt skips DALL-E entirely. Empty disables it.
+IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR', 'seo_automator/image_cache')
+# Stored images never change under their key, so browsers and CDNs may keep them for good.
+IMAGE_CACHE_CONTROL = os.environ.get('IMAGE_CACHE_CONTROL', 'public, max-age=31536000, immutable')
+
+# --- Responsive Image Variants (needs Pillow) ---
+# Every stored PNG also gets metadata-free copies at these widths in these formats
+# (webp, avif), encoded in a process pool and stored next to it as <sha256>-<width>w.<format>.
+# The widest WebP is what the article and Basehub link to.
+IMAGE_VARIANT_WIDTHS = [int(width) for width in os.environ.get('IMAGE_VARIANT_WIDTHS', '1024,768,480').split(',') if width.strip()]
+IMAGE_VARIANT_FORMATS = [fmt.strip() for fmt in os.environ.get('IMAGE_VARIANT_FORMATS', 'webp').split(',') if fmt.strip()]
+IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', 80))
+IMAGE_VARIANT_WORKERS = int(os.environ.get('IMAGE_VARIANT_WORKERS', 0)) or None # None = one per CPU
+
+# How rendered images get from DALL-E into S3:
+#   'url'    - download the returned URL into memory, then upload (original behaviour)
+#   'b64'    - ask DALL-E for b64_json so the image arrives inline, no second round trip
+#   'stream' - stream the returned URL chunk by chunk straight into the S3 upload
+IMAGE_TRANSPORT = os.environ.get('IMAGE_TRANSPORT', 'url')
+
+# --- Basehub Configuration ---
+BASEHUB_API_URL = os.environ.get('BASEHUB_API_URL', 'https://api.basehub.com/graphql')
+BASEHUB_TOKEN = os.environ.get('BASEHUB_TOKEN', '')
+POSTS_COLLECTION_ID = 'dKrosxXlaGpnZCrAbHxlX'
+# Limits for --batch-publish: posts per GraphQL request and its maximum payload size.
+BASEHUB_BATCH_SIZE = int(os.environ.get('BASEHUB_BATCH_SIZE', 10))
+BASEHUB_BATCH_MAX_BYTES = int(os.environ.get('BASEHUB_BATCH_MAX_BYTES', 1_000_000))
+# Local index of published posts, synced at the start of every run.
+BASEHUB_INDEX_PATH = os.environ.get('BASEHUB_INDEX_PATH', 'seo_automator/basehub_index.sqlite')
+BASEHUB_SYNC_PAGE_SIZE = int(os.environ.get('BASEHUB_SYNC_PAGE_SIZE', 100))
+# What to do with a post whose slug is already published: 'skip' it or 'update' the live post.
+BASEHUB_EXISTING_POSTS = os.environ.get('BASEHUB_EXISTING_POSTS', 'skip')
+
+PILLAR_PAGE_TITLES = [
+    "The Founder's Complete Guide to Go-To-Market Strategy",
+    "AI-Powered Marketing: The Ultimate Playbook for Startups",
+    "From Zero to Hero: A Founder's Guide to Building a Powerful Personal Brand",
+    "The Scrappy Startup's Guide to SEO and Content Marketing",
+    "The Art of the Weekly Marketing Sprint: A System for Consistent Growth"
+]
+# Articles are assigned to the most similar pillar page, but no pillar page links
+# more than this factor times its even share of the articles.
+PILLAR_CAPACITY_SLACK = float(os.environ.get('PILLAR_CAPACITY_SLACK', 1.25))
+
+# Each run gets its own directory here holding its journal, used by --resume.
+RUNS_DIR = os.environ.get('RUNS_DIR', 'seo_automator/runs')
+
+# --- Worker Queue ---
+# With --queue, a run's articles are served from a leased work queue inside its
+# journal, and any number of --worker processes, on this host or on others that
+# share the filesystem, pull titles from it. Leases last QUEUE_LEASE_SECONDS and
+# are renewed by heartbeats; a dead worker's titles are claimed again, up to
+# QUEUE_MAX_ATTEMPTS claims per title. Set RUNS_SHARED_FS=1 when RUNS_DIR is on
+# a network filesystem (SQLite's WAL mode only works within one host).
+QUEUE_LEASE_SECONDS = int(os.environ.get('QUEUE_LEASE_SECONDS', 600))
+QUEUE_MAX_ATTEMPTS = int(os.environ.get('QUEUE_MAX_ATTEMPTS', 3))
+QUEUE_POLL_SECONDS = float(os.environ.get('QUEUE_POLL_SECONDS', 5))
+RUNS_SHARED_FS = os.environ.get('RUNS_SHARED_FS', '0') not in ('0', 'false', 'off', '')
+
+# --- Logging & Metrics ---
+# DEBUG adds the raw Gemini and Basehub responses for every article.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+# Span records (JSONL) and a Prometheus textfile; both default to files in the run directory.
+METRICS_JSONL = os.environ.get('METRICS_JSONL', '')
+METRICS_TEXTFILE = os.environ.get('METRICS_TEXTFILE', '')
+
+# --- Duplicate Title Filtering ---
+# New topics whose estimated similarity to an existing or earlier title reaches
+# the threshold are dropped before any article is generated. 0 disables the filter.
+TITLE_INDEX_PATH = os.environ.get('TITLE_INDEX_PATH', 'seo_automator/title_index.npz')
+TITLE_DEDUP_THRESHOLD = float(os.environ.get('TITLE_DEDUP_THRESHOLD', 0.6))
+GENERATED_CONTENT_DIR = 'seo_automator/generated_content'
+
+# --- Keyword Input ---
+# With --keywords (or KEYWORDS_CSV), topics come from a keyword export instead of
+# one topics call: the file is streamed in chunks of KEYWORD_CHUNK_ROWS rows and
+# deduplicated with a Bloom filter sized for KEYWORD_DEDUP_CAPACITY keywords, so
+# memory stays flat however big it is. Keywords are ranked by a volume/score
+# column when there is one, and turned into titles KEYWORD_BATCH_SIZE at a time
+# as the article workers need them. Columns are found by header name unless set.
+KEYWORDS_CSV = os.environ.get('KEYWORDS_CSV', '')
+KEYWORD_LIMIT = int(os.environ.get('KEYWORD_LIMIT', 100))
+KEYWORD_BATCH_SIZE = int(os.environ.get('KEYWORD_BATCH_SIZE', 25))
+KEYWORD_CHUNK_ROWS = int(os.environ.get('KEYWORD_CHUNK_ROWS', 50000))
+KEYWORD_DEDUP_CAPACITY = int(os.environ.get('KEYWORD_DEDUP_CAPACITY', 10_000_000))
+KEYWORD_COLUMN = os.environ.get('KEYWORD_COLUMN') or None
+KEYWORD_SCORE_COLUMN = os.environ.get('KEYWORD_SCORE_COLUMN') or None
+
+# --- LLM Response Cache (opt-in) ---
+# Set LLM_CACHE_DIR (or pass --llm-cache) to reuse Gemini responses for identical prompts.
+LLM_CACHE_DIR = os.environ.get('LLM_CACHE_DIR', '')
+LLM_CACHE_MAX_MB = int(os.environ.get('LLM_CACHE_MAX_MB', 512))
+LLM_CACHE_TTL_HOURS = float(os.environ.get('LLM_CACHE_TTL_HOURS', 0)) # 0 keeps entries until evicted
+
+# --- Concurrency Configuration ---
+# Number of articles processed at once. 1 keeps the original one-by-one behaviour.
+ARTICLE_WORKERS = int(os.environ.get('ARTICLE_WORKERS', 1))
+
+# Upper bound on in-flight calls per provider, shared by every worker thread.
+S3_CONCURRENCY = int(os.environ.get('S3_CONCURRENCY', 8))
+GEMINI_CONCURRENCY = int(os.environ.get('GEMINI_CONCURRENCY', 8))
+OPENAI_IMAGES_CONCURRENCY = int(os.environ.get('OPENAI_IMAGES_CONCURRENCY', 4))
+PROVIDER_LIMITS = {
+    'gemini': threading.BoundedSemaphore(GEMINI_CONCURRENCY),
+    'openai_images': threading.BoundedSemaphore(OPENAI_IMAGES_CONCURRENCY),
+    's3': threading.BoundedSemaphore(S3_CONCURRENCY),
+    'basehub': threading.BoundedSemaphore(int(os.environ.get('BASEHUB_CONCURRENCY', 2))),
+}
+
+# --- Provider Rate Limits ---
+# Requests per minute at which each provider's quota tops out. The limiters start
+# here, back off on 429/Retry-After and recover as calls succeed.
+RATE_LIMITERS = {
+    'gemini': AdaptiveRateLimiter('gemini', int(os.environ.get('GEMINI_RPM', 150))),
+    'openai_images': AdaptiveRateLimiter('openai_images', int(os.environ.get('OPENAI_IMAGES_PER_MINUTE', 7))),
+    'basehub': AdaptiveRateLimiter('basehub', int(os.environ.get('BASEHUB_RPM', 60))),
+}
+GEMINI_MAX_RETRIES = int(os.environ.get('GEMINI_MAX_RETRIES', 4))
+
+# --- Request Hedging ---
+# Opt-in (--hedge or HEDGE_REQUESTS=1). A Gemini call or DALL-E render still
+# running after the HEDGE_PERCENTILE latency of recent calls of its kind gets
+# one duplicate request, and the first answer wins. Hedges are capped at
+# HEDGE_MAX_RATE of all calls and start after HEDGE_MIN_SAMPLES calls of a kind.
+# A hedge needs a free provider slot, so hedging never exceeds GEMINI_CONCURRENCY
+# or OPENAI_IMAGES_CONCURRENCY; its thread pool has one thread per slot.
+HEDGER = Hedger(
+    enabled=os.environ.get('HEDGE_REQUESTS', '0') not in ('0', 'false', 'off', ''),
+    percentile=float(os.environ.get('HEDGE_PERCENTILE', 0.95)),
+    max_rate=float(os.environ.get('HEDGE_MAX_RATE', 0.05)),
+    min_samples=int(os.environ.get('HEDGE_MIN_SAMPLES', 20)),
+    workers=GEMINI_CONCURRENCY + OPENAI_IMAGES_CONCURRENCY
+)
+
+# --- Gemini Model Routes ---
+# Each kind of Gemini call goes to its own model tier, with its own request
+# timeout (seconds) and output token cap, so short tasks don't pay pro-model
+# latency. The caps include 2.5 models' thinking tokens, hence the headroom.
+# Override one route with GEMINI_ROUTE_<TASK>='model:timeout:max_output_tokens'
+# (empty parts keep the default), e.g. GEMINI_ROUTE_TOPICS='gemini-2.5-pro'.
+GEMINI_FLASH_MODEL = os.environ.get('GEMINI_FLASH_MODEL', 'gemini-2.5-flash')
+GEMINI_PRO_MODEL = os.environ.get('GEMINI_PRO_MODEL', 'gemini-2.5-pro')
+GEMINI_ROUTES = {
+    'topics': ModelRoute(GEMINI_FLASH_MODEL, timeout=120, max_output_tokens=16384),
+    'image_prompt': ModelRoute(GEMINI_FLASH_MODEL, timeout=60, max_output_tokens=4096),
+    'image_prompts': ModelRoute(GEMINI_FLASH_MODEL, timeout=120, max_output_tokens=16384),
+    'article': ModelRoute(GEMINI_PRO_MODEL, timeout=300, max_output_tokens=32768),
+    'sections': ModelRoute(GEMINI_PRO_MODEL, timeout=300, max_output_tokens=16384),
+    'pillar': ModelRoute(GEMINI_PRO_MODEL, timeout=600, max_output_tokens=32768),
+}
+for _task, _route in GEMINI_ROUTES.items():
+    if os.environ.get(f'GEMINI_ROUTE_{_task.upper()}'):
+        GEMINI_ROUTES[_task] = parse_route(os.environ[f'GEMINI_ROUTE_{_task.upper()}'], _route)
+
+# --- Run Budget ---
+# Optional caps on paid API requests (Gemini + DALL-E), estimated Gemini tokens and
+# images per run. When one runs out, no new articles are started. Unset = unlimited.
+def _optional_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+RUN_BUDGET = RunBudget(
+    max_requests=_optional_int('RUN_MAX_REQUESTS'),
+    max_tokens=_optional_int('RUN_MAX_TOKENS'),
+    max_images=_optional_int('RUN_MAX_IMAGES')
+)
+
+# --- Markdown Rules ---
+# Generated bodies are checked and repaired locally against the prompt's rules
+# (headings, homepage link, CTA). Only a body still short of its word count
+# costs a Gemini call, for just the missing sections, at most WORD_COUNT_PATCHES times.
+ARTICLE_MIN_WORDS = int(os.environ.get('ARTICLE_MIN_WORDS', 1500))
+PILLAR_MIN_WORDS = int(os.environ.get('PILLAR_MIN_WORDS', 2500))
+WORD_COUNT_PATCHES = int(os.environ.get('WORD_COUNT_PATCHES', 1))
+
+# --- Gemini Context Caching ---
+# The static preambles of the article, pillar page and title prompts are
+# registered once per run with Gemini's explicit context caching, so calls only
+# send their title or keywords. Gemini will not cache a context under a
+# per-model minimum (see model_router.MIN_CONTEXT_TOKENS: 1024 tokens on Flash,
+# 4096 on Pro); GEMINI_CONTEXT_MIN_TOKENS overrides it for every model. A shorter
+# preamble (or any caching error) is sent inline as the prompt prefix instead,
+# which is also what GEMINI_CONTEXT_CACHE=0 does.
+GEMINI_CONTEXT_CACHE = os.environ.get('GEMINI_CONTEXT_CACHE', '1') not in ('0', 'false', 'off', '')
+GEMINI_CONTEXT_MIN_TOKENS = _optional_int('GEMINI_CONTEXT_MIN_TOKENS')
+GEMINI_CONTEXT_TTL_MINUTES = float(os.environ.get('GEMINI_CONTEXT_TTL_MINUTES', 60))
+
+# --- JSON Answers ---
+# A JSON answer cut off part way (usually at the output token limit) is
+# continued from where it stopped, up to this many times, instead of regenerated.
+JSON_CONTINUATIONS = int(os.environ.get('JSON_CONTINUATIONS', 2))
+# How much of the cut-off answer is quoted back so Gemini can find its place.
+JSON_CONTINUATION_TAIL_CHARS = int(os.environ.get('JSON_CONTINUATION_TAIL_CHARS', 1500))
+
+# --- Batched Image Prompts ---
+# In --pipeline mode the image_prompt stage collects up to this many articles
+# (waiting at most IMAGE_PROMPT_BATCH_WAIT seconds) into one Gemini call.
+IMAGE_PROMPT_BATCH_SIZE = int(os.environ.get('IMAGE_PROMPT_BATCH_SIZE', 8))
+IMAGE_PROMPT_BATCH_WAIT = float(os.environ.get('IMAGE_PROMPT_BATCH_WAIT', 20))
+IMAGE_PROMPT_BATCH_MAX_CHARS = int(os.environ.get('IMAGE_PROMPT_BATCH_MAX_CHARS', 12000))
+
+# Worker threads per stage in --pipeline mode. Override with --stage-workers.
+PIPELINE_STAGE_WORKERS = {
+    'text': 8,
+    'image_prompt': 4,
+    'image_render': 4,
+    'image_upload': 4,
+    'render': 2,
+    'publish': 2,
+}
 
 # ==============================================================================
 # 2. GEMINI AI & IMAGE GENERATION & S3 UPLOAD
 # ==============================================================================
 
+def is_rate_limit_error(error):
+    """True for Gemini quota errors (google.api_core ResourceExhausted, HTTP 429)."""
+    return getattr(error, 'code', None) == 429 or type(error).__name__ in ('ResourceExhausted', 'TooManyRequests')
+
+def record_gemini_usage(span, prompt, text, usage):
+    """Charges a Gemini answer's tokens to the run budget and records its size on the metrics span."""
+    response_tokens = getattr(usage, 'candidates_token_count', None) or estimate_tokens(text)
+    RUN_BUDGET.record_tokens(response_tokens)
+    span.update(
+        response_chars=len(text),
+        prompt_tokens=getattr(usage, 'prompt_token_count', None) or estimate_tokens(prompt),
+        response_tokens=response_tokens,
+        cached_tokens=getattr(usage, 'cached_content_token_count', None) or 0
+    )
+
+# The static part of every title prompt: the blog topics call and each keyword
+# batch send the same preamble, so it is cached once per run on the Flash route
+# and every later call only sends its keywords. The style rules plus the
+# business context keep it above Flash's minimum cacheable size.
+TITLE_PREAMBLE = """
+    You are an expert SEO content strategist for 'AgentWeb', an AI marketing agency. Your persona is modeled after a seasoned YC founder who gives direct, actionable advice. You write blog post titles for AgentWeb's blog, based on the website copy given at the end of this prompt.
+
+    The target audience is early-stage founders (pre-seed to Series A) who are focused on product development but need to validate their GTM strategy and drive growth. They are technical, busy and skeptical of marketing fluff.
+
+    The blog covers topics like:
+    - Go-to-market (GTM) strategy for startups
+    - AI in marketing and automation
+    - Practical growth hacking tips
+    - SEO and content marketing for early-stage companies
+    - Founder branding and thought leadership on platforms like LinkedIn
+    - Validating digital marketing channels without a large budget or team
+    - Weekly marketing workflows and campaign execution
+
+    **Title Rules:**
+    1.  **Search intent:** Every title must match what a founder typing its topic into Google wants: a how-to, a framework, a comparison, a checklist or a benchmark. Put the main topic or keyword in the first half of the title.
+    2.  **Length:** Keep titles between 40 and 65 characters where possible, so they are not truncated in search results. Never exceed 80 characters.
+    3.  **Concrete promise:** Each title promises a specific, practical takeaway (a number of steps, a template, a playbook, a metric to track). Avoid vague titles like "Everything You Need to Know About Marketing".
+    4.  **Voice:** Direct and confident, written for founders. No clickbait, no exclamation marks, no ALL CAPS, no emojis and no questions the title does not answer.
+    5.  **Formatting:** Use title case. Use a colon only to separate a topic from its angle, at most once. Do not wrap titles in quotes or add numbering.
+    6.  **Variety:** Across a list of titles, vary the formats (guides, lists, comparisons, case-style breakdowns) and never repeat the same opening words. Two titles must never cover the same topic from the same angle.
+    7.  **Accuracy:** Only mention years, statistics or tools that will still read as current; do not invent product names or claim results AgentWeb has not published.
+
+    Business Context:
+    ---
+    {business_context}
+    ---
+"""
+
+def title_preamble(business_context):
+    """The cacheable title-writing context for a business's website copy."""
+    return TITLE_PREAMBLE.format(business_context=business_context)
+
 class GeminiAI:
     """A simple client to interact with the Gemini AI API."""
-    def __init__(self, api_key):
+    def __init__(self, api_key, cache=None, routes=None):
         if not api_key:
             raise ValueError("GEMINI_API_KEY is not set.")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-pro')
+        # Which model, timeout and output cap each kind of call gets, with per-route latency stats.
+        self.router = ModelRouter(routes or GEMINI_ROUTES)
+        self.models = {} # Model name -> GenerativeModel, created on first use
+        # Optional DiskCache of responses keyed on model name + prompt hash.
+        self.cache = cache
+        # Static prompt preambles, registered with Gemini's context caching on first use.
+        self.contexts = ContextCache(ttl_seconds=GEMINI_CONTEXT_TTL_MINUTES * 60,
+                                     min_tokens=GEMINI_CONTEXT_MIN_TOKENS or min_context_tokens,
+                                     enabled=GEMINI_CONTEXT_CACHE)
+
+    def _request(self, route, prompt, context, task):
+        """
+        Returns (model, request text, cached) for a prompt with an optional
+        static context: the model bound to the cached context and just the
+        prompt, or the route's plain model with the context sent inline as the
+        prompt prefix.
+        """
+        model = self.contexts.model_for(route.model, context, task) if context else None
+        if model is not None:
+            return model, prompt, True
+        if route.model not in self.models:
+            self.models[route.model] = genai.GenerativeModel(route.model)
+        return self.models[route.model], (context or '') + prompt, False
+
+    @staticmethod
+    def _options(route):
+        """The per-call generation config and request options for a route."""
+        return {
+            "generation_config": {"max_output_tokens": route.max_output_tokens},
+            "request_options": {"timeout": route.timeout},
+        }
 
-    def generate_content(self, prompt, max_tokens=4000):
-        """Generic content generation with Gemini AI."""
-        try:
-            # The 'max_tokens' parameter is not directly supported in the same way.
-            # Gemini's output length is controlled by other factors and safety settings.
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            print(f"❌ An error occurred while communicating with the Gemini API: {e}")
-            return None
+    def _generate(self, model, request, route):
+        response = model.generate_content(request, **self._options(route))
+        return response, response.text
 
-    def generate_blog_topics(self, business_context, num_topics=100):
-        print(f"🧠 Generating {num_topics} blog topics based on business context...")
-        prompt = f"""
-        Based on the following website copy for 'AgentWeb', an AI marketing agency, please generate a list of {num_topics} unique, SEO-optimized blog post titles.
+    @staticmethod
+    def _hedge_slot(prompt):
+        """Charges a hedged duplicate to the run budget and the rate limiter before it is sent."""
+        RUN_BUDGET.reserve(requests=1, tokens=estimate_tokens(prompt))
+        RATE_LIMITERS['gemini'].acquire()
 
-        The target audience is early-stage founders (pre-seed to Series A) who are focused on product development but need to validate their GTM strategy and drive growth.
+    def generate_content(self, prompt, context=None, task='article'):
+        """
+        Generic content generation with Gemini AI. task picks the model route
+        (see GEMINI_ROUTES). context is an optional static preamble shared by
+        many calls; it is sent as a cached context when possible, else inline
+        before the prompt.
+        """
+        route = self.router.route(task)
+        full_prompt = (context or '') + prompt
+        with metrics.span('gemini.generate', model=route.model, route=task, prompt_chars=len(full_prompt)) as span:
+            key = cache_key(route.model, full_prompt) if self.cache else None
+            if key:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    span.update(outcome='cached', response_chars=len(cached))
+                    return cached
+
+            # Cache hits are free; only real API calls count against the run budget.
+            try:
+                RUN_BUDGET.reserve(requests=1, tokens=estimate_tokens(full_prompt))
+            except BudgetExceeded as e:
+                logger.warning(f"💸 Skipping Gemini call: {e}")
+                span["outcome"] = 'budget'
+                return None
+            limiter = RATE_LIMITERS['gemini']
+            for attempt in range(GEMINI_MAX_RETRIES + 1):
+                model, request, cached_context = self._request(route, prompt, context, task)
+                if context:
+                    span["context"] = 'cached' if cached_context else 'inline'
+                limiter.acquire()
+                try:
+                    with PROVIDER_LIMITS['gemini']:
+                        started = time.monotonic()
+                        try:
+                            # A straggling call may get one hedged duplicate (--hedge); the first answer wins.
+                            response, text = HEDGER.call(
+                                f"gemini.{task}",
+                                lambda: self._generate(model, request, route),
+                                on_hedge=lambda: self._hedge_slot(full_prompt),
+                                limit=PROVIDER_LIMITS['gemini']
+                            )
+                        except Exception:
+                            self.router.record(task, time.monotonic() - started, ok=False)
+                            raise
+                        self.router.record(task, time.monotonic() - started)
+                    limiter.on_success()
+                    break
+                except Exception as e:
+                    if is_rate_limit_error(e) and attempt < GEMINI_MAX_RETRIES:
+                        limiter.on_throttled()
+                        span["retries"] = attempt + 1
+                        continue
+                    if cached_context and attempt < GEMINI_MAX_RETRIES:
+                        # Most likely the cached context expired or was deleted; carry on without it.
+                        logger.warning(f"⚠️ Gemini call with a cached context failed, retrying with it inline: {e}")
+                        self.contexts.discard(route.model, context)
+                        continue
+                    logger.error(f"❌ An error occurred while communicating with the Gemini API: {e}")
+                    span.update(outcome='failed', error=str(e)[:200])
+                    return None
+
+            record_gemini_usage(span, full_prompt, text, getattr(response, 'usage_metadata', None))
+
+            if key and text:
+                self.cache.set(key, text)
+            return text
+
+    def generate_content_stream(self, prompt, context=None, task='article'):
+        """
+        Like generate_content, but yields the response text in chunks as Gemini
+        produces it. Yields nothing if the run budget is spent; raises if the
+        stream breaks part way, so a truncated answer is never mistaken for a full one.
+        """
+        route = self.router.route(task)
+        full_prompt = (context or '') + prompt
+        with metrics.span('gemini.stream', model=route.model, route=task, prompt_chars=len(full_prompt)) as span:
+            key = cache_key(route.model, full_prompt) if self.cache else None
+            if key:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    span.update(outcome='cached', response_chars=len(cached))
+                    yield cached
+                    return
+
+            try:
+                RUN_BUDGET.reserve(requests=1, tokens=estimate_tokens(full_prompt))
+            except BudgetExceeded as e:
+                logger.warning(f"💸 Skipping Gemini call: {e}")
+                span["outcome"] = 'budget'
+                return
+            limiter = RATE_LIMITERS['gemini']
+            pieces = []
+            started = time.monotonic()
+            for attempt in range(GEMINI_MAX_RETRIES + 1):
+                model, request, cached_context = self._request(route, prompt, context, task)
+                if context:
+                    span["context"] = 'cached' if cached_context else 'inline'
+                limiter.acquire()
+                try:
+                    with PROVIDER_LIMITS['gemini']:
+                        attempt_started = time.monotonic()
+                        try:
+                            response = model.generate_content(request, stream=True, **self._options(route))
+                            for chunk in response:
+                                if not pieces:
+                                    span["first_chunk_s"] = round(time.monotonic() - started, 4)
+                                pieces.append(chunk.text)
+                                yield chunk.text
+                        except Exception:
+                            self.router.record(task, time.monotonic() - attempt_started, ok=False)
+                            raise
+                        self.router.record(task, time.monotonic() - attempt_started)
+                    limiter.on_success()
+                    break
+                except Exception as e:
+                    # Only a throttled request that produced nothing yet can be safely retried.
+                    if is_rate_limit_error(e) and not pieces and attempt < GEMINI_MAX_RETRIES:
+                        limiter.on_throttled()
+                        span["retries"] = attempt + 1
+                        continue
+                    if cached_context and not pieces and attempt < GEMINI_MAX_RETRIES:
+                        logger.warning(f"⚠️ Gemini stream with a cached context failed, retrying with it inline: {e}")
+                        self.contexts.discard(route.model, context)
+                        continue
+                    logger.error(f"❌ An error occurred while streaming from the Gemini API: {e}")
+                    raise
+
+            text = ''.join(pieces)
+            record_gemini_usage(span, full_prompt, text, getattr(response, 'usage_metadata', None))
+
+            if key and text:
+                self.cache.set(key, text)
+
+    def generate_json(self, prompt, context=None, task='article'):
+        """
+        Generates an answer to a prompt that asks for a JSON object and parses it.
+        Returns (data, response_text); data is None if no object could be parsed.
+        """
+        response_text = self.generate_content(prompt, context=context, task=task)
+        if not response_text:
+            return None, None
+        return self.complete_json(prompt, response_text, context, task)
 
-        The titles should be engaging, relevant, and cover topics like:
-        - Go-to-market (GTM) strategy for startups
-        - AI in marketing and automation
-        - Practical growth hacking tips
-        - SEO and content marketing for early-stage companies
-        - Founder branding and thought leadership on platforms like LinkedIn
-        - Validating digital marketing channels without a large budget or team
-        - Weekly marketing workflows and campaign execution
+    def complete_json(self, prompt, response_text, context=None, task='article'):
+        """
+        Parses the JSON object in response_text. If the answer was cut off part
+        way, Gemini is asked to continue it from the last character rather than
+        to write it all again. Returns (data, response_text), where response_text
+        includes any continuations and data is None if parsing still failed.
+        """
+        for attempt in range(JSON_CONTINUATIONS + 1):
+            try:
+                return parse_json_response(response_text), response_text
+            except TruncatedJsonError as e:
+                if attempt == JSON_CONTINUATIONS:
+                    logger.error(f"❌ JSON answer still cut off after {attempt} continuation(s): {e}")
+                    break
+                logger.warning(f"✂️  JSON answer cut off after {len(response_text)} characters; asking Gemini to continue it...")
+                continuation = self.generate_content(build_continuation_prompt(prompt, response_text),
+                                                     context=context, task=task)
+                if not continuation:
+                    break
+                response_text = merge_continuation(response_text, continuation)
+            except ValueError as e:
+                logger.error(f"❌ Failed to parse JSON from AI response. Error: {e}")
+                break
+        logger.debug("Raw response was: %s", response_text)
+        return None, response_text
 
-        Business Context:
-        ---
-        {business_context}
-        ---
+    def generate_blog_topics(self, business_context, num_topics=100):
+        logger.info(f"🧠 Generating {num_topics} blog topics based on business context...")
+        prompt = f"""
+        Now, generate a list of {num_topics} unique blog post titles on the topics above.
 
-        Please return ONLY a valid JSON object with a single key "titles" which contains an array of the {num_topics} generated string titles. Do not include any other text, explanations, or markdown formatting in your response.
+        Please return ONLY a valid JSON object with a single key "titles" which contains an array of the generated string titles. Do not include any other text, explanations, or markdown formatting in your response.
 
         Example Format:
         {{
@@ -93,31 +585,55 @@ class GeminiAI:
           ]
         }}
         """
-        response_text = self.generate_content(prompt)
-        if not response_text:
-            print("❌ Failed to generate blog topics.")
+        data, response_text = self.generate_json(prompt, context=title_preamble(business_context), task='topics')
+        if not isinstance(data, dict):
+            logger.error("❌ Failed to generate blog topics.")
             return []
+        return data.get("titles", [])
 
-        try:
-            # Clean the response to find the JSON block, even with markdown backticks
-            match = re.search(r'```(json)?(.*)```', response_text, re.DOTALL)
-            if match:
-                # If markdown is found, extract the content within
-                json_str = match.group(2).strip()
-            else:
-                # Otherwise, assume the whole response is the JSON string
-                json_str = response_text.strip()
-
-            data = json.loads(json_str)
-            return data.get("titles", [])
-        except json.JSONDecodeError as e:
-            print(f"❌ Failed to parse JSON from AI response. Error: {e}")
-            print(f"Raw response was: {response_text}")
-            return []
+    def generate_keyword_titles(self, business_context, keywords):
+        """
+        Writes one blog post title per target keyword with as few Gemini calls as
+        possible. Returns the titles in keyword order; keywords the batched answer
+        misses are retried on their own, and any still without a title are None.
+        """
+        titles = self._generate_keyword_titles(business_context, keywords)
+        missing = [n for n, title in enumerate(titles) if title is None]
+        if missing and len(keywords) > 1:
+            logger.warning(f"⚠️ {len(missing)} keyword title(s) missing from the batched answer; generating individually.")
+            for n in missing:
+                titles[n] = self._generate_keyword_titles(business_context, [keywords[n]])[0]
+        return titles
+
+    def _generate_keyword_titles(self, business_context, keywords):
+        logger.info(f"🧠 Generating titles for {len(keywords)} keywords...")
+        listed = "\n".join(f"ID: {n}\nKeyword: {keyword}" for n, keyword in enumerate(keywords))
+        prompt = f"""
+        Now, write one blog post title for each of these {len(keywords)} target keywords. Each title should contain its keyword or a close variant of it.
+
+        {listed}
+
+        Please return ONLY a valid JSON object with a single key "titles" mapping each keyword ID (as a string) to its title. Do not include any other text, explanations, or markdown formatting in your response.
+
+        Example Format:
+        {{
+          "titles": {{
+            "0": "10 AI-Powered Marketing Tools to Scale Your Startup in 2025",
+            "1": "The Founder's Guide to Building a GTM Strategy from Scratch"
+          }}
+        }}
+        """
+        data, response_text = self.generate_json(prompt, context=title_preamble(business_context), task='topics')
+        titles = data.get("titles") if isinstance(data, dict) else None
+        if not isinstance(titles, dict):
+            logger.error("❌ Failed to generate titles for keywords.")
+            return [None] * len(keywords)
+        return [titles[str(n)].strip() if isinstance(titles.get(str(n)), str) and titles[str(n)].strip() else None
+                for n in range(len(keywords))]
 
     def generate_image_prompt(self, title, article_extract):
         """Generates a descriptive image prompt from the article content."""
-        print("🎨 Generating image prompt...")
+        logger.info("🎨 Generating image prompt...")
         prompt = f"""
         Based on the blog post title and a text extract, create a highly descriptive and creative image generation prompt.
         The blog post is for AgentWeb, a cutting-edge AI marketing agency.
@@ -129,57 +645,165 @@ class GeminiAI:
 
         Return ONLY the image prompt text with no additional commentary or explanations.
         """
-        return self.generate_content(prompt)
+        return self.generate_content(prompt, task='image_prompt')
 
+    def generate_image_prompts(self, items):
+        """
+        Generates image prompts for many articles with as few Gemini calls as possible.
+        Takes (title, article_extract) pairs and returns {title: prompt}. Inputs are
+        chunked by size; any the batched answer misses fall back to generate_image_prompt.
+        """
+        prompts = {}
+        chunks, chunk, chunk_chars = [], [], 0
+        for title, extract in items:
+            size = len(title) + len(extract)
+            if chunk and (len(chunk) >= IMAGE_PROMPT_BATCH_SIZE or chunk_chars + size > IMAGE_PROMPT_BATCH_MAX_CHARS):
+                chunks.append(chunk)
+                chunk, chunk_chars = [], 0
+            chunk.append((title, extract))
+            chunk_chars += size
+        if chunk:
+            chunks.append(chunk)
+
+        for chunk in chunks:
+            if len(chunk) == 1:
+                continue # Nothing to batch; handled by the individual fallback below.
+            logger.info(f"🎨 Generating {len(chunk)} image prompts in one call...")
+            articles = "\n\n".join(
+                f'ID: {n}\nTitle: {title}\nExtract: "{extract}"' for n, (title, extract) in enumerate(chunk)
+            )
+            prompt = f"""
+        For each blog post below, create a highly descriptive and creative image generation prompt.
+        The blog posts are for AgentWeb, a cutting-edge AI marketing agency.
+        Each image should be professional, visually appealing, and relevant to themes like marketing, automation, data, business strategy, or AI. It should be abstract or conceptual rather than literal. Avoid text in the image.
+
+        {articles}
+
+        Return ONLY a valid JSON object mapping each ID (as a string) to its image prompt text, with no additional commentary or explanations.
 
-def upload_image_to_s3(image_data, object_name):
-    """Uploads image data to an S3 bucket and returns the public URL."""
+        Example Format:
+        {{"0": "An abstract ...", "1": "A conceptual ..."}}
+        """
+            data, _ = self.generate_json(prompt, task='image_prompts')
+            if not isinstance(data, dict):
+                logger.warning("⚠️ Could not parse batched image prompts.")
+                continue
+            for n, (title, _) in enumerate(chunk):
+                value = data.get(str(n))
+                if isinstance(value, str) and value.strip():
+                    prompts[title] = value.strip()
+
+        missing = [(title, extract) for title, extract in items if title not in prompts]
+        if missing and len(missing) < len(items):
+            logger.warning(f"⚠️ {len(missing)} image prompt(s) missing from the batched answer; generating individually.")
+        for title, extract in missing:
+            prompts[title] = self.generate_image_prompt(title, extract)
+        return prompts
+
+    def generate_extra_sections(self, title, headings, words):
+        """Writes only the sections an article is missing to reach its length, as markdown."""
+        existing = "\n".join(headings) or "(none)"
+        prompt = f"""
+        You are an expert SEO content writer for 'AgentWeb', an AI marketing agency, writing for early-stage B2B SaaS founders.
+
+        The article "{title}" is about {words} words too short. Its current sections are:
+        {existing}
+
+        Write additional sections of at least {words} words in total that cover angles the existing sections do not.
+        - Use Markdown, with ONLY H2 and H3 headings. NEVER prefix headings with "H2:" or "H3:".
+        - Do not include a conclusion, a call-to-action or any links.
+
+        Return ONLY the new sections' markdown with no additional commentary or explanations.
+        """
+        return self.generate_content(prompt, task='sections')
+
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+def get_s3_client():
+    """Returns the process-wide S3 client, creating it on first use."""
+    global _s3_client
+    with _s3_client_lock:
+        if _s3_client is None:
+            _s3_client = boto3.client(
+                's3',
+                aws_access_key_id=AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                region_name=AWS_REGION,
+                endpoint_url=S3_ENDPOINT_URL or None,
+                config=BotoConfig(max_pool_connections=max(10, S3_CONCURRENCY))
+            )
+        return _s3_client
+
+def s3_public_url(object_name):
+    """Builds the public URL for an object in our bucket."""
+    if S3_ENDPOINT_URL:
+        return f"{S3_ENDPOINT_URL.rstrip('/')}/{S3_BUCKET_NAME}/{object_name}"
+    return f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{object_name}"
+
+def upload_image_to_s3(image_data, object_name, content_type='image/png'):
+    """
+    Uploads image data to an S3 bucket and returns the public URL.
+    image_data may be bytes or a readable file-like object (e.g. a streamed download);
+    bodies over S3_MULTIPART_THRESHOLD_MB are sent as a multipart upload.
+    """
     if not all([S3_BUCKET_NAME, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY]):
-        print("❌ ERROR: S3 bucket credentials are not fully configured in .env file. Cannot upload.")
+        logger.error("❌ ERROR: S3 bucket credentials are not fully configured in .env file. Cannot upload.")
         return None
 
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-        region_name=AWS_REGION
-    )
+    s3_client = get_s3_client()
     
-    try:
-        # We need to determine the content type for the upload
-        content_type = 'image/png' # The API seems to return PNGs
-        
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=object_name,
-            Body=image_data,
-            ContentType=content_type
-        )
-        
-        # Construct the public URL
-        s3_url = f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{object_name}"
-        print(f"✅ Successfully uploaded image to S3: {s3_url}")
-        return s3_url
-
-    except NoCredentialsError:
-        print("❌ ERROR: AWS credentials not found. Please check your .env file.")
-        return None
-    except Exception as e:
-        print(f"❌ An error occurred during S3 upload: {e}")
-        return None
+    with metrics.span('s3.upload', key=object_name) as span:
+        try:
+            body = io.BytesIO(image_data) if isinstance(image_data, bytes) else image_data
+
+            with PROVIDER_LIMITS['s3']:
+                s3_client.upload_fileobj(
+                    body,
+                    S3_BUCKET_NAME,
+                    object_name,
+                    ExtraArgs={'ContentType': content_type, 'CacheControl': IMAGE_CACHE_CONTROL},
+                    Config=S3_TRANSFER_CONFIG
+                )
+            # A streamed body only knows its size once it has been read to the end.
+            span["bytes_out"] = len(image_data) if isinstance(image_data, bytes) else body.tell()
+
+            # Construct the public URL
+            s3_url = s3_public_url(object_name)
+            logger.info(f"✅ Successfully uploaded image to S3: {s3_url}")
+            return s3_url
+
+        except NoCredentialsError:
+            logger.error("❌ ERROR: AWS credentials not found. Please check your .env file.")
+            span["outcome"] = 'failed'
+            return None
+        except Exception as e:
+            logger.error(f"❌ An error occurred during S3 upload: {e}")
+            span.update(outcome='failed', error=str(e)[:200])
+            return None
 
 
-def generate_and_upload_image(prompt):
-    """Generates an image using DALL-E 3, downloads it, and uploads it to S3."""
+def render_image(prompt):
+    """
+    Asks DALL-E 3 to render an image. Returns the image itself as bytes when
+    IMAGE_TRANSPORT is 'b64', otherwise its temporary source URL.
+    """
     if not prompt:
-        print("⚠️ No prompt provided for image generation. Skipping.")
-        return None, None
+        logger.warning("⚠️ No prompt provided for image generation. Skipping.")
+        return None
 
     if not OPENAI_IMAGE_API_KEY:
-        print("❌ ERROR: OPENAI_IMAGE_API_KEY is not set. Cannot generate image.")
-        return None, None
+        logger.error("❌ ERROR: OPENAI_IMAGE_API_KEY is not set. Cannot generate image.")
+        return None
+
+    try:
+        RUN_BUDGET.reserve(requests=1, images=1)
+    except BudgetExceeded as e:
+        logger.warning(f"💸 Skipping image generation: {e}")
+        return None
 
-    print(f"🖼️  Requesting image from DALL-E 3 with prompt: '{prompt[:70]}...'")
+    logger.info(f"🖼️  Requesting image from DALL-E 3 with prompt: '{prompt[:70]}...'")
     
     headers = {
         "Authorization": f"Bearer {OPENAI_IMAGE_API_KEY}",
@@ -192,56 +816,280 @@ def generate_and_upload_image(prompt):
         "n": 1,
         "size": "1024x1024" # or "1792x1024" or "1024x1792"
     }
+    if IMAGE_TRANSPORT == 'b64':
+        # Get the image inline so there is no second round trip to download it.
+        payload["response_format"] = "b64_json"
 
-    try:
-        # Step 1: Get the image URL from the DALL-E 3 API
-        response = requests.post(IMAGE_API_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
+    with metrics.span('image.render', transport=IMAGE_TRANSPORT) as span:
+        try:
+            with PROVIDER_LIMITS['openai_images']:
+                # Re-rendering after an ambiguous failure costs an image but can't duplicate anything,
+                # which is also why a straggling render can be hedged (--hedge).
+                response = HEDGER.call(
+                    'openai_images.render',
+                    lambda: http_client.post(IMAGE_API_URL, headers=headers, json=payload, idempotent=True,
+                                             limiter=RATE_LIMITERS['openai_images']),
+                    on_hedge=lambda: RUN_BUDGET.reserve(requests=1, images=1),
+                    limit=PROVIDER_LIMITS['openai_images']
+                )
+            response.raise_for_status()
+            data = response.json()
+
+            if IMAGE_TRANSPORT == 'b64':
+                image_data = base64.b64decode(data['data'][0]['b64_json'])
+                span["bytes_in"] = len(image_data)
+                logger.info(f"✅ Image generation successful. Received {len(image_data)} bytes inline.")
+                return image_data
         
-        source_image_url = data['data'][0]['url']
+            source_image_url = data['data'][0]['url']
         
-        if not source_image_url:
-            print(f"❌ Failed to get source_image_url from DALL-E 3 API response: {data}")
-            return None, None
+            if not source_image_url:
+                logger.error(f"❌ Failed to get source_image_url from DALL-E 3 API response: {data}")
+                span["outcome"] = 'failed'
+                return None
         
-        print(f"✅ Image generation successful. Source URL: {source_image_url}")
-        
-        # Step 2: Download the image content from the source URL
-        print(f"⬇️  Downloading image from {source_image_url}...")
-        image_response = requests.get(source_image_url)
-        image_response.raise_for_status()
-        image_data = image_response.content
+            logger.info(f"✅ Image generation successful. Source URL: {source_image_url}")
+            return source_image_url
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ An error occurred while generating the image: {e}")
+            # Log the full error response for debugging if possible
+            if e.response is not None:
+                logger.error(f"Error response: {e.response.text}")
+            span.update(outcome='failed', error=str(e)[:200])
+            return None
+        except (KeyError, IndexError, ValueError) as e:
+            logger.error(f"❌ Unexpected DALL-E 3 API response: {e}")
+            span.update(outcome='failed', error=str(e)[:200])
+            return None
+
+class HashingReader:
+    """Wraps a readable stream, hashing everything read through it and optionally copying it to a file."""
+    def __init__(self, raw, copy_to=None):
+        self.raw = raw
+        self.copy_to = copy_to
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, amount=-1):
+        data = self.raw.read(amount)
+        self.sha256.update(data)
+        self.size += len(data)
+        if self.copy_to:
+            self.copy_to.write(data)
+        return data
+
+    def tell(self):
+        return self.size
+
+def image_object_name(digest):
+    """The content-addressed S3 key for an image with this SHA-256."""
+    return f"{S3_IMAGE_PREFIX}/{digest}.png"
+
+def variant_object_name(digest, width, fmt):
+    """The S3 key of one responsive variant of the image with this SHA-256."""
+    return f"{S3_IMAGE_PREFIX}/{digest}-{width}w.{fmt}"
+
+def s3_object_exists(object_name):
+    """HEADs an object in our bucket. Any error other than a 404 counts as missing, so the caller uploads."""
+    if not all([S3_BUCKET_NAME, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY]):
+        return False
+    try:
+        with PROVIDER_LIMITS['s3']:
+            get_s3_client().head_object(Bucket=S3_BUCKET_NAME, Key=object_name)
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') not in ('404', 'NoSuchKey', 'NotFound'):
+            logger.warning(f"⚠️ Could not check S3 for '{object_name}': {e}")
+        return False
+
+variant_pool = VariantPool(IMAGE_VARIANT_WORKERS)
+
+def warn_unavailable_image_formats():
+    """Logs, once at startup, every IMAGE_VARIANT_FORMATS entry that will not be encoded."""
+    for fmt, reason in unavailable_formats(IMAGE_VARIANT_FORMATS).items():
+        logger.warning(f"⚠️ IMAGE_VARIANT_FORMATS asks for {fmt}, but {reason}; no {fmt} variants will be stored.")
+    if IMAGE_VARIANT_FORMATS and not available_formats(IMAGE_VARIANT_FORMATS):
+        logger.warning("⚠️ No image variants can be encoded; articles will link to the original PNG.")
 
-        # Step 3: Upload the downloaded data to our S3 bucket
-        # Create a unique name for the file in S3, following the specified structure.
-        task_id = str(int(time.time() * 1000))
-        unique_filename = f"{uuid.uuid4()}.png"
-        object_name = f"tasks/{task_id}/attachments/{unique_filename}"
-        s3_url = upload_image_to_s3(image_data, object_name)
 
-        return s3_url, unique_filename
+def store_image_variants(digest, source, check_existing=False):
+    """
+    Encodes the responsive variants of a stored image in the process pool and
+    uploads them. source is the image bytes or a path to them. With
+    check_existing, variants already in S3 are not uploaded again.
+    Returns [{"url", "width", "height", "content_type"}], widest first.
+    """
+    formats = available_formats(IMAGE_VARIANT_FORMATS)
+    if not formats or not IMAGE_VARIANT_WIDTHS:
+        return []
+
+    with metrics.span('image.variants', formats=','.join(formats)) as span:
+        try:
+            variants = variant_pool.submit(source, IMAGE_VARIANT_WIDTHS, formats, IMAGE_VARIANT_QUALITY).result()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not make image variants for {digest[:12]}: {e}")
+            span.update(outcome='failed', error=str(e)[:200])
+            return []
+
+        stored = []
+        for variant in variants:
+            object_name = variant_object_name(digest, variant["width"], variant["format"])
+            content_type = CONTENT_TYPES[variant["format"]]
+            if check_existing and s3_object_exists(object_name):
+                url = s3_public_url(object_name)
+            else:
+                url = upload_image_to_s3(variant["data"], object_name, content_type)
+                span["bytes_out"] = span.get("bytes_out", 0) + len(variant["data"])
+            if url:
+                stored.append({"url": url, "width": variant["width"], "height": variant["height"],
+                               "content_type": content_type})
+        logger.info(f"🪄 Stored {len(stored)} image variant(s) for {digest[:12]} "
+                    f"({sum(len(variant['data']) for variant in variants) // 1024} KB in total).")
+        return stored
+
+def store_image(image_data):
+    """
+    Uploads image bytes under their content hash unless they are already in S3,
+    plus their responsive variants. Returns (s3_url, filename, variants).
+    """
+    digest = hashlib.sha256(image_data).hexdigest()
+    object_name = image_object_name(digest)
+    if s3_object_exists(object_name):
+        logger.info(f"♻️  Image {digest[:12]} is already in S3; not uploading it again.")
+        return s3_public_url(object_name), f"{digest}.png", store_image_variants(digest, image_data, check_existing=True)
+    s3_url = upload_image_to_s3(image_data, object_name)
+    if not s3_url:
+        return None, None, []
+    return s3_url, f"{digest}.png", store_image_variants(digest, image_data)
+
+def store_image_stream(stream):
+    """
+    Streams an image into S3 under a staging key while hashing it, then copies
+    it to its content-addressed key server-side (unless that already exists)
+    and drops the staging object. When variants are on, the stream is also
+    spooled to a temporary file for the process pool to read.
+    Returns (s3_url, filename, variants).
+    """
+    spool = tempfile.NamedTemporaryFile(suffix='.png', delete=False) if available_formats(IMAGE_VARIANT_FORMATS) else None
+    try:
+        reader = HashingReader(stream, copy_to=spool)
+        staging_name = f"{S3_IMAGE_PREFIX}/staging/{uuid.uuid4()}.png"
+        if not upload_image_to_s3(reader, staging_name):
+            return None, None, []
+
+        digest = reader.sha256.hexdigest()
+        object_name = image_object_name(digest)
+        s3_client = get_s3_client()
+        exists = s3_object_exists(object_name)
+        try:
+            with PROVIDER_LIMITS['s3']:
+                if exists:
+                    logger.info(f"♻️  Image {digest[:12]} is already in S3; dropping the streamed copy.")
+                else:
+                    s3_client.copy_object(Bucket=S3_BUCKET_NAME, Key=object_name, ContentType='image/png',
+                                          CacheControl=IMAGE_CACHE_CONTROL,
+                                          CopySource={'Bucket': S3_BUCKET_NAME, 'Key': staging_name},
+                                          MetadataDirective='REPLACE')
+                s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=staging_name)
+        except ClientError as e:
+            logger.error(f"❌ Could not move streamed image to '{object_name}': {e}")
+            return None, None, []
+
+        variants = []
+        if spool:
+            spool.close()
+            variants = store_image_variants(digest, spool.name, check_existing=exists)
+        return s3_public_url(object_name), f"{digest}.png", variants
+    finally:
+        if spool:
+            spool.close()
+            os.remove(spool.name)
+
+def transfer_image(source_image):
+    """
+    Moves a rendered image into S3 under its content hash, with its responsive
+    variants. Returns (s3_url, filename, variants).
+    source_image is either the image bytes or a source URL to download from.
+    """
+    if not source_image:
+        return None, None, []
+
+    if isinstance(source_image, bytes):
+        return store_image(source_image)
 
+    try:
+        logger.info(f"⬇️  Downloading image from {source_image}...")
+        if IMAGE_TRANSPORT == 'stream':
+            # Pipe the download straight into S3 in chunks instead of buffering the whole PNG.
+            with http_client.get(source_image, stream=True) as image_response:
+                image_response.raise_for_status()
+                image_response.raw.decode_content = True
+                return store_image_stream(image_response.raw)
+
+        with metrics.span('image.download') as span, PROVIDER_LIMITS['openai_images']:
+            image_response = http_client.get(source_image)
+            image_response.raise_for_status()
+            image_data = image_response.content
+            span["bytes_in"] = len(image_data)
     except requests.exceptions.RequestException as e:
-        print(f"❌ An error occurred while generating the image: {e}")
-        # Log the full error response for debugging if possible
-        if e.response is not None:
-            print(f"Error response: {e.response.text}")
-        return None, None
+        logger.error(f"❌ An error occurred while downloading the image: {e}")
+        return None, None, []
 
-def generate_pillar_page(ai_client, pillar_title, linked_articles):
-    """Generates a pillar page that links to other articles."""
-    print(f"🏛️  Generating pillar page: '{pillar_title}'...")
+    return store_image(image_data)
 
-    # Create a markdown list of the article titles to link to
-    links_markdown = ""
-    for title, slug in linked_articles:
-        links_markdown += f"- [{title}](/{slug})\\n"
+def primary_image_url(image_url, image_variants=None):
+    """The URL pages should show: the widest WebP variant if there is one, otherwise the original PNG."""
+    for variant in image_variants or []:
+        if variant["content_type"] == 'image/webp':
+            return variant["url"]
+    return image_url
 
-    prompt = f"""
+image_cache = None # DiskCache of image prompt -> stored image, set in main
+
+def cached_image(prompt):
+    """Returns (s3_url, filename, variants) of the image already made for this prompt if it is still in S3, else None."""
+    if not image_cache or not prompt:
+        return None
+    cached = image_cache.get(cache_key('dall-e-3', prompt))
+    if cached is None:
+        return None
+    image = json.loads(cached)
+    if not s3_object_exists(image["object_name"]):
+        return None
+    logger.info(f"♻️  Reusing image for prompt '{prompt[:50]}...': {image['url']}")
+    return image["url"], image["filename"], image.get("variants", [])
+
+def remember_image(prompt, image_url, image_filename, image_variants=None):
+    """Records the stored image for a prompt so later runs can reuse it."""
+    if image_cache and prompt and image_url:
+        image_cache.set(cache_key('dall-e-3', prompt), json.dumps({
+            "url": image_url, "filename": image_filename, "variants": image_variants or [],
+            "object_name": image_object_name(os.path.splitext(image_filename)[0])
+        }))
+
+def generate_and_upload_image(prompt):
+    """
+    Generates an image using DALL-E 3, downloads it, and uploads it and its
+    variants to S3, reusing one made for the same prompt. Returns (s3_url, filename, variants).
+    """
+    with metrics.span('image.generate_and_upload') as span:
+        cached = cached_image(prompt)
+        if cached:
+            span["outcome"] = 'cached'
+            return cached
+        image_url, image_filename, image_variants = transfer_image(render_image(prompt))
+        if not image_url:
+            span["outcome"] = 'failed'
+        remember_image(prompt, image_url, image_filename, image_variants)
+        return image_url, image_filename, image_variants
+
+# The static part of every pillar page prompt, cached like ARTICLE_PREAMBLE;
+# each call only adds its title and the articles to link to.
+PILLAR_PREAMBLE = """
     You are an expert SEO content writer and marketing strategist for 'AgentWeb', an AI marketing agency. Your persona is modeled after a seasoned YC founder who gives direct, actionable advice. Your audience is early-stage (pre-seed to Series A) B2B SaaS founders who are technical and product-focused.
 
-    Your task is to write a comprehensive, foundational pillar page with the title: "{pillar_title}". This article will serve as a central hub for a topic and must be at least 2500 words.
+    Your task is to write a comprehensive, foundational pillar page with the title given at the end of this prompt. This article will serve as a central hub for a topic and must be at least 2500 words.
 
     **Content Rules:**
     1.  **Structure and Formatting:**
@@ -252,9 +1100,7 @@ def generate_pillar_page(ai_client, pillar_title, linked_articles):
 
     2.  **Pillar Content and Interlinking:**
         - The pillar page must provide a comprehensive overview of the main topic.
-        - You MUST naturally and contextually link to the following related blog posts. Weave them into the body of the text where they add the most value and feel like a natural next step for the reader.
-        - **Blog posts to link to:**
-          {links_markdown}
+        - You MUST naturally and contextually link to the related blog posts listed at the end of this prompt. Weave them into the body of the text where they add the most value and feel like a natural next step for the reader.
 
     3.  **Internal Linking Strategy (Homepage, Build, Pricing):**
         - You MUST include **exactly one** link to our homepage, `https://www.agentweb.pro`, within a natural, relevant sentence about the value of a 'done-for-you' marketing service for busy founders.
@@ -269,50 +1115,85 @@ def generate_pillar_page(ai_client, pillar_title, linked_articles):
     You must return ONLY a valid JSON object with two keys: "description" and "article_body".
     - "description": A short, compelling summary of the pillar page for a meta description (1-2 sentences, no markdown).
     - "article_body": The full pillar page content, following all the rules above.
+    """
+
+def pillar_links_markdown(linked_articles):
+    """A markdown list linking each {"title", "slug"} article."""
+    return "".join(f"- [{article['title']}](/{article['slug']})\n" for article in linked_articles)
+
+def link_pillar_articles(article_body, linked_articles):
+    """Appends a list of links to any linked article the generated pillar body does not link to itself."""
+    missing = [article for article in linked_articles if f"(/{article['slug']})" not in article_body]
+    if not missing:
+        return article_body
+    logger.info(f"🔗 Adding {len(missing)} article link(s) the pillar page body left out.")
+    return f"{article_body.rstrip()}\n\n## Related Articles\n\n{pillar_links_markdown(missing)}"
+
+def generate_pillar_page(ai_client, pillar_title, linked_articles):
+    """Generates a pillar page that links to other articles, given as {"title", "slug"} dicts."""
+    logger.info(f"🏛️  Generating pillar page: '{pillar_title}'...")
+
+    links_markdown = pillar_links_markdown(linked_articles)
+
+    prompt = f"""
+    **Blog posts to link to:**
+    {links_markdown}
 
     Now, generate the pillar page content for the title: "{pillar_title}"
     """
-    response_text = ai_client.generate_content(prompt)
+    data, response_text = ai_client.generate_json(prompt, context=PILLAR_PREAMBLE, task='pillar')
     if not response_text:
-        print("❌ Failed to generate pillar page content.")
-        return None, None, None, None, None
+        logger.error("❌ Failed to generate pillar page content.")
+        return None, None, None, None, None, None
 
-    try:
-        content_json = json.loads(response_text)
-        description = content_json.get("description", "")
-        article_body = content_json.get("article_body", "")
-    except json.JSONDecodeError:
-        print("❌ Failed to parse pillar page JSON response. Using fallback.")
-        description = "A comprehensive guide from AgentWeb."
-        article_body = response_text
+    description, article_body = article_fields(data, response_text)
+    if not article_body:
+        logger.error("❌ Pillar page response had no usable article body.")
+        return None, None, None, None, None, None
+    description = description or "A comprehensive guide from AgentWeb."
 
+    article_body = enforce_markdown_rules(ai_client, pillar_title, article_body, PILLAR_MIN_WORDS)
+    article_body = link_pillar_articles(article_body, linked_articles)
     image_prompt = ai_client.generate_image_prompt(pillar_title, article_body[:500])
-    image_url, image_filename = generate_and_upload_image(image_prompt)
+    image_url, image_filename, image_variants = generate_and_upload_image(image_prompt)
 
     slug = slugify(pillar_title)
     output_filename = f"seo_automator/generated_content/pillar_{slug}.md"
     os.makedirs(os.path.dirname(output_filename), exist_ok=True)
-    with open(output_filename, 'w', encoding='utf-8') as f:
-        f.write(f"# {pillar_title}\\n\\n")
-        f.write(f"**Description:** {description}\\n\\n")
-        if image_url:
-            f.write(f"![Generated Image]({image_url})\\n\\n")
-        f.write(article_body)
-
-    # Add structured data
-    add_structured_data(output_filename, pillar_title, description, image_url, datetime.now().isoformat())
-    print(f"✅ Pillar page saved to '{output_filename}'")
-
-    return pillar_title, description, article_body, image_url, image_filename
-
-def add_structured_data(file_path, title, description, image_url, published_date):
+    with metrics.span('file.write_pillar', path=output_filename) as span:
+        with open(output_filename, 'w', encoding='utf-8') as f:
+            f.write(f"# {pillar_title}\n\n")
+            f.write(f"**Description:** {description}\n\n")
+            if image_url:
+                f.write(f"![Generated Image]({primary_image_url(image_url, image_variants)})\n\n")
+            f.write(article_body)
+
+        # Add structured data
+        add_structured_data(output_filename, pillar_title, description, image_url, datetime.now().isoformat(),
+                            image_variants)
+        span["bytes_out"] = os.path.getsize(output_filename)
+    logger.info(f"✅ Pillar page saved to '{output_filename}'")
+
+    return pillar_title, description, article_body, image_url, image_filename, image_variants
+
+def structured_data_image(image_url, image_variants=None):
+    """The JSON-LD 'image': every responsive variant plus the original, or just the original's URL."""
+    if not image_variants:
+        return image_url
+    return [
+        {"@type": "ImageObject", "url": variant["url"], "width": variant["width"], "height": variant["height"],
+         "encodingFormat": variant["content_type"]}
+        for variant in image_variants
+    ] + [{"@type": "ImageObject", "url": image_url, "encodingFormat": "image/png"}]
+
+def add_structured_data(file_path, title, description, image_url, published_date, image_variants=None):
     """Appends JSON-LD structured data to a markdown file."""
     schema = {
       "@context": "https://schema.org",
       "@type": "Article",
       "headline": title,
       "description": description,
-      "image": image_url,
+      "image": structured_data_image(image_url, image_variants),
       "author": {
         "@type": "Organization",
         "name": "AgentWeb"
@@ -333,19 +1214,17 @@ def add_structured_data(file_path, title, description, image_url, published_date
     }
 
     # Wrap in a script tag and append to the file
-    script_tag = f'\\n\\n<script type="application/ld+json">\\n{json.dumps(schema, indent=2)}\\n</script>'
+    script_tag = f'\n\n<script type="application/ld+json">\n{json.dumps(schema, indent=2)}\n</script>'
 
     with open(file_path, 'a', encoding='utf-8') as f:
         f.write(script_tag)
 
-def generate_full_article_and_image(ai_client, article_title):
-    """Generates one article, an image for it, saves it, and returns all data."""
-    print(f"🤖 Starting content generation for: '{article_title}'...")
-
-    prompt = f"""
+# The static part of every article prompt. It is sent once per run as a cached
+# context (or inline as the prompt prefix); each call only adds its title.
+ARTICLE_PREAMBLE = """
     You are an expert SEO content writer and marketing strategist for 'AgentWeb', an AI marketing agency. Your persona is modeled after a seasoned YC founder who gives direct, actionable advice. Your audience is early-stage (pre-seed to Series A) B2B SaaS founders who are technical and product-focused.
 
-    Your task is to write a high-quality, comprehensive, and SEO-optimized article with the title: "{article_title}".
+    Your task is to write a high-quality, comprehensive, and SEO-optimized article with the title given at the end of this prompt.
 
     **Content Rules:**
     1.  **Structure and Formatting:**
@@ -368,83 +1247,223 @@ def generate_full_article_and_image(ai_client, article_title):
     You must return ONLY a valid JSON object with two keys: "description" and "article_body".
     - "description": A short, compelling, plain-text summary of the article for a meta description (1-2 sentences, no markdown).
     - "article_body": The full article content, following all the rules above.
+    """
 
+def build_article_prompt(article_title):
+    """Builds the per-article part of the Gemini prompt; ARTICLE_PREAMBLE holds the rest."""
+    return f"""
     Now, generate the content for the title: "{article_title}"
     """
 
-    response_text = ai_client.generate_content(prompt)
+def build_continuation_prompt(prompt, partial_response):
+    """Asks Gemini to carry on a JSON answer that was cut off, from its very last character."""
+    return f"""{prompt}
+
+    Your previous answer to the request above was cut off before the JSON object was complete. It ended with:
+    <<<
+    {partial_response[-JSON_CONTINUATION_TAIL_CHARS:]}
+    >>>
+    Continue the answer EXACTLY from the last character shown, inside the same JSON string or array it stopped in.
+    Do not repeat any text that was already written and do not start a new JSON object or code block.
+    """
+
+def article_fields(data, response_text):
+    """
+    Returns (description, article_body) from a parsed article or pillar page
+    answer. If the answer could not be parsed, the fields are decoded out of
+    the raw text as far as they go, so JSON syntax never ends up in the body.
+    Missing fields come back as ''.
+    """
+    if isinstance(data, dict):
+        description = data.get("description", "")
+        article_body = data.get("article_body", "")
+        if isinstance(description, str) and isinstance(article_body, str):
+            return description.strip(), article_body
+    description = salvage_string_field(response_text, "description")
+    article_body = salvage_string_field(response_text, "article_body")
+    if article_body:
+        logger.warning(f"⚠️ Using the {len(article_body)} characters of article_body recovered from an unparseable response.")
+    elif '{' not in response_text:
+        # Not JSON at all: the model ignored the format and wrote plain markdown.
+        logger.warning("⚠️ Response was not JSON; using it as the article body.")
+        article_body = response_text.strip()
+    return description.strip(), article_body
+
+def parse_article_response(ai_client, prompt, response_text):
+    """Pulls (description, article_body) out of the model's JSON answer, continuing it first if it was cut off."""
+    data, response_text = ai_client.complete_json(prompt, response_text, ARTICLE_PREAMBLE, 'article')
+    description, article_body = article_fields(data, response_text)
+    if article_body and not description:
+        description = ' '.join(article_body.strip().split()[:30]) + "..." # Fallback description
+    return description, article_body
+
+def enforce_markdown_rules(ai_client, title, article_body, min_words):
+    """
+    Repairs a generated body against the prompt's formatting rules locally and,
+    only if it is still too short, asks Gemini for the missing sections.
+    """
+    article_body, report = fix_markdown(article_body, min_words)
+    fixes = dict(report["fixes"])
+    for _ in range(WORD_COUNT_PATCHES):
+        if not report["short_by"]:
+            break
+        logger.info(f"✍️  '{title}' is {report['short_by']} words short of {min_words}; asking for extra sections...")
+        sections = ai_client.generate_extra_sections(title, outline(article_body), report["short_by"])
+        if not sections:
+            break
+        article_body, report = fix_markdown(insert_sections(article_body, sections), min_words)
+        fixes["sections added"] = fixes.get("sections added", 0) + 1
+        for fix, count in report["fixes"].items():
+            fixes[fix] = fixes.get(fix, 0) + count
+
+    if fixes:
+        logger.info(f"🩹 Fixed '{title}': " + ", ".join(f"{fix} ({count})" for fix, count in fixes.items()))
+    if report["short_by"]:
+        logger.warning(f"⚠️ '{title}' is still {report['short_by']} words short of {min_words}.")
+    return article_body
+
+def generate_article_text(ai_client, article_title):
+    """Generates the description and markdown body for one article."""
+    logger.info(f"🤖 Starting content generation for: '{article_title}'...")
+
+    prompt = build_article_prompt(article_title)
+    response_text = ai_client.generate_content(prompt, context=ARTICLE_PREAMBLE, task='article')
 
     if not response_text:
-        print("❌ Failed to generate article content. Aborting.")
-        return None, None, None, None, None
+        logger.error("❌ Failed to generate article content. Aborting.")
+        return None, None
 
-    print(f"📄 Raw AI Response: {response_text}") # Log the raw response
+    logger.debug("📄 Raw AI Response: %s", response_text) # Only formatted when --log-level is DEBUG
 
-    # Clean the response to remove markdown code blocks if they exist
-    if response_text.strip().startswith("```json"):
-        # Find the first { and the last } to extract the JSON object
-        start_index = response_text.find('{')
-        end_index = response_text.rfind('}')
-        if start_index != -1 and end_index != -1:
-            response_text = response_text[start_index:end_index+1]
+    description, article_body = parse_article_response(ai_client, prompt, response_text)
+    if not article_body:
+        logger.error("❌ AI response had no usable article body. Aborting.")
+        return None, None
+    article_body = enforce_markdown_rules(ai_client, article_title, article_body, ARTICLE_MIN_WORDS)
+    logger.info("✅ Article content and description generated.")
+    return description, article_body
 
+def stream_article_text(ai_client, article_title, on_body_text):
+    """
+    Generates one article with a streamed Gemini response. Each newly decoded
+    piece of article_body is passed to on_body_text as soon as it arrives.
+    """
+    logger.info(f"🤖 Starting streamed content generation for: '{article_title}'...")
+
+    body_stream = JsonStringFieldStream("article_body")
+    prompt = build_article_prompt(article_title)
+    pieces = []
     try:
-        content_json = json.loads(response_text)
-        description = content_json.get("description", "")
-        article_body = content_json.get("article_body", "")
-        if not description or not article_body:
-            raise ValueError("Missing description or article_body in AI response.")
-    except (json.JSONDecodeError, ValueError) as e:
-        print(f"❌ Failed to parse AI response as valid JSON. Error: {e}")
-        print("Falling back to using the full response as the article body.")
-        description = ' '.join(response_text.strip().split()[:30]) + "..." # Fallback description
-        article_body = response_text
-
-    print("✅ Article content and description generated.")
-    
-    # Generate an image prompt from an extract of the article
-    extract = ' '.join(article_body.strip().split()[:100])
-    image_prompt = ai_client.generate_image_prompt(article_title, extract)
-    
-    # Generate the actual image URL by uploading to S3
-    image_url, image_filename = generate_and_upload_image(image_prompt)
+        for chunk in ai_client.generate_content_stream(prompt, context=ARTICLE_PREAMBLE, task='article'):
+            pieces.append(chunk)
+            body_text = body_stream.feed(chunk)
+            if body_text:
+                on_body_text(body_text)
+    except Exception as e:
+        logger.error(f"❌ Streamed article generation failed: {e}")
+        return None, None
+
+    response_text = ''.join(pieces)
+    if not response_text:
+        logger.error("❌ Failed to generate article content. Aborting.")
+        return None, None
+
+    description, article_body = parse_article_response(ai_client, prompt, response_text)
+    if not article_body:
+        logger.error("❌ AI response had no usable article body. Aborting.")
+        return None, None
+    article_body = enforce_markdown_rules(ai_client, article_title, article_body, ARTICLE_MIN_WORDS)
+    logger.info("✅ Article content and description generated.")
+    return description, article_body
+
+def article_extract(article_body, words=100):
+    """Returns the first words of an article, used to build its image prompt."""
+    return ' '.join(article_body.strip().split()[:words])
 
-    # Save the local file
+def write_article_file(article_title, description, article_body, image_url, image_variants=None):
+    """Writes the article markdown plus JSON-LD to generated_content and returns its slug."""
     slug = slugify(article_title)
     output_filename = f"seo_automator/generated_content/{slug}.md"
     os.makedirs(os.path.dirname(output_filename), exist_ok=True)
 
-    with open(output_filename, 'w', encoding='utf-8') as f:
-        f.write(f"# {article_title}\\n\\n")
-        f.write(f"**Description:** {description}\\n\\n")
-        if image_url:
-            f.write(f"![Generated Image]({image_url})\\n\\n")
-        f.write(article_body)
+    with metrics.span('file.write_article', path=output_filename) as span:
+        with open(output_filename, 'w', encoding='utf-8') as f:
+            f.write(f"# {article_title}\n\n")
+            f.write(f"**Description:** {description}\n\n")
+            if image_url:
+                f.write(f"![Generated Image]({primary_image_url(image_url, image_variants)})\n\n")
+            f.write(article_body)
 
-    # Add structured data to the file
-    add_structured_data(output_filename, article_title, description, image_url, datetime.now().isoformat())
+        # Add structured data to the file
+        add_structured_data(output_filename, article_title, description, image_url, datetime.now().isoformat(),
+                            image_variants)
+        span["bytes_out"] = os.path.getsize(output_filename)
 
-    print(f"✅ Article and image data saved to '{output_filename}'")
-    
-    return article_title, description, article_body, image_url, image_filename, slug
+    # Drop the in-progress body written while the article was streaming, if any.
+    if os.path.exists(output_filename + '.part'):
+        os.remove(output_filename + '.part')
+
+    logger.info(f"✅ Article and image data saved to '{output_filename}'")
+    return slug
 
 
 # ==============================================================================
 # 3. BASEHUB ARTICLE POSTING
 # ==============================================================================
 
-def post_article_to_basehub(title, description, content, image_url, image_filename, published_at):
-    """Posts the generated article and image to Basehub."""
-    print("\\n🚀 Posting generated article to Basehub...")
+basehub_index = None # Set in main once the local index has been synced
 
-    BASEHUB_API_URL = os.environ.get('BASEHUB_API_URL', 'https://api.basehub.com/graphql')
-    BASEHUB_TOKEN = os.environ.get('BASEHUB_TOKEN', '')
-    POSTS_COLLECTION_ID = 'dKrosxXlaGpnZCrAbHxlX'
+def published_basehub_post(title):
+    """
+    Returns the already-published post from the local index that has this
+    title's slug or, failing that, the same title up to case and punctuation
+    (e.g. a post whose slug was edited by hand). None if there is none.
+    """
+    if not basehub_index:
+        return None
+    return basehub_index.get_by_slug(slugify(title)) or basehub_index.get_by_title(title)
 
-    if not BASEHUB_TOKEN:
-        print("❌ ERROR: BASEHUB_TOKEN is not set. Cannot publish.")
-        return
+def basehub_post_exists(title):
+    """
+    Checks whether a post with this title is already in Basehub. Used before
+    retrying a create that failed ambiguously, so a retry never duplicates a post.
+    """
+    query = '''
+    query PostByTitle($title: String!) {
+      site {
+        blog {
+          posts(filter: {_sys_title: {eq: $title}}, first: 1) {
+            items {
+              _id
+            }
+          }
+        }
+      }
+    }
+    '''
+    headers = {
+        "Authorization": f"Bearer {BASEHUB_TOKEN}",
+        "Content-Type": "application/json"
+    }
+    response = http_client.post(
+        BASEHUB_API_URL,
+        json={"query": query, "variables": {"title": title}},
+        headers=headers,
+        idempotent=True, # A read-only query is always safe to retry
+        limiter=RATE_LIMITERS['basehub']
+    )
+    response.raise_for_status()
+    try:
+        return bool(response.json()['data']['site']['blog']['posts']['items'])
+    except (KeyError, TypeError, ValueError) as e:
+        raise requests.exceptions.RequestException(f"Could not check Basehub for '{title}': {e}")
 
+def build_basehub_post_operation(title, description, content, image_url, image_filename, published_at, existing_id=None,
+                                 image_variants=None):
+    """
+    Builds the Basehub transaction 'create' operation for one post, or an 'update' of existing_id.
+    The image media points at the widest WebP variant when there is one.
+    """
     # This structure exactly matches the working basehub_test_post.py
     transaction_data = {
         "type": "create",
@@ -479,6 +1498,8 @@ def post_article_to_basehub(title, description, content, image_url, image_filena
     }
 
     if image_url and image_filename:
+        image_url = primary_image_url(image_url, image_variants)
+        image_filename = os.path.basename(image_url)
         transaction_data["data"]["value"]["image"] = {
             "type": "instance",
             "mainComponentId": "AAzuzbz0jSbfwGJYvtMu3",
@@ -493,6 +1514,35 @@ def post_article_to_basehub(title, description, content, image_url, image_filena
             }
         }
 
+    if existing_id:
+        return {"type": "update", "id": existing_id, "title": title, "value": transaction_data["data"]["value"]}
+    return transaction_data
+
+def post_article_to_basehub(title, description, content, image_url, image_filename, published_at, image_variants=None):
+    """Posts the generated article and image to Basehub. Returns True on success."""
+    with metrics.span('basehub.post', title=title) as span:
+        ok = _post_article_to_basehub(span, title, description, content, image_url, image_filename, published_at,
+                                      image_variants)
+        if not ok:
+            span["outcome"] = 'failed'
+        return ok
+
+def _post_article_to_basehub(span, title, description, content, image_url, image_filename, published_at, image_variants):
+    logger.info("🚀 Posting generated article to Basehub...")
+
+    if not BASEHUB_TOKEN:
+        logger.error("❌ ERROR: BASEHUB_TOKEN is not set. Cannot publish.")
+        return False
+
+    existing = published_basehub_post(title)
+    if existing and BASEHUB_EXISTING_POSTS != 'update':
+        logger.info(f"⏭️  '{title}' is already published as '{existing['slug']}'; skipping.")
+        span["outcome"] = 'skipped'
+        return True
+    existing_id = existing["id"] if existing else None
+    transaction_data = build_basehub_post_operation(title, description, content, image_url, image_filename,
+                                                    published_at, existing_id=existing_id, image_variants=image_variants)
+
     mutation = '''
     mutation CreateBlogPost($data: String!) {
       transaction(data: $data)
@@ -500,28 +1550,849 @@ def post_article_to_basehub(title, description, content, image_url, image_filena
     '''
 
     variables = {"data": json.dumps(transaction_data)}
+    span.update(bytes_out=len(variables["data"].encode('utf-8')), update=bool(existing_id))
     headers = {
         "Authorization": f"Bearer {BASEHUB_TOKEN}",
         "Content-Type": "application/json"
     }
 
     try:
-        response = requests.post(
+        with PROVIDER_LIMITS['basehub']:
+            response = http_client.post(
+                BASEHUB_API_URL,
+                json={"query": mutation, "variables": variables},
+                headers=headers,
+                # Updating twice is harmless; a create is only resent once a lookup shows it did not land.
+                idempotent=bool(existing_id),
+                already_applied=None if existing_id else lambda: basehub_post_exists(title),
+                limiter=RATE_LIMITERS['basehub']
+            )
+        if response is None:
+            logger.info(f"✅ '{title}' was already created in Basehub by an earlier attempt.")
+            return True
+        response.raise_for_status()
+        logger.debug("Status Code: %s", response.status_code)
+        logger.debug("Response: %s", response.text)
+        # GraphQL reports failed mutations in the body with a 200 status.
+        if response.json().get("errors"):
+            logger.error(f"❌ Basehub rejected the post: {response.json()['errors']}")
+            return False
+        return True
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.error(f"❌ An error occurred while publishing to Basehub: {e}")
+        return False
+
+def chunk_basehub_batches(posts, max_items=None, max_bytes=None):
+    """Groups posts into batches capped by item count and serialized payload size."""
+    max_items = max_items or BASEHUB_BATCH_SIZE
+    max_bytes = max_bytes or BASEHUB_BATCH_MAX_BYTES
+    batches, batch, batch_bytes = [], [], 0
+    for post in posts:
+        size = len(post["data"].encode('utf-8'))
+        if batch and (len(batch) >= max_items or batch_bytes + size > max_bytes):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(post)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+def send_basehub_batch(batch):
+    """
+    Sends one request carrying an aliased `transaction` mutation per post.
+    Returns {key: (ok, result_or_error)}; raises RequestException if the batch as a whole failed.
+    """
+    variable_defs = ", ".join(f"$d{n}: String!" for n in range(len(batch)))
+    fields = "\n".join(f"      p{n}: transaction(data: $d{n})" for n in range(len(batch)))
+    mutation = f"""
+    mutation CreateBlogPosts({variable_defs}) {{
+{fields}
+    }}
+    """
+    variables = {f"d{n}": post["data"] for n, post in enumerate(batch)}
+    headers = {
+        "Authorization": f"Bearer {BASEHUB_TOKEN}",
+        "Content-Type": "application/json"
+    }
+
+    with metrics.span('basehub.batch', posts=len(batch)) as span, PROVIDER_LIMITS['basehub']:
+        span["bytes_out"] = sum(len(post["data"].encode('utf-8')) for post in batch)
+        response = http_client.post(
             BASEHUB_API_URL,
             json={"query": mutation, "variables": variables},
-            headers=headers
+            headers=headers,
+            limiter=RATE_LIMITERS['basehub']
         )
         response.raise_for_status()
-        print("Status Code:", response.status_code)
-        print("Response:", response.text)
-    except requests.exceptions.RequestException as e:
-        print(f"❌ An error occurred while publishing to Basehub: {e}")
+    try:
+        body = response.json()
+    except ValueError as e:
+        raise requests.exceptions.RequestException(f"Invalid JSON from Basehub: {e}")
+
+    data = body.get("data") or {}
+    errors = {}
+    for error in body.get("errors") or []:
+        path = error.get("path") or []
+        if not path:
+            # An error not tied to one alias (e.g. a validation error) means nothing ran.
+            raise requests.exceptions.RequestException(f"Basehub rejected the batch: {error.get('message')}")
+        errors[path[0]] = error.get("message")
+
+    outcome = {}
+    for n, post in enumerate(batch):
+        alias = f"p{n}"
+        if alias in errors or data.get(alias) is None:
+            outcome[post["key"]] = (False, errors.get(alias, "no result returned"))
+        else:
+            outcome[post["key"]] = (True, data[alias])
+    return outcome
+
+def post_articles_to_basehub_batch(posts, max_items=None, max_bytes=None):
+    """
+    Publishes many posts with as few round trips as possible.
+
+    Each post is a dict with a unique "key" plus the post_article_to_basehub
+    fields (title, description, content, image_url, image_filename, published_at, and optionally image_variants).
+    A batch that fails as a whole is split in half and retried, skipping posts a
+    lookup shows already landed; posts that fail inside an otherwise successful
+    batch are retried once on their own.
+
+    Returns {key: {"ok": bool, "basehub_id": transaction result or None, "error": message or None}}.
+    """
+    if not BASEHUB_TOKEN:
+        logger.error("❌ ERROR: BASEHUB_TOKEN is not set. Cannot publish.")
+        return {post["key"]: {"ok": False, "basehub_id": None, "error": "BASEHUB_TOKEN is not set"} for post in posts}
+
+    results = {}
+    to_send = []
+    for post in posts:
+        existing = published_basehub_post(post["title"])
+        if existing and BASEHUB_EXISTING_POSTS != 'update':
+            results[post["key"]] = {"ok": True, "basehub_id": existing["id"], "error": None}
+            continue
+        post["existing_id"] = existing["id"] if existing else None
+        post["data"] = json.dumps(build_basehub_post_operation(
+            post["title"], post["description"], post["content"],
+            post["image_url"], post["image_filename"], post["published_at"],
+            existing_id=post["existing_id"], image_variants=post.get("image_variants")
+        ))
+        to_send.append(post)
+    if len(to_send) < len(posts):
+        logger.info(f"⏭️  {len(posts) - len(to_send)} post(s) are already published; skipping them.")
+
+    retried_alone = set()
+    pending = deque(chunk_basehub_batches(to_send, max_items, max_bytes))
+    logger.info(f"\n🚀 Publishing {len(to_send)} posts to Basehub in {len(pending)} batch(es)...")
+
+    while pending:
+        batch = pending.popleft()
+        try:
+            outcome = send_basehub_batch(batch)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"⚠️ Basehub batch of {len(batch)} failed: {e}")
+            # The request may have partly landed before failing, so never resend a post that exists.
+            remaining = []
+            for post in batch:
+                if post["existing_id"]:
+                    remaining.append(post) # Updates are safe to resend
+                    continue
+                try:
+                    if basehub_post_exists(post["title"]):
+                        results[post["key"]] = {"ok": True, "basehub_id": None, "error": None}
+                        continue
+                except requests.exceptions.RequestException as check_error:
+                    results[post["key"]] = {"ok": False, "basehub_id": None, "error": f"{e}; could not verify: {check_error}"}
+                    continue
+                remaining.append(post)
+
+            if len(remaining) > 1:
+                middle = len(remaining) // 2
+                pending.extend([remaining[:middle], remaining[middle:]])
+            elif remaining and len(batch) > 1:
+                retried_alone.add(remaining[0]["key"])
+                pending.append(remaining)
+            elif remaining:
+                results[remaining[0]["key"]] = {"ok": False, "basehub_id": None, "error": str(e)}
+            continue
+
+        for post in batch:
+            ok, value = outcome[post["key"]]
+            if ok:
+                results[post["key"]] = {"ok": True, "basehub_id": value, "error": None}
+            elif len(batch) > 1 and post["key"] not in retried_alone:
+                retried_alone.add(post["key"])
+                pending.append([post])
+            else:
+                results[post["key"]] = {"ok": False, "basehub_id": None, "error": value}
+
+    succeeded = sum(1 for result in results.values() if result["ok"])
+    logger.info(f"📊 Basehub batch publish: {succeeded}/{len(posts)} posts published.")
+    for post in posts:
+        result = results[post["key"]]
+        if result["ok"]:
+            logger.info(f"   ✅ '{post['title']}' -> {result['basehub_id'] or 'already existed'}")
+        else:
+            logger.error(f"   ❌ '{post['title']}': {result['error']}")
+    return results
 
 # ==============================================================================
-# 4. MAIN EXECUTION
+# 4. BULK EXECUTION
+# ==============================================================================
+
+def checkpoint(journal, kind, item, state=None, **artifacts):
+    """Applies new artifacts to an in-flight item and persists them to the run journal."""
+    item.update(artifacts)
+    if state:
+        item["state"] = state
+    journal.record(kind, item["index"], item["title"], state, **artifacts)
+
+def build_article_stages(ai_client, start_date, journal, stage_workers=None, defer_publish=False, stream=False):
+    """
+    Splits article generation into stages. Each stage takes and returns the same
+    journaled article dict and skips its work if the journal shows it already
+    ran, so a resumed run only redoes what was lost. In --pipeline mode the slow
+    image leg of one article overlaps the text generation of the next. With
+    defer_publish the publish stage is a no-op and posts go out later in batches.
+
+    With stream, the article body is streamed into a .part file as Gemini writes
+    it, and the whole image leg starts in the background as soon as the first
+    100 words exist, taking it off the article's critical path.
+    """
+    stage_workers = {**PIPELINE_STAGE_WORKERS, **(stage_workers or {})}
+    image_executor = ThreadPoolExecutor(max_workers=stage_workers['image_render']) if stream else None
+
+    def needs_image(article):
+        # Checked on the image itself, not the state: an article written without its image is
+        # past 'image_uploaded', and a resume retries the image until the article is published.
+        return not article.get("image_url") and not reached(article, 'published')
+
+    def early_image(title, extract):
+        prompt = ai_client.generate_image_prompt(title, extract)
+        return (prompt, *generate_and_upload_image(prompt))
+
+    def stream_text(article):
+        output_filename = f"seo_automator/generated_content/{slugify(article['title'])}.md"
+        os.makedirs(os.path.dirname(output_filename), exist_ok=True)
+        received = []
+        wants_image = needs_image(article)
+
+        description, article_body = None, None
+        try:
+            with open(output_filename + '.part', 'w', encoding='utf-8') as part:
+                def on_body_text(body_text):
+                    part.write(body_text)
+                    part.flush()
+                    if wants_image and "image_future" not in article:
+                        received.append(body_text)
+                        words = ''.join(received).split()
+                        # Wait for word 101 so the 100th word is known to be complete.
+                        if len(words) > 100:
+                            extract = ' '.join(words[:100])
+                            article["image_future"] = image_executor.submit(early_image, article["title"], extract)
+
+                description, article_body = stream_article_text(ai_client, article["title"], on_body_text)
+                return description, article_body
+        finally:
+            # A finished body's .part file is replaced by write_article_file; a failed one is just debris.
+            if not article_body and os.path.exists(output_filename + '.part'):
+                os.remove(output_filename + '.part')
+
+    def text(article):
+        if not reached(article, 'text_done'):
+            if stream:
+                description, article_body = stream_text(article)
+            else:
+                description, article_body = generate_article_text(ai_client, article["title"])
+            if not article_body:
+                return None
+            checkpoint(journal, 'article', article, 'text_done', description=description, body=article_body)
+        return article
+
+    def image_prompts(articles):
+        # Articles whose image leg already started while streaming skip straight to image_upload.
+        todo = [
+            article for article in articles
+            if "image_future" not in article and needs_image(article) and not article.get("image_prompt")
+        ]
+        if todo:
+            prompts = ai_client.generate_image_prompts(
+                [(article["title"], article_extract(article["body"])) for article in todo]
+            )
+            for article in todo:
+                checkpoint(journal, 'article', article, image_prompt=prompts.get(article["title"]))
+        return articles
+
+    def image_render(article):
+        # DALL-E source URLs expire, so the rendered image is kept in memory only.
+        if needs_image(article) and "image_future" not in article:
+            article["cached_image"] = cached_image(article["image_prompt"])
+            if not article["cached_image"]:
+                article["source_image"] = render_image(article["image_prompt"])
+        return article
+
+    def image_upload(article):
+        if "image_future" in article:
+            try:
+                prompt, image_url, image_filename, image_variants = article.pop("image_future").result()
+            except Exception as e:
+                logger.error(f"❌ Early image generation failed for '{article['title']}': {e}")
+                prompt, image_url, image_filename, image_variants = None, None, None, []
+            checkpoint(journal, 'article', article, 'image_uploaded' if image_url else None, image_prompt=prompt,
+                       image_url=image_url, image_filename=image_filename, image_variants=image_variants)
+        elif needs_image(article):
+            image_url, image_filename, image_variants = (article.pop("cached_image", None)
+                                                         or transfer_image(article.pop("source_image", None)))
+            remember_image(article.get("image_prompt"), image_url, image_filename, image_variants)
+            # Without an image the article still goes out, and a resume retries the image (see needs_image).
+            # An image found on a retry moves the article back to 'image_uploaded' so its file is rewritten.
+            state = 'image_uploaded' if image_url else None
+            checkpoint(journal, 'article', article, state, image_url=image_url, image_filename=image_filename,
+                       image_variants=image_variants)
+        return article
+
+    def render(article):
+        if not reached(article, 'file_written'):
+            slug = write_article_file(article["title"], article["description"], article["body"], article.get("image_url"),
+                                      article.get("image_variants"))
+            checkpoint(journal, 'article', article, 'file_written', slug=slug)
+        return article
+
+    def publish(article):
+        if not defer_publish and not reached(article, 'published'):
+            # Backdate by position in the title list, not by completion order.
+            publish_date = start_date - timedelta(days=article["index"])
+            if post_article_to_basehub(article["title"], article["description"], article["body"],
+                                       article.get("image_url"), article.get("image_filename"), publish_date,
+                                       article.get("image_variants")):
+                checkpoint(journal, 'article', article, 'published')
+        return article
+
+    return [
+        Stage('text', text, workers=stage_workers['text'], on_close=image_executor and image_executor.shutdown),
+        Stage('image_prompt', image_prompts, workers=stage_workers['image_prompt'],
+              batch_size=IMAGE_PROMPT_BATCH_SIZE, batch_wait=IMAGE_PROMPT_BATCH_WAIT),
+        Stage('image_render', image_render, workers=stage_workers['image_render']),
+        Stage('image_upload', image_upload, workers=stage_workers['image_upload']),
+        Stage('render', render, workers=stage_workers['render']),
+        Stage('publish', publish, workers=stage_workers['publish']),
+    ]
+
+def close_article_stages(stages):
+    """Shuts down what the article stages keep running between articles, e.g. the streaming image executor."""
+    for stage in stages:
+        stage.close()
+
+def process_article(stages, article, total):
+    """Runs one article through every stage in turn. Returns the article or None."""
+    if RUN_BUDGET.exhausted and not reached(article, 'text_done'):
+        logger.warning(f"💸 Run budget exhausted; not starting '{article['title']}'.")
+        return None
+    logger.info(f"--- Generating article {article['index']+1}/{total}: '{article['title']}' ---")
+    try:
+        for stage in stages:
+            article = stage.run_one(article)
+            if article is None:
+                logger.warning(f"⚠️ Failed to generate article at stage '{stage.name}'. Skipping.")
+                return None
+        logger.info(f"✅ Successfully generated and saved article for '{article['title']}'.")
+        return article
+    except Exception as e:
+        logger.error(f"❌ An unexpected error occurred for title '{article['title']}': {e}. Skipping.")
+        return None
+
+def run_article_generation(ai_client, articles, start_date, journal, workers=1, defer_publish=False, stream=False,
+                           on_complete=None, stages=None):
+    """
+    Generates and publishes every journaled article, one at a time or on a thread pool.
+    on_complete(article, result) is called as each one finishes, with result None on failure.
+    Pass prebuilt stages to read their timing stats afterwards.
+    Returns the successful articles in the original title order.
+    """
+    own_stages = stages is None
+    stages = stages or build_article_stages(ai_client, start_date, journal, defer_publish=defer_publish, stream=stream)
+    total = len(articles)
+    results = [None] * total
+
+    if workers <= 1:
+        for i, article in enumerate(articles):
+            results[i] = process_article(stages, article, total)
+            if on_complete:
+                on_complete(article, results[i])
+    else:
+        logger.info(f"⚡ Running with {workers} concurrent workers...")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(process_article, stages, article, total): i
+                for i, article in enumerate(articles)
+            }
+            for finished, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                results[i] = future.result()
+                if on_complete:
+                    on_complete(articles[i], results[i])
+                status = "✅" if results[i] else "⚠️"
+                logger.info(f"📊 [{finished}/{total}] {status} '{articles[i]['title']}'")
+    if own_stages:
+        close_article_stages(stages)
+
+    failed_titles = [article["title"] for article, result in zip(articles, results) if not result]
+    logger.info(f"\n📊 {total - len(failed_titles)}/{total} articles succeeded.")
+    for title in failed_titles:
+        logger.warning(f"   ⚠️ Failed: '{title}'")
+
+    return [result for result in results if result]
+
+def run_article_pipeline(ai_client, articles, start_date, journal, stage_workers=None, defer_publish=False, stream=False,
+                         on_complete=None, stages=None):
+    """
+    Generates and publishes every journaled article through the staged pipeline.
+    on_complete(article, result) is called as each one leaves the pipeline, with result None on failure.
+    Pass prebuilt stages to read their timing stats afterwards.
+    Returns the successful articles in the original title order.
+    """
+    own_stages = stages is None
+    stages = stages or build_article_stages(ai_client, start_date, journal, stage_workers, defer_publish, stream)
+    pipeline = Pipeline(stages, on_complete=on_complete)
+    logger.info(f"⚡ Running staged pipeline: { {stage.name: stage.workers for stage in stages} }")
+
+    # Stop feeding new articles once the run budget is spent; in-flight ones drain normally.
+    feed = (article for article in articles if reached(article, 'text_done') or not RUN_BUDGET.exhausted)
+    results = sorted(pipeline.run(feed), key=lambda article: article["index"])
+    if own_stages:
+        close_article_stages(stages)
+
+    logger.info(pipeline.format_stats())
+    logger.info(f"\n📊 {len(results)}/{len(articles)} articles succeeded.")
+    for article, stage_name, error in pipeline.failures:
+        logger.warning(f"   ⚠️ Failed at '{stage_name}': '{article['title']}' ({error})")
+
+    return results
+
+def run_article_feed(stages, feed, total, workers=1, pipeline=False, on_complete=None):
+    """
+    Runs articles from a lazy feed, one that is still being filled while
+    earlier articles are generated, on `workers` threads or through the staged
+    pipeline, pulling the next article only when there is room for it.
+    on_complete(article, result) is called as each one finishes, with result None on failure.
+    Returns the number of articles that succeeded.
+    """
+    succeeded = []
+
+    def finished(article, result):
+        if result is not None:
+            succeeded.append(article["index"])
+        if on_complete:
+            on_complete(article, result)
+
+    if pipeline:
+        article_pipeline = Pipeline(stages, on_complete=finished)
+        logger.info(f"⚡ Running staged pipeline: { {stage.name: stage.workers for stage in stages} }")
+        article_pipeline.run(feed)
+        logger.info(article_pipeline.format_stats())
+        for article, stage_name, error in article_pipeline.failures:
+            logger.warning(f"   ⚠️ Failed at '{stage_name}': '{article['title']}' ({error})")
+    else:
+        feed_lock = threading.Lock()
+
+        def work():
+            while True:
+                with feed_lock:
+                    article = next(feed, None)
+                if article is None:
+                    return
+                finished(article, process_article(stages, article, total))
+
+        threads = [threading.Thread(target=work, name=f"article-{n}") for n in range(max(1, workers))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return len(succeeded)
+
+def run_queue_worker(ai_client, journal, work_queue, start_date, total, workers=1, pipeline=False, stage_workers=None,
+                     defer_publish=False, stream=False, stages=None):
+    """
+    Claims articles from the run's shared work queue and runs each through the
+    article stages until the queue is drained, either on `workers` threads or
+    through the staged pipeline. Every result goes into the shared journal.
+    Leases are kept alive by heartbeats and handed back if this worker stops early.
+    Pass prebuilt stages to read their timing stats afterwards.
+    Returns the number of articles this worker finished successfully.
+    """
+    own_stages = stages is None
+    stages = stages or build_article_stages(ai_client, start_date, journal, stage_workers, defer_publish, stream)
+
+    def claimed_articles():
+        # Stop claiming once the run budget is spent; leases still held are released on close().
+        for index in work_queue.items(QUEUE_POLL_SECONDS, stop=lambda: RUN_BUDGET.exhausted):
+            yield journal.get('article', index)
+
+    def finished(article, result):
+        work_queue.complete(article["index"], ok=result is not None)
+
+    work_queue.start_heartbeat()
+    try:
+        succeeded = run_article_feed(stages, claimed_articles(), total, workers, pipeline, on_complete=finished)
+    finally:
+        work_queue.close()
+        if own_stages:
+            close_article_stages(stages)
+    logger.info(f"📊 This worker finished {succeeded} article(s); queue: {work_queue.counts()}")
+    return succeeded
+
+def follow_work_queue(work_queue, journal, on_complete, stop):
+    """
+    Calls on_complete(article, result) once for every article that any worker
+    finishes for good (result None if it failed), by polling the queue until
+    stop is set and everything has been reported. Run on its own thread.
+    """
+    reported = set()
+    while True:
+        final = stop.is_set()
+        for index, status in work_queue.statuses().items():
+            if status in ('done', 'failed') and index not in reported:
+                reported.add(index)
+                article = journal.get('article', index)
+                on_complete(article, article if status == 'done' else None)
+        if final:
+            return
+        stop.wait(QUEUE_POLL_SECONDS)
+
+def process_pillar_page(ai_client, journal, index, pillar_title, linked_articles, publish_date, defer_publish=False):
+    """Generates and publishes one pillar page, skipping whatever the journal shows is done."""
+    pillar = journal.get('pillar', index) or {"index": index, "title": pillar_title, "state": "pending"}
+
+    if not reached(pillar, 'file_written'):
+        title, description, content, image_url, image_filename, image_variants = generate_pillar_page(
+            ai_client, pillar_title, linked_articles)
+        if not title:
+            return
+        checkpoint(journal, 'pillar', pillar, 'file_written', description=description, body=content,
+                   image_url=image_url, image_filename=image_filename, image_variants=image_variants)
+
+    if not defer_publish and not reached(pillar, 'published'):
+        if post_article_to_basehub(pillar_title, pillar["description"], pillar["body"],
+                                   pillar["image_url"], pillar["image_filename"], publish_date,
+                                   pillar.get("image_variants")):
+            checkpoint(journal, 'pillar', pillar, 'published')
+
+def assign_pillar_articles(articles, pillar_titles):
+    """
+    Groups article indexes by the pillar page they are most topically similar to,
+    using each title plus its description when the journal already has one.
+    """
+    texts = [f"{article['title']} {article.get('description', '')}" for article in articles]
+    groups = assign_articles_to_pillars(texts, pillar_titles, capacity_slack=PILLAR_CAPACITY_SLACK)
+    for pillar_title, group in zip(pillar_titles, groups):
+        logger.info(f"🗂️  {len(group):>3} articles -> '{pillar_title}'")
+        if not group:
+            logger.warning(f"⚠️ Only {len(articles)} articles for {len(pillar_titles)} pillar pages; "
+                           f"'{pillar_title}' has none and will be skipped.")
+    return [[articles[i]["index"] for i in group] for group in groups]
+
+def schedule_pillar_pages(scheduler, ai_client, journal, pillar_titles, assignments, start_date, total_titles,
+                          defer_publish=False):
+    """
+    Registers one scheduler task per pillar page that depends on the articles
+    assigned to it, so each page is written as soon as its own articles are done.
+    """
+    for i, (pillar_title, article_indexes) in enumerate(zip(pillar_titles, assignments)):
+        publish_date = start_date - timedelta(days=total_titles + i)
+
+        def task(linked_articles, i=i, pillar_title=pillar_title, publish_date=publish_date):
+            if not linked_articles:
+                logger.warning(f"⚠️ No successful articles for pillar page '{pillar_title}'. Skipping.")
+                return None
+            return process_pillar_page(ai_client, journal, i, pillar_title, linked_articles, publish_date,
+                                       defer_publish=defer_publish)
+
+        scheduler.add(pillar_title, task, deps=article_indexes)
+
+def publish_journaled_posts(journal, start_date, total_titles):
+    """Publishes every written but unpublished article and pillar page in batched mutations."""
+    posts = []
+    for kind in ('article', 'pillar'):
+        for item in journal.items(kind):
+            if reached(item, 'file_written') and not reached(item, 'published'):
+                # Articles are backdated by position; pillar pages come after all of them.
+                offset = item["index"] if kind == 'article' else total_titles + item["index"]
+                posts.append({
+                    "key": (kind, item["index"]),
+                    "item": item,
+                    "title": item["title"],
+                    "description": item["description"],
+                    "content": item["body"],
+                    "image_url": item.get("image_url"),
+                    "image_filename": item.get("image_filename"),
+                    "image_variants": item.get("image_variants"),
+                    "published_at": start_date - timedelta(days=offset),
+                })
+    if not posts:
+        return
+
+    results = post_articles_to_basehub_batch(posts)
+    for post in posts:
+        result = results[post["key"]]
+        if result["ok"]:
+            checkpoint(journal, post["key"][0], post["item"], 'published', basehub_id=result["basehub_id"])
+
+def run_content_job(ai_client, journal, start_date, title_batches=None, total=None, work_queue=None,
+                    queue_workers=1, workers=1, pipeline=False, stage_workers=None, defer_publish=False, stream=False):
+    """
+    Writes a journaled run's articles and then its pillar pages, and with
+    defer_publish publishes them all in batches at the end. Articles come
+    from one of three places:
+
+    - title_batches, from journal_keyword_titles(), for titles still being
+      written. The journal's articles go first, so a resumed run finishes them.
+      `total` bounds how many articles the feed can hold.
+    - work_queue, filled with the journal's articles and drained by
+      queue_workers in-process workers, each with its own connection as
+      separate processes would have. Other --worker processes can join in.
+    - the journal's articles, run through the staged pipeline or on `workers` threads.
+
+    Each pillar page starts as soon as its own articles are done, so the long
+    pillar generations overlap with article work. Returns the article stages,
+    with the timings of every in-process queue worker pooled into them.
+    """
+    articles = journal.items('article')
+    stages = build_article_stages(ai_client, start_date, journal, stage_workers, defer_publish, stream)
+    pillar_scheduler = DependencyScheduler(workers=len(PILLAR_PAGE_TITLES))
+
+    def schedule_pillars():
+        articles = journal.items('article')
+        assignments = assign_pillar_articles(articles, PILLAR_PAGE_TITLES)
+        schedule_pillar_pages(pillar_scheduler, ai_client, journal, PILLAR_PAGE_TITLES, assignments,
+                              start_date, len(articles), defer_publish=defer_publish)
+
+    def article_done(article, result):
+        linked = {"title": result["title"], "slug": result["slug"]} if result else None
+        pillar_scheduler.complete(article["index"], linked)
+
+    if title_batches is not None:
+        def keyword_articles():
+            # A resumed run first finishes the articles whose titles it already has.
+            yield from articles
+            yield from title_batches
+            # Only now is every title known, so the pillar pages can be given their articles.
+            # Articles that already finished count straight away.
+            schedule_pillars()
+
+        succeeded = run_article_feed(stages, keyword_articles(), total or len(articles), workers=workers,
+                                     pipeline=pipeline, on_complete=article_done)
+        logger.info(f"\n📊 {succeeded}/{len(journal.topics())} articles succeeded.")
+    elif work_queue:
+        schedule_pillars()
+        work_queue.fill(article["index"] for article in articles)
+        logger.info(f"📬 Serving {len(articles)} articles from the work queue ({work_queue.counts()}); add workers "
+                    f"with: --worker --run-dir {journal.run_dir}")
+        # Pillar pages wait on articles finished by any worker, so follow the queue rather than this process.
+        following = threading.Event()
+        follower = threading.Thread(target=follow_work_queue, args=(work_queue, journal, article_done, following),
+                                    name='queue-follower', daemon=True)
+        follower.start()
+        # Pipeline stages own their queues, so every worker gets its own.
+        worker_stages = [stages] + [
+            build_article_stages(ai_client, start_date, journal, stage_workers, defer_publish, stream)
+            for _ in range(queue_workers - 1)
+        ]
+        worker_queues = [work_queue] + [
+            WorkQueue(journal.path, worker_id=f"{work_queue.worker_id}-{n}", lease_seconds=work_queue.lease_seconds,
+                      max_attempts=work_queue.max_attempts)
+            for n in range(1, queue_workers)
+        ]
+        threads = [
+            threading.Thread(target=run_queue_worker, name=f"queue-worker-{n}", args=(
+                ai_client, journal, worker_queues[n], start_date, len(articles)
+            ), kwargs=dict(workers=workers, pipeline=pipeline, stages=worker_stages[n]))
+            for n in range(queue_workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        following.set()
+        follower.join()
+        for own in worker_stages[1:]:
+            for stage, worker_stage in zip(stages, own):
+                stage.durations.extend(worker_stage.durations)
+                stage.processed += worker_stage.processed
+                stage.failed += worker_stage.failed
+            close_article_stages(own)
+    elif pipeline:
+        schedule_pillars()
+        run_article_pipeline(ai_client, articles, start_date, journal, on_complete=article_done, stages=stages)
+    else:
+        schedule_pillars()
+        run_article_generation(ai_client, articles, start_date, journal, workers=workers,
+                               on_complete=article_done, stages=stages)
+    close_article_stages(stages)
+
+    logger.info("✅ Bulk content generation complete.")
+    logger.info("🏛️  Waiting for the remaining pillar pages...")
+    # Articles that were never started (e.g. budget exhausted) count as failed here.
+    pillar_scheduler.finish()
+    logger.info("✅ Pillar page generation complete.")
+
+    if defer_publish:
+        publish_journaled_posts(journal, start_date, len(journal.topics()))
+    return stages
+
+def load_title_index():
+    """Loads the title index, refreshed from generated content and the Basehub index."""
+    index = TitleIndex(TITLE_INDEX_PATH)
+    added = index.add(read_generated_titles(GENERATED_CONTENT_DIR))
+    if basehub_index:
+        added += index.add(basehub_index.titles())
+    if added:
+        index.save()
+    return index
+
+def drop_duplicate_titles(titles, threshold, index=None):
+    """Filters out titles that near-duplicate an indexed title or an earlier one in the list."""
+    index = index or load_title_index()
+    kept, dropped = filter_duplicate_titles(titles, index, threshold, slugify)
+    for title, match, score in dropped:
+        logger.info(f"♻️  Skipping '{title}': {score:.0%} similar to '{match}'.")
+    logger.info(f"🧹 Kept {len(kept)}/{len(titles)} titles after checking against {len(index)} existing ones.")
+    return kept
+
+def keyword_titles(ai_client, source, business_context, limit, dedup_threshold=0, skip=0, known_titles=()):
+    """
+    Yields (titles, keywords used) for the top `limit` keywords of a
+    KeywordSource, KEYWORD_BATCH_SIZE keywords per Gemini call, one batch at a
+    time as the caller asks for more. The first `skip` keywords are passed
+    over, for a resumed run that already wrote them. Titles are checked for
+    duplicates against existing content, known_titles and earlier batches.
+
+    Keywords used counts only keywords that got a title, kept or dropped as a
+    duplicate. The feed stops at the first keyword Gemini could not title, so a
+    resumed run starts from it, and stops early once the run budget is spent.
+    Returns True if every keyword was used.
+    """
+    index = load_title_index() if dedup_threshold > 0 else None
+    if index is not None:
+        index.add((title, slugify(title)) for title in known_titles)
+    keywords = islice(source.keywords(limit), skip, None)
+    complete = False
+    while not RUN_BUDGET.exhausted:
+        batch = list(islice(keywords, KEYWORD_BATCH_SIZE))
+        if not batch:
+            complete = True
+            break
+        titles = ai_client.generate_keyword_titles(business_context, batch)
+        titles = list(takewhile(lambda title: title is not None, titles))
+        used = len(titles)
+        if index is not None and titles:
+            titles = drop_duplicate_titles(titles, dedup_threshold, index)
+            index.add((title, slugify(title)) for title in titles)
+        if used:
+            yield titles, used
+        if used < len(batch):
+            logger.error(f"❌ Could not write a title for keyword '{batch[used]}'; stopping the keyword feed there. "
+                         "Run again with --resume to continue from it.")
+            break
+    logger.info(f"🔑 Keyword file: {source.stats}")
+    return complete
+
+def journal_keyword_titles(journal, title_batches):
+    """
+    Adds each batch from keyword_titles() to the journal, together with how
+    far into the keyword file it got, and yields the new article items. Marks
+    the keyword file finished only if keyword_titles() used every keyword.
+    """
+    while True:
+        try:
+            titles, keywords_used = next(title_batches)
+        except StopIteration as stop:
+            complete = stop.value
+            break
+        yield from journal.extend(titles, keywords_used)
+    if complete:
+        journal.finish_keywords()
+
+def open_keyword_source(path):
+    """A KeywordSource over a keyword export with the KEYWORD_* settings; raises OSError or ValueError."""
+    return KeywordSource(path, keyword_column=KEYWORD_COLUMN, score_column=KEYWORD_SCORE_COLUMN,
+                         chunk_rows=KEYWORD_CHUNK_ROWS, dedup_capacity=KEYWORD_DEDUP_CAPACITY)
+
+def parse_stage_workers(value):
+    """Parses 'text=8,image_render=6' into a dict of stage worker counts."""
+    stage_workers = {}
+    for pair in value.split(','):
+        name, _, count = pair.partition('=')
+        if name.strip() not in PIPELINE_STAGE_WORKERS or not count.strip().isdigit():
+            raise argparse.ArgumentTypeError(f"invalid stage worker setting: '{pair}'")
+        stage_workers[name.strip()] = int(count)
+    return stage_workers
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate and publish SEO articles for AgentWeb.")
+    parser.add_argument('--workers', type=int, default=ARTICLE_WORKERS,
+                        help="Number of articles to process concurrently (default: ARTICLE_WORKERS or 1).")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Run articles through the staged producer/consumer pipeline.")
+    parser.add_argument('--stage-workers', type=parse_stage_workers, default={},
+                        help="Per-stage worker counts for --pipeline, e.g. 'text=8,image_render=6'.")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue the most recent run (or --run-dir) from its journal instead of starting over.")
+    parser.add_argument('--run-dir',
+                        help="Run directory to resume or to --worker on. Defaults to the latest run under RUNS_DIR.")
+    parser.add_argument('--keywords', default=KEYWORDS_CSV, metavar='CSV',
+                        help="Write titles for the top keywords of this keyword export instead of generating topics "
+                             "(default: KEYWORDS_CSV). Ranked by a volume/score column if the file has one.")
+    parser.add_argument('--keyword-limit', type=int, default=KEYWORD_LIMIT,
+                        help="How many keywords to write articles for (default: KEYWORD_LIMIT or 100).")
+    parser.add_argument('--queue', action='store_true',
+                        help="Serve this run's articles from a shared work queue so --worker processes can help; "
+                             "this process works the queue too, then writes the pillar pages.")
+    parser.add_argument('--worker', action='store_true',
+                        help="Pull titles from the work queue of a --queue run (--run-dir or the latest) until it is "
+                             "drained. Workers only generate articles; pillar pages are left to the --queue process. "
+                             "Pass the same --batch-publish setting as the --queue process.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream article text from Gemini and start each image as soon as its first 100 words exist.")
+    parser.add_argument('--batch-publish', action='store_true',
+                        help="Publish all posts at the end in batched Basehub mutations instead of one request each.")
+    parser.add_argument('--max-requests', type=int, default=RUN_BUDGET.limits["requests"],
+                        help="Stop starting new work after this many paid API requests (default: RUN_MAX_REQUESTS).")
+    parser.add_argument('--max-tokens', type=int, default=RUN_BUDGET.limits["tokens"],
+                        help="Stop starting new work after this many estimated Gemini tokens (default: RUN_MAX_TOKENS).")
+    parser.add_argument('--max-images', type=int, default=RUN_BUDGET.limits["images"],
+                        help="Stop starting new work after this many DALL-E images (default: RUN_MAX_IMAGES).")
+    parser.add_argument('--llm-cache', default=LLM_CACHE_DIR, metavar='DIR',
+                        help="Cache Gemini responses on disk in DIR (default: LLM_CACHE_DIR, disabled if unset).")
+    parser.add_argument('--dedup-threshold', type=float, default=TITLE_DEDUP_THRESHOLD,
+                        help="Drop new titles at least this similar (0-1) to an existing one; 0 disables (default: TITLE_DEDUP_THRESHOLD).")
+    parser.add_argument('--full-sync', action='store_true',
+                        help="Re-read every Basehub post into the local index instead of only recent changes.")
+    parser.add_argument('--hedge', action='store_true', default=HEDGER.enabled,
+                        help="Send one duplicate of Gemini calls and DALL-E renders that run past their kind's p95 "
+                             "latency, capped at HEDGE_MAX_RATE of calls (default: HEDGE_REQUESTS or off).")
+    parser.add_argument('--log-level', default=LOG_LEVEL, type=str.upper,
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="Logging verbosity; DEBUG includes raw API responses (default: LOG_LEVEL or INFO).")
+    parser.add_argument('--metrics-jsonl', default=METRICS_JSONL, metavar='PATH',
+                        help="Append one JSON record per timed operation here (default: metrics.jsonl in the run directory).")
+    parser.add_argument('--metrics-textfile', default=METRICS_TEXTFILE, metavar='PATH',
+                        help="Keep Prometheus metrics in this textfile (default: metrics.prom in the run directory).")
+    args = parser.parse_args()
+    if args.queue and args.worker:
+        parser.error("--queue starts a run that --worker processes join; pass only one of them.")
+    return args
+
+# ==============================================================================
+# 5. MAIN EXECUTION
 # ==============================================================================
 
 if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(stream=sys.stdout, level=args.log_level, format='%(message)s')
+    warn_unavailable_image_formats()
+    HEDGER.enabled = args.hedge
+    RUN_BUDGET = RunBudget(max_requests=args.max_requests, max_tokens=args.max_tokens, max_images=args.max_images)
+
     website_context = """
     Build Your Own Our Story Blog Pricing Log In Get Started Your Marketing on Autopilot We run your marketing to prove whether digital can actually drive leads, before you waste time or budget. Get Started Start Self-Serve › Hero image Video Only have a couple of minutes? Watch this
     How It Works How AgentWeb Runs Your Marketing From kickoff to launch, here's how we drive growth without making you manage a team.
@@ -542,60 +2413,151 @@ if __name__ == "__main__":
     Is AgentWeb Right for You? We built AgentWeb for founders who want traction without the overhead. If you’re not sure which path fits, here’s a quick guide.
     ✅ You’re a great fit if… You want to grow without managing a team, a stack, or a mess of freelancers. You’re pre-seed to Series A and focused on building product You want campaigns shipped weekly, not strategy decks You’ve tried doing it yourself but need more consistency You want to validate whether digital can actually work for your business You want marketing to move faster than hiring allows Get Started ➡️ You might be better off with our platform if… You want to run things yourself and just need the tools to do it faster. You prefer hands-on control and like building workflows You already have a marketing team or internal execution support You’re an agency, consultant, or operator managing multiple brands You want access to specific campaign templates, not full service You’re exploring AI agents to run parts of your GTM stack Start Self-Serve
     """
+    if IMAGE_CACHE_DIR:
+        image_cache = DiskCache(IMAGE_CACHE_DIR)
+
+    llm_cache = None
+    if args.llm_cache:
+        llm_cache = DiskCache(args.llm_cache, max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024,
+                              ttl_seconds=LLM_CACHE_TTL_HOURS * 3600 or None)
+        logger.info(f"🗄️  Caching Gemini responses in '{args.llm_cache}'.")
+
     try:
-        ai_client = GeminiAI(api_key=GEMINI_API_KEY)
+        ai_client = GeminiAI(api_key=GEMINI_API_KEY, cache=llm_cache)
     except ValueError as e:
-        print(f"❌ {e}")
-        exit()
-
-    blog_titles = ai_client.generate_blog_topics(website_context, num_topics=100)
-    if not blog_titles:
-        print("❌ Could not generate blog titles. Aborting.")
+        logger.error(f"❌ {e}")
         exit()
 
-    print(f"✅ Successfully generated {len(blog_titles)} blog titles. Starting article generation...")
-
-    start_date = datetime.now()
-    generated_articles = []
-
-    for i, title in enumerate(blog_titles):
-        print(f"--- Generating article {i+1}/{len(blog_titles)}: '{title}' ---")
+    if BASEHUB_TOKEN and args.worker:
+        # The --queue process syncs the index; workers only read their local copy.
+        basehub_index = BasehubIndex(BASEHUB_INDEX_PATH)
+    elif BASEHUB_TOKEN:
+        basehub_index = BasehubIndex(BASEHUB_INDEX_PATH)
         try:
-            # Pass the ai_client and title to the generation function
-            article_title, description, article_content, image_url, image_filename, slug = generate_full_article_and_image(ai_client, title)
-
-            if article_title and article_content:
-                generated_articles.append({"title": article_title, "slug": slug})
-                print(f"✅ Successfully generated and saved article for '{title}'.")
-                publish_date = start_date - timedelta(days=i)
-                post_article_to_basehub(article_title, description, article_content, image_url, image_filename, publish_date)
-            else:
-                print(f"⚠️ Failed to generate article for '{title}'. Skipping.")
-        except TypeError:
-            print(f"⚠️ An error occurred during generation for '{title}'. Skipping.")
-        except Exception as e:
-            print(f"❌ An unexpected error occurred for title '{title}': {e}. Skipping.")
-
-    print("\\n✅ Bulk content generation complete.")
-    print("\\n🏛️  Now generating pillar pages...")
-
-    pillar_page_titles = [
-        "The Founder's Complete Guide to Go-To-Market Strategy",
-        "AI-Powered Marketing: The Ultimate Playbook for Startups",
-        "From Zero to Hero: A Founder's Guide to Building a Powerful Personal Brand",
-        "The Scrappy Startup's Guide to SEO and Content Marketing",
-        "The Art of the Weekly Marketing Sprint: A System for Consistent Growth"
-    ]
-
-    # Split the generated articles into chunks for each pillar page
-    chunk_size = len(generated_articles) // len(pillar_page_titles)
-    article_chunks = [generated_articles[i:i + chunk_size] for i in range(0, len(generated_articles), chunk_size)]
+            sync = basehub_index.sync(BASEHUB_API_URL, BASEHUB_TOKEN, page_size=BASEHUB_SYNC_PAGE_SIZE,
+                                      full=args.full_sync, limiter=RATE_LIMITERS['basehub'])
+            logger.info(f"🔄 Synced Basehub index: {len(basehub_index)} posts ({sync['changed']} changed, "
+                  f"{sync['removed']} removed, {sync['pages']} page(s) in {sync['seconds']}s).")
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"⚠️ Could not sync the Basehub index, using the local copy as is: {e}")
+
+    title_batches = None # Only set for --keywords runs, whose titles are written while articles are generated
+    if args.worker:
+        journal = (RunJournal(args.run_dir, RUNS_SHARED_FS) if args.run_dir
+                   else RunJournal.latest(RUNS_DIR, RUNS_SHARED_FS))
+        if not journal or not journal.topics():
+            logger.error("❌ No run journal found to work on. Aborting.")
+            exit()
+        blog_titles = journal.topics()
+        start_date = journal.start_date()
+    elif args.resume:
+        journal = (RunJournal(args.run_dir, RUNS_SHARED_FS) if args.run_dir
+                   else RunJournal.latest(RUNS_DIR, RUNS_SHARED_FS))
+        if not journal or not (journal.topics() or journal.keywords()):
+            logger.error("❌ No run journal found to resume. Aborting.")
+            exit()
+        blog_titles = journal.topics()
+        start_date = journal.start_date()
+        logger.info(f"🔁 Resuming run in '{journal.run_dir}': {journal.summary()}")
+        keyword_run = journal.keywords()
+        if keyword_run and not keyword_run["done"]:
+            # Keywords past the ones already written are read on from the same file, which must not have changed.
+            try:
+                keyword_source = open_keyword_source(keyword_run["path"])
+            except (OSError, ValueError) as e:
+                logger.error(f"❌ This run still has keywords to write titles for, but its keyword file "
+                             f"cannot be read: {e}")
+                exit()
+            logger.info(f"🔑 Reading on from keyword {keyword_run['used'] + 1} of '{keyword_run['path']}'.")
+            args.keyword_limit = keyword_run["limit"]
+            title_batches = journal_keyword_titles(journal, keyword_titles(
+                ai_client, keyword_source, website_context, keyword_run["limit"], keyword_run["dedup_threshold"],
+                skip=keyword_run["used"], known_titles=blog_titles))
+    elif args.keywords:
+        try:
+            keyword_source = open_keyword_source(args.keywords)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Cannot read the keyword file: {e}")
+            exit()
+        start_date = datetime.now()
+        journal = RunJournal.create(RUNS_DIR, RUNS_SHARED_FS)
+        journal.start([], start_date, keywords={"path": os.path.abspath(args.keywords), "limit": args.keyword_limit,
+                                                "dedup_threshold": args.dedup_threshold})
+        logger.info(f"📒 Journaling run to '{journal.run_dir}' (continue later with --resume).")
+        title_batches = journal_keyword_titles(journal, keyword_titles(
+            ai_client, keyword_source, website_context, args.keyword_limit, args.dedup_threshold))
+        blog_titles = journal.topics()
+    else:
+        blog_titles = ai_client.generate_blog_topics(website_context, num_topics=100)
+        if not blog_titles:
+            logger.error("❌ Could not generate blog titles. Aborting.")
+            exit()
+
+        if args.dedup_threshold > 0:
+            blog_titles = drop_duplicate_titles(blog_titles, args.dedup_threshold)
+            if not blog_titles:
+                logger.error("❌ Every generated title duplicates existing content. Aborting.")
+                exit()
+
+        logger.info(f"✅ Successfully generated {len(blog_titles)} blog titles. Starting article generation...")
+
+        start_date = datetime.now()
+        journal = RunJournal.create(RUNS_DIR, RUNS_SHARED_FS)
+        journal.start(blog_titles, start_date)
+        logger.info(f"📒 Journaling run to '{journal.run_dir}' (continue later with --resume).")
+
+    if title_batches is not None and args.queue:
+        # Workers stop once the queue is drained, so it is filled with every title before any article starts.
+        for _ in title_batches:
+            pass
+        title_batches = None
+        blog_titles = journal.topics()
+        if not blog_titles:
+            logger.error("❌ Could not generate titles from the keyword file. Aborting.")
+            exit()
+
+    work_queue = None
+    if args.queue or args.worker:
+        work_queue = WorkQueue(journal.path, lease_seconds=QUEUE_LEASE_SECONDS, max_attempts=QUEUE_MAX_ATTEMPTS)
+
+    # Every worker process keeps its own metrics files in the shared run directory.
+    metrics_name = f"metrics-{work_queue.worker_id}" if args.worker else 'metrics'
+    metrics.configure(
+        jsonl_path=args.metrics_jsonl or os.path.join(journal.run_dir, f'{metrics_name}.jsonl'),
+        prometheus_path=args.metrics_textfile or os.path.join(journal.run_dir, f'{metrics_name}.prom')
+    )
 
-    for i, p_title in enumerate(pillar_page_titles):
-        if i < len(article_chunks):
-            pillar_title, p_desc, p_content, p_img_url, p_img_filename = generate_pillar_page(ai_client, p_title, article_chunks[i])
-            if pillar_title:
-                publish_date = start_date - timedelta(days=len(blog_titles) + i)
-                post_article_to_basehub(pillar_title, p_desc, p_content, p_img_url, p_img_filename, publish_date)
+    if args.worker:
+        logger.info(f"👷 Joining run '{journal.run_dir}' as queue worker {work_queue.worker_id}: {work_queue.counts()}")
+        run_queue_worker(ai_client, journal, work_queue, start_date, len(blog_titles), workers=args.workers,
+                         pipeline=args.pipeline, stage_workers=args.stage_workers,
+                         defer_publish=args.batch_publish, stream=args.stream)
+        logger.info("✅ Work queue drained; pillar pages and batch publishing are left to the --queue process.")
+        variant_pool.shutdown()
+        ai_client.contexts.close()
+        HEDGER.shutdown()
+        logger.info(ai_client.router.format_stats())
+        logger.info(f"💸 Run budget used: {RUN_BUDGET.stats()}")
+        logger.info(metrics.format_summary())
+        metrics.write_prometheus()
+        exit()
 
-    print("\\n✅ Pillar page generation complete.") 
\ No newline at end of file
+    run_content_job(ai_client, journal, start_date, title_batches, total=args.keyword_limit, work_queue=work_queue,
+                    workers=args.workers, pipeline=args.pipeline, stage_workers=args.stage_workers,
+                    defer_publish=args.batch_publish, stream=args.stream)
+
+    if llm_cache:
+        logger.info(f"🗄️  LLM cache: {llm_cache.stats()}")
+    if image_cache:
+        logger.info(f"🗄️  Image cache: {image_cache.stats()}")
+    variant_pool.shutdown()
+    ai_client.contexts.close()
+    HEDGER.shutdown()
+    if HEDGER.enabled:
+        logger.info(f"🪂 Hedged requests: {HEDGER.stats()}")
+    logger.info(ai_client.router.format_stats())
+    logger.info(f"💸 Run budget used: {RUN_BUDGET.stats()}")
+    for name, limiter in RATE_LIMITERS.items():
+        logger.info(f"🐢 {name} rate limiter: {limiter.stats()}")
+    logger.info(metrics.format_summary())
+    metrics.write_prometheus()
@@ -0,0 +1,52 @@
+from basehub_index import BasehubIndex
+
+
+def post(n, modified):
+    return {"_id": f"id-{n}", "_title": f"Post {n}", "_slug": f"post-{n}", "publishedAt": None,
+            "_sys": {"lastModifiedAt": modified}}
+
+
+class FakeBasehub:
+    """Answers fetch_page like Basehub, optionally editing a post after the first page is read."""
+    def __init__(self, posts, edit_after_first_page=None):
+        self.posts = posts
+        self.edit = edit_after_first_page
+        self.pages = 0
+
+    def fetch_page(self, api_url, token, first, before, skip=0, limiter=None):
+        if self.pages == 1 and self.edit:
+            self.edit(self.posts)
+        self.pages += 1
+        ordered = sorted((p for p in self.posts if p["_sys"]["lastModifiedAt"] <= before),
+                         key=lambda p: p["_sys"]["lastModifiedAt"], reverse=True)
+        return ordered[skip:skip + first]
+
+
+def synced(tmp_path, fake, page_size):
+    index = BasehubIndex(str(tmp_path / "index.sqlite"))
+    index.fetch_page = fake.fetch_page
+    index.sync("url", "token", page_size=page_size)
+    return index
+
+
+def test_an_edit_during_the_sync_does_not_hide_a_post(tmp_path):
+    posts = [post(n, f"2026-01-{n + 1:02d}T00:00:00Z") for n in range(10)]
+
+    def edit(posts):
+        posts[0]["_sys"]["lastModifiedAt"] = "2026-02-01T00:00:00Z"
+
+    index = synced(tmp_path, FakeBasehub(posts, edit), page_size=3)
+    assert len(index) == 10
+
+
+def test_posts_sharing_a_timestamp_across_pages_are_all_read(tmp_path):
+    posts = [post(n, "2026-01-01T00:00:00Z") for n in range(7)] + [post(7, "2025-12-31T00:00:00Z")]
+    index = synced(tmp_path, FakeBasehub(posts), page_size=3)
+    assert len(index) == 8
+
+
+def test_posts_are_found_by_normalized_title(tmp_path):
+    index = synced(tmp_path, FakeBasehub([post(1, "2026-01-01T00:00:00Z")]), page_size=3)
+    index.conn.execute("UPDATE posts SET title = 'Why GTM Beats Guesswork!', slug = 'gtm-guesswork'")
+    assert index.get_by_title("why gtm beats guesswork")["slug"] == 'gtm-guesswork'
+    assert index.get_by_title("Why GTM Beats Everything") is None
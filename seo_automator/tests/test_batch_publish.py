@@ -0,0 +1,141 @@
+import json
+from datetime import datetime
+
+import pytest
+import requests
+
+import seo_content_automation as sca
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class FakeBasehub:
+    """
+    Answers batched transaction mutations. Batches whose size is in fail_sizes
+    fail as a whole after their first `landed` posts were created; titles in
+    alias_errors get a per-alias error that many times before they succeed.
+    """
+    def __init__(self, fail_sizes=(), landed=0, alias_errors=None):
+        self.fail_sizes = set(fail_sizes)
+        self.landed = landed
+        self.alias_errors = dict(alias_errors or {})
+        self.calls = []
+        self.created = []
+
+    def post(self, url, json=None, **kwargs):
+        variables = json["variables"]
+        titles = [_title(variables[name]) for name in sorted(variables, key=lambda name: int(name[1:]))]
+        self.calls.append(titles)
+        if len(titles) in self.fail_sizes:
+            self.created.extend(titles[:self.landed])
+            raise requests.exceptions.ReadTimeout("read timed out")
+        data, errors = {}, []
+        for n, title in enumerate(titles):
+            if self.alias_errors.get(title):
+                self.alias_errors[title] -= 1
+                data[f"p{n}"] = None
+                errors.append({"message": "conflict", "path": [f"p{n}"]})
+            else:
+                self.created.append(title)
+                data[f"p{n}"] = f"id-{title}"
+        return FakeResponse({"data": data, "errors": errors or None})
+
+    def exists(self, title):
+        return title in self.created
+
+
+def _title(data):
+    return json.loads(data)["data"]["title"]
+
+
+def make_posts(count):
+    return [{"key": n, "title": f"Post {n}", "description": "d", "content": "body", "image_url": None,
+             "image_filename": None, "published_at": datetime(2026, 1, 1)} for n in range(count)]
+
+
+@pytest.fixture
+def basehub(monkeypatch):
+    def install(**kwargs):
+        fake = FakeBasehub(**kwargs)
+        monkeypatch.setattr(sca, 'BASEHUB_TOKEN', 'token')
+        monkeypatch.setattr(sca, 'basehub_index', None)
+        monkeypatch.setattr(sca.http_client, 'post', fake.post)
+        monkeypatch.setattr(sca, 'basehub_post_exists', fake.exists)
+        return fake
+    return install
+
+
+def test_one_batch_carries_every_post(basehub):
+    fake = basehub()
+    results = sca.post_articles_to_basehub_batch(make_posts(3))
+    assert fake.calls == [["Post 0", "Post 1", "Post 2"]]
+    assert results[1] == {"ok": True, "basehub_id": "id-Post 1", "error": None}
+
+
+def test_failed_batch_is_split_in_half_and_retried(basehub):
+    fake = basehub(fail_sizes={4})
+    results = sca.post_articles_to_basehub_batch(make_posts(4))
+    assert fake.calls == [["Post 0", "Post 1", "Post 2", "Post 3"], ["Post 0", "Post 1"], ["Post 2", "Post 3"]]
+    assert all(result["ok"] for result in results.values())
+    assert sorted(fake.created) == ["Post 0", "Post 1", "Post 2", "Post 3"]
+
+
+def test_posts_that_landed_before_the_failure_are_not_resent(basehub):
+    fake = basehub(fail_sizes={4}, landed=2)
+    results = sca.post_articles_to_basehub_batch(make_posts(4))
+    assert fake.calls[1:] == [["Post 2"], ["Post 3"]]
+    assert sorted(fake.created) == ["Post 0", "Post 1", "Post 2", "Post 3"]
+    assert results[0] == {"ok": True, "basehub_id": None, "error": None}
+    assert results[3]["basehub_id"] == "id-Post 3"
+
+
+def test_a_post_that_always_fails_the_batch_gives_up_alone(basehub):
+    fake = basehub(fail_sizes={1, 2})
+    results = sca.post_articles_to_basehub_batch(make_posts(2))
+    assert fake.calls == [["Post 0", "Post 1"], ["Post 0"], ["Post 1"]]
+    assert results[0]["ok"] is False
+    assert "read timed out" in results[0]["error"]
+
+
+def test_alias_error_is_retried_once_on_its_own(basehub):
+    fake = basehub(alias_errors={"Post 1": 1})
+    results = sca.post_articles_to_basehub_batch(make_posts(3))
+    assert fake.calls == [["Post 0", "Post 1", "Post 2"], ["Post 1"]]
+    assert results[1] == {"ok": True, "basehub_id": "id-Post 1", "error": None}
+    assert fake.created.count("Post 1") == 1
+
+
+def test_alias_error_twice_is_reported(basehub):
+    fake = basehub(alias_errors={"Post 1": 2})
+    results = sca.post_articles_to_basehub_batch(make_posts(3))
+    assert fake.calls == [["Post 0", "Post 1", "Post 2"], ["Post 1"]]
+    assert results[1] == {"ok": False, "basehub_id": None, "error": "conflict"}
+    assert results[0]["ok"] and results[2]["ok"]
+
+
+def test_item_cap_splits_batches(basehub):
+    fake = basehub()
+    sca.post_articles_to_basehub_batch(make_posts(5), max_items=2)
+    assert [len(call) for call in fake.calls] == [2, 2, 1]
+
+
+def test_byte_cap_splits_batches():
+    posts = [{"key": n, "data": "x" * 100} for n in range(5)]
+    batches = sca.chunk_basehub_batches(posts, max_items=10, max_bytes=250)
+    assert [[post["key"] for post in batch] for batch in batches] == [[0, 1], [2, 3], [4]]
+
+
+def test_post_over_the_byte_cap_goes_alone():
+    posts = [{"key": 0, "data": "x" * 10}, {"key": 1, "data": "x" * 500}, {"key": 2, "data": "x" * 10}]
+    batches = sca.chunk_basehub_batches(posts, max_items=10, max_bytes=100)
+    assert [[post["key"] for post in batch] for batch in batches] == [[0], [1], [2]]
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import context_cache
+import seo_content_automation as sca
+from context_cache import ContextCache
+
+
+class FakeCache:
+    def __init__(self, name):
+        self.name = name
+        self.deleted = False
+
+    def update(self, ttl):
+        pass
+
+    def delete(self):
+        self.deleted = True
+
+
+def fake_caching(monkeypatch, delay=0.0):
+    created = []
+
+    def create(model, display_name, system_instruction, ttl):
+        time.sleep(delay)
+        cache = FakeCache(display_name)
+        created.append(cache)
+        return cache
+
+    monkeypatch.setattr(context_cache.caching.CachedContent, 'create', create)
+    monkeypatch.setattr(context_cache.genai.GenerativeModel, 'from_cached_content', lambda cache: ('model', cache.name))
+    return created
+
+
+def test_concurrent_callers_share_one_cache(monkeypatch):
+    created = fake_caching(monkeypatch, delay=0.2)
+    contexts = ContextCache(min_tokens=1)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(contexts.model_for('gemini', 'x' * 40, 'article')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert results == [('model', 'seo-automator-article')] * 8
+
+
+def test_creating_one_cache_does_not_block_another(monkeypatch):
+    fake_caching(monkeypatch, delay=0.5)
+    contexts = ContextCache(min_tokens=5)
+    slow = threading.Thread(target=contexts.model_for, args=('gemini', 'a' * 40, 'article'))
+    slow.start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    assert contexts.model_for('gemini', 'short', 'topics') is None # Under the minimum: inline, no network call
+    assert time.monotonic() - started < 0.3
+    slow.join()
+
+
+def test_short_preambles_are_sent_inline(monkeypatch):
+    created = fake_caching(monkeypatch)
+    assert ContextCache(min_tokens=4096).model_for('gemini', 'x' * 400) is None
+    assert created == []
+
+
+def test_close_deletes_created_caches(monkeypatch):
+    created = fake_caching(monkeypatch)
+    contexts = ContextCache(min_tokens=1)
+    contexts.model_for('gemini', 'x' * 40)
+    contexts.discard('gemini', 'x' * 40)
+    assert created[0].deleted
+    assert contexts.model_for('gemini', 'x' * 40) is None
+    contexts.model_for('gemini', 'y' * 40)
+    contexts.close()
+    assert all(cache.deleted for cache in created)
+
+
+def test_minimum_size_depends_on_the_model(monkeypatch):
+    created = fake_caching(monkeypatch)
+    contexts = ContextCache()
+    preamble = 'x' * 4400 # ~1100 tokens
+    assert contexts.model_for('gemini-2.5-flash', preamble, 'topics') == ('model', 'seo-automator-topics')
+    assert contexts.model_for('gemini-2.5-pro', preamble, 'article') is None
+    assert contexts.model_for('some-new-model', preamble, 'article') is None
+    assert len(created) == 1
+
+
+def test_title_calls_share_one_preamble():
+    ai = sca.GeminiAI.__new__(sca.GeminiAI)
+    contexts = []
+    ai.generate_json = lambda prompt, context=None, task='article': contexts.append((task, context)) or (None, '')
+    ai.generate_blog_topics("Our copy.", num_topics=5)
+    ai.generate_keyword_titles("Our copy.", ["seo"])
+    assert contexts == [('topics', sca.title_preamble("Our copy."))] * 2
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import metrics
+from hedging import Hedger, RollingHistogram
+
+
+def warmed_hedger(kind, seconds=0.01, **options):
+    hedger = Hedger(enabled=True, max_rate=1.0, min_samples=5, **options)
+    for _ in range(20):
+        hedger.record(kind, seconds)
+    return hedger
+
+
+def test_histogram_percentiles_follow_the_window():
+    histogram = RollingHistogram(window=100)
+    for n in range(1, 101):
+        histogram.add(n / 100)
+    assert 0.94 <= histogram.percentile(0.95) <= 1.0
+    for _ in range(100):
+        histogram.add(5.0)
+    assert histogram.percentile(0.5) >= 5.0
+
+
+def test_a_straggler_is_hedged_and_the_first_answer_wins():
+    hedger = warmed_hedger('test')
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return 'slow'
+        return 'fast'
+
+    assert hedger.call('test', fn) == 'fast'
+    assert hedger.stats()["hedge_wins"] == 1
+    hedger.shutdown()
+
+
+def test_the_losing_call_keeps_its_slot_until_it_ends():
+    hedger = warmed_hedger('test')
+    limit = threading.BoundedSemaphore(2)
+    release_straggler = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            release_straggler.wait(2)
+            return 'slow'
+        return 'fast'
+
+    with limit:
+        assert hedger.call('test', fn, limit=limit) == 'fast'
+    # The caller released its slot, but the straggler still runs on the hedge's.
+    assert limit.acquire(blocking=False)
+    assert not limit.acquire(blocking=False)
+    release_straggler.set()
+    time.sleep(0.1)
+    assert limit.acquire(blocking=False)
+    hedger.shutdown()
+
+
+def test_no_hedge_without_a_free_slot():
+    hedger = warmed_hedger('test')
+    limit = threading.BoundedSemaphore(1)
+    with limit:
+        assert hedger.call('test', lambda: time.sleep(0.2) or 'only', limit=limit) == 'only'
+    assert hedger.stats()["hedged"] == 0
+    assert hedger.stats()["vetoed"] == 1
+    hedger.shutdown()
+
+
+def test_counters_added_on_pool_threads_land_on_the_callers_span():
+    hedger = warmed_hedger('test', seconds=1.0)
+    with metrics.span('test.call') as span:
+        hedger.call('test', lambda: metrics.add('retries', 2))
+    assert span["retries"] == 2
+    hedger.shutdown()
@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import http_client
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """Plays back a script of responses and exceptions, one per request."""
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        outcome = self.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class FakeLimiter:
+    def __init__(self):
+        self.events = []
+
+    def acquire(self):
+        self.events.append('acquire')
+
+    def on_throttled(self, retry_after=None):
+        self.events.append(('throttled', retry_after))
+
+    def on_success(self):
+        self.events.append('success')
+
+
+@pytest.fixture
+def session(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http_client, 'time', SimpleNamespace(sleep=sleeps.append))
+
+    def install(*script):
+        fake = FakeSession(*script)
+        fake.sleeps = sleeps
+        monkeypatch.setattr(http_client, '_session', fake)
+        return fake
+    return install
+
+
+def test_retry_after_is_honoured(session):
+    fake = session(FakeResponse(503, {'Retry-After': '7'}), FakeResponse(200))
+    assert http_client.get('https://api/x').status_code == 200
+    assert fake.sleeps == [7.0]
+
+
+def test_retry_after_is_capped(session, monkeypatch):
+    monkeypatch.setattr(http_client, 'HTTP_BACKOFF_MAX', 30.0)
+    fake = session(FakeResponse(429, {'Retry-After': '3600'}), FakeResponse(200))
+    http_client.get('https://api/x')
+    assert fake.sleeps == [30.0]
+
+
+def test_retry_after_as_http_date():
+    response = FakeResponse(429, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+    assert http_client.retry_after_seconds(response) == 0.0
+    assert http_client.retry_after_seconds(FakeResponse(429, {'Retry-After': 'soon'})) is None
+
+
+def test_post_is_not_resent_after_a_read_timeout(session):
+    fake = session(requests.exceptions.ReadTimeout("read timed out"), FakeResponse(200))
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        http_client.post('https://api/x')
+    assert len(fake.calls) == 1
+
+
+def test_post_is_not_resent_after_a_5xx(session):
+    fake = session(FakeResponse(502), FakeResponse(200))
+    assert http_client.post('https://api/x').status_code == 502
+    assert len(fake.calls) == 1
+
+
+def test_post_is_resent_when_it_never_reached_the_server(session):
+    fake = session(requests.exceptions.ConnectTimeout("connect timed out"), FakeResponse(429), FakeResponse(201))
+    assert http_client.post('https://api/x').status_code == 201
+    assert len(fake.calls) == 3
+
+
+def test_idempotent_post_is_resent_after_a_5xx(session):
+    fake = session(FakeResponse(500), FakeResponse(200))
+    assert http_client.post('https://api/x', idempotent=True).status_code == 200
+    assert len(fake.calls) == 2
+
+
+def test_already_applied_blocks_a_duplicate(session):
+    fake = session(requests.exceptions.ReadTimeout("read timed out"), FakeResponse(200))
+    assert http_client.post('https://api/x', already_applied=lambda: True) is None
+    assert len(fake.calls) == 1
+
+
+def test_already_applied_allows_a_resend(session):
+    checks = []
+    fake = session(FakeResponse(503), FakeResponse(200))
+    response = http_client.post('https://api/x', already_applied=lambda: checks.append(1) or False)
+    assert response.status_code == 200
+    assert len(fake.calls) == 2
+    assert checks == [1]
+
+
+def test_retries_run_out(session):
+    fake = session(*[FakeResponse(503) for _ in range(3)])
+    assert http_client.get('https://api/x', retries=2).status_code == 503
+    assert len(fake.calls) == 3
+    assert len(fake.sleeps) == 2
+
+
+def test_429_and_success_are_reported_to_the_limiter(session):
+    session(FakeResponse(429, {'Retry-After': '2'}), FakeResponse(200))
+    limiter = FakeLimiter()
+    http_client.post('https://api/x', limiter=limiter)
+    assert limiter.events == ['acquire', ('throttled', 2.0), 'acquire', 'success']
+
+
+def test_5xx_is_not_reported_as_throttling(session):
+    session(FakeResponse(503), FakeResponse(200))
+    limiter = FakeLimiter()
+    http_client.get('https://api/x', limiter=limiter)
+    assert limiter.events == ['acquire', 'acquire', 'success']
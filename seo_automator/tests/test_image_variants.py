@@ -0,0 +1,34 @@
+import logging
+
+import pytest
+
+import image_variants
+import seo_content_automation as sca
+
+
+@pytest.mark.skipif(image_variants.Image is None, reason="needs Pillow")
+def test_unavailable_formats_names_unknown_formats():
+    assert image_variants.unavailable_formats(['png', 'gif']) == {'gif': "not a supported variant format"}
+
+
+def test_unavailable_formats_without_pillow(monkeypatch):
+    monkeypatch.setattr(image_variants, 'Image', None)
+    assert image_variants.unavailable_formats(['webp']) == {'webp': "Pillow is not installed"}
+    assert image_variants.available_formats(['webp']) == []
+
+
+def test_startup_warning_without_pillow(monkeypatch, caplog):
+    monkeypatch.setattr(image_variants, 'Image', None)
+    monkeypatch.setattr(sca, 'IMAGE_VARIANT_FORMATS', ['webp', 'avif'])
+    with caplog.at_level(logging.WARNING):
+        sca.warn_unavailable_image_formats()
+    assert "asks for webp, but Pillow is not installed" in caplog.text
+    assert "asks for avif" in caplog.text
+    assert "original PNG" in caplog.text
+
+
+def test_no_startup_warning_when_variants_are_off(monkeypatch, caplog):
+    monkeypatch.setattr(sca, 'IMAGE_VARIANT_FORMATS', [])
+    with caplog.at_level(logging.WARNING):
+        sca.warn_unavailable_image_formats()
+    assert caplog.text == ""
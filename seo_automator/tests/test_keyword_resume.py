@@ -0,0 +1,118 @@
+import re
+from datetime import datetime
+from types import SimpleNamespace
+
+import seo_content_automation as sca
+from keyword_source import KeywordSource
+from run_journal import RunJournal
+from title_dedup import TitleIndex
+
+
+class FakeAI:
+    def generate_keyword_titles(self, business_context, keywords):
+        return [f"All About {keyword.title()}" for keyword in keywords]
+
+
+def keyword_file(tmp_path, count):
+    path = tmp_path / "keywords.csv"
+    path.write_text("Keyword,Volume\n" + "".join(f"keyword {n},{1000 - n}\n" for n in range(count)))
+    return str(path)
+
+
+def test_an_interrupted_keyword_run_reads_on_where_it_stopped(monkeypatch, tmp_path):
+    monkeypatch.setattr(sca, 'KEYWORD_BATCH_SIZE', 4)
+    path = keyword_file(tmp_path, 20)
+    journal = RunJournal(str(tmp_path))
+    journal.start([], datetime(2026, 1, 1), keywords={"path": path, "limit": 10, "dedup_threshold": 0})
+
+    # The first run is stopped after one batch.
+    batches = sca.journal_keyword_titles(journal, sca.keyword_titles(FakeAI(), KeywordSource(path), "", 10))
+    first = [next(batches) for _ in range(4)]
+    assert [item["title"] for item in first] == [f"All About Keyword {n}" for n in range(4)]
+    assert journal.keywords() == {"path": path, "limit": 10, "dedup_threshold": 0, "used": 4, "done": False}
+
+    keyword_run = journal.keywords()
+    rest = list(sca.journal_keyword_titles(journal, sca.keyword_titles(
+        FakeAI(), KeywordSource(path), "", keyword_run["limit"], skip=keyword_run["used"])))
+    assert [item["index"] for item in rest] == list(range(4, 10))
+    assert journal.topics() == [f"All About Keyword {n}" for n in range(10)]
+    assert journal.keywords()["done"]
+
+
+class FlakyAI:
+    """Has no title for the keywords in `fail`, even when they are asked for alone."""
+    def __init__(self, fail):
+        self.fail = set(fail)
+
+    def generate_keyword_titles(self, business_context, keywords):
+        return [None if keyword in self.fail else f"All About {keyword.title()}" for keyword in keywords]
+
+
+def test_keywords_without_a_title_are_not_marked_used(monkeypatch, tmp_path):
+    monkeypatch.setattr(sca, 'KEYWORD_BATCH_SIZE', 4)
+    path = keyword_file(tmp_path, 10)
+    journal = RunJournal(str(tmp_path))
+    journal.start([], datetime(2026, 1, 1), keywords={"path": path, "limit": 10, "dedup_threshold": 0})
+
+    items = list(sca.journal_keyword_titles(journal, sca.keyword_titles(
+        FlakyAI({"keyword 6"}), KeywordSource(path), "", 10)))
+    # Keyword 7 got a title, but the feed stops at keyword 6 so a resume can read on from it.
+    assert [item["title"] for item in items] == [f"All About Keyword {n}" for n in range(6)]
+    assert journal.keywords()["used"] == 6
+    assert not journal.keywords()["done"]
+
+    rest = list(sca.journal_keyword_titles(journal, sca.keyword_titles(
+        FakeAI(), KeywordSource(path), "", 10, skip=journal.keywords()["used"])))
+    assert [item["title"] for item in rest] == [f"All About Keyword {n}" for n in range(6, 10)]
+    assert journal.keywords()["done"]
+
+
+def test_a_failed_first_batch_uses_no_keywords(monkeypatch, tmp_path):
+    monkeypatch.setattr(sca, 'KEYWORD_BATCH_SIZE', 4)
+    path = keyword_file(tmp_path, 10)
+    journal = RunJournal(str(tmp_path))
+    journal.start([], datetime(2026, 1, 1), keywords={"path": path, "limit": 10, "dedup_threshold": 0})
+    items = list(sca.journal_keyword_titles(journal, sca.keyword_titles(
+        FlakyAI({"keyword 0"}), KeywordSource(path), "", 10)))
+    assert items == []
+    assert journal.keywords()["used"] == 0
+    assert not journal.keywords()["done"]
+
+
+def test_duplicate_titles_still_count_as_used(monkeypatch, tmp_path):
+    monkeypatch.setattr(sca, 'KEYWORD_BATCH_SIZE', 4)
+    monkeypatch.setattr(sca, 'load_title_index', lambda: TitleIndex(str(tmp_path / 'titles.npz')))
+    path = keyword_file(tmp_path, 4)
+    journal = RunJournal(str(tmp_path))
+    journal.start([], datetime(2026, 1, 1), keywords={"path": path, "limit": 4, "dedup_threshold": 0.8})
+    titles = ["Pricing Pages That Convert", "Cold Email Benchmarks", "Hiring Your First Marketer", "SEO for Seed Startups"]
+    ai = SimpleNamespace(generate_keyword_titles=lambda business_context, keywords: titles[:len(keywords)])
+    items = list(sca.journal_keyword_titles(journal, sca.keyword_titles(
+        ai, KeywordSource(path), "", 4, dedup_threshold=0.8, known_titles=["Hiring Your First Marketer"])))
+    assert [item["title"] for item in items] == [titles[0], titles[1], titles[3]]
+    assert journal.keywords()["used"] == 4
+    assert journal.keywords()["done"]
+
+
+def gemini_with_answers(answers):
+    """A GeminiAI whose generate_json replays `answers`, recording the keywords of each call."""
+    ai = sca.GeminiAI.__new__(sca.GeminiAI)
+    ai.calls = []
+
+    def generate_json(prompt, context=None, task='article'):
+        ai.calls.append(re.findall(r'Keyword: (.*)', prompt))
+        return answers.pop(0), ''
+    ai.generate_json = generate_json
+    return ai
+
+
+def test_missing_ids_are_retried_per_keyword():
+    ai = gemini_with_answers([{"titles": {"0": "Title A", "2": "Title C"}}, {"titles": {"0": "Title B"}}])
+    assert ai.generate_keyword_titles("", ["a", "b", "c"]) == ["Title A", "Title B", "Title C"]
+    assert ai.calls == [["a", "b", "c"], ["b"]]
+
+
+def test_failed_batch_falls_back_to_each_keyword():
+    ai = gemini_with_answers([None, {"titles": {"0": "Title A"}}, "not json"])
+    assert ai.generate_keyword_titles("", ["a", "b"]) == ["Title A", None]
+    assert ai.calls == [["a", "b"], ["a"], ["b"]]
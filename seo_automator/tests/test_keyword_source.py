@@ -0,0 +1,66 @@
+import heapq
+
+import numpy as np
+
+import keyword_source
+from keyword_source import BloomFilter, KeywordSource
+
+
+def write_csv(tmp_path, text):
+    path = tmp_path / "keywords.csv"
+    path.write_text(text)
+    return str(path)
+
+
+def test_bloom_filter_reports_each_key_new_once():
+    bloom = BloomFilter(capacity=1000)
+    assert bloom.add_many(["a", "b"]).tolist() == [True, True]
+    assert bloom.add_many(["b", "c"]).tolist() == [False, True]
+    assert bloom.add_many([]).tolist() == []
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=5000)
+    keys = [f"keyword {n}" for n in range(5000)]
+    bloom.add_many(keys)
+    assert not bloom.add_many(keys).any()
+
+
+def test_bloom_filter_false_positives_stay_near_the_error_rate():
+    bloom = BloomFilter(capacity=20_000, error_rate=0.01)
+    bloom.add_many([f"seen {n}" for n in range(20_000)])
+    new = bloom.add_many([f"unseen {n}" for n in range(20_000)])
+    assert np.mean(~new) < 0.02
+
+
+def test_ranked_keywords_come_out_highest_score_first(tmp_path):
+    path = write_csv(tmp_path, "Keyword,Volume\nlow,10\nhigh,1.5K\nmid,\"1,200\"\nrange,1K – 10K\n")
+    assert list(KeywordSource(path).keywords(10)) == ["high", "mid", "range", "low"]
+
+
+def test_top_k_across_chunks_with_duplicates(tmp_path):
+    rows = "".join(f"keyword {n},{n}\n" for n in range(100)) + "Keyword 5!,500\n"
+    path = write_csv(tmp_path, "Keyword,Volume\n" + rows)
+    source = KeywordSource(path, chunk_rows=7)
+    # Keyword 5's later, higher-scored spelling is a duplicate, so the first sighting's score stands.
+    assert list(source.keywords(3)) == ["keyword 99", "keyword 98", "keyword 97"]
+    assert source.stats == {"rows": 101, "blank": 0, "duplicates": 1, "unique": 100}
+
+
+def test_ties_keep_the_earlier_row(tmp_path):
+    path = write_csv(tmp_path, "Keyword,Volume\nfirst,5\nsecond,5\nthird,5\n")
+    assert list(KeywordSource(path).keywords(2)) == ["first", "second"]
+
+
+def test_heap_never_grows_past_the_limit(tmp_path, monkeypatch):
+    path = write_csv(tmp_path, "Keyword,Volume\n" + "".join(f"k{n},{n % 17}\n" for n in range(500)))
+    sizes = []
+    push = heapq.heappush
+    monkeypatch.setattr(keyword_source.heapq, 'heappush', lambda heap, entry: (push(heap, entry), sizes.append(len(heap))))
+    assert len(list(KeywordSource(path).keywords(5))) == 5
+    assert max(sizes) == 5
+
+
+def test_unranked_keywords_stream_in_file_order(tmp_path):
+    path = write_csv(tmp_path, "Query\nb\na\nB\nc\n")
+    assert list(KeywordSource(path, chunk_rows=2).keywords(10)) == ["b", "a", "c"]
@@ -0,0 +1,50 @@
+import pytest
+
+from llm_json import (JsonStringFieldStream, TruncatedJsonError, is_truncated, merge_continuation,
+                      parse_json_response, salvage_string_field)
+
+
+def test_parses_fenced_json_with_prose_around_it():
+    text = 'Here you go:\n```json\n{"title": "GTM", "body": "line one\nline two"}\n```\nEnjoy!'
+    assert parse_json_response(text) == {"title": "GTM", "body": "line one\nline two"}
+
+
+def test_a_stray_brace_in_the_prose_does_not_hide_the_object():
+    assert parse_json_response('Use {braces} like {this. ```json\n{"a": {"b": 1}}\n```') == {"a": {"b": 1}}
+
+
+def test_a_stray_brace_before_a_cut_off_object_reports_truncation():
+    with pytest.raises(TruncatedJsonError):
+        parse_json_response('Mind the {gap. {"title": "GTM", "body": "cut off he')
+
+
+def test_a_cut_off_object_is_not_mistaken_for_its_nested_parts():
+    with pytest.raises(TruncatedJsonError):
+        parse_json_response('{"outline": {"h2": ["Intro"]}, "body": "cut off he')
+
+
+def test_no_object_at_all_is_a_plain_value_error():
+    with pytest.raises(ValueError) as raised:
+        parse_json_response('{nope} and {also nope}')
+    assert not isinstance(raised.value, TruncatedJsonError)
+
+
+def test_is_truncated_ignores_brackets_inside_strings():
+    assert not is_truncated('{"a": "}{ ]["}', 0)
+    assert is_truncated('{"a": "}{ ][', 0)
+
+
+def test_string_field_stream_decodes_escapes_split_across_chunks():
+    stream = JsonStringFieldStream("body")
+    chunks = ['{"title": "x", "bo', 'dy": "Hello\\', 'nWorld \\u00', 'e9", "other": 1}']
+    assert ''.join(stream.feed(chunk) for chunk in chunks) == "Hello\nWorld é"
+
+
+def test_salvages_a_field_from_a_cut_off_response():
+    assert salvage_string_field('{"description": "Short one", "body": "Cut', 'description') == "Short one"
+
+
+def test_merge_continuation_drops_the_repeated_overlap_and_fence():
+    text = '{"body": "The quick brown fox jumps over the lazy'
+    continuation = '```json\nbrown fox jumps over the lazy dog"}'
+    assert merge_continuation(text, continuation) == '{"body": "The quick brown fox jumps over the lazy dog"}'
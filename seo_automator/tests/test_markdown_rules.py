@@ -0,0 +1,43 @@
+from markdown_rules import CTA, count_words, fix_markdown, insert_sections, outline
+
+
+def test_heading_labels_are_stripped_and_levels_kept_to_h2_h3():
+    fixed, report = fix_markdown("# H2: Why Now\n\n**H3:** The Cost\n\n#### H2 - Steps\n\nBody text.")
+    assert outline(fixed) == ["## Why Now", "### The Cost", "### Steps"]
+    assert report["fixes"]["heading labels stripped"] == 3
+
+
+def test_words_that_merely_start_like_a_label_are_kept():
+    fixed, report = fix_markdown("## H1-B Visa Sponsorship\n\n## H2O Bottles\n\n## H3.0 Release Notes\n\nBody text.")
+    assert outline(fixed) == ["## H1-B Visa Sponsorship", "## H2O Bottles", "## H3.0 Release Notes"]
+    assert 'heading labels stripped' not in report["fixes"]
+
+
+def test_one_homepage_link_and_the_cta_end_the_article():
+    text = "Intro with [AgentWeb](https://agentweb.pro) and [again](https://www.agentweb.pro/).\n\nMore."
+    fixed, report = fix_markdown(text)
+    assert fixed.count("agentweb.pro") == 1
+    assert fixed.endswith(CTA)
+    assert report["fixes"]["CTA added"] == 1
+
+
+def test_fenced_code_is_left_alone():
+    text = "```\n# H2: not a heading\n```\n\nBody."
+    assert "# H2: not a heading" in fix_markdown(text)[0]
+
+
+def test_short_articles_report_how_many_words_are_missing():
+    fixed, report = fix_markdown("Just a few words.", min_words=500)
+    assert report["words"] == count_words(fixed)
+    assert report["short_by"] == 500 - report["words"]
+
+
+def test_count_words_skips_markup_tokens():
+    assert count_words("## A heading\n\n- one item — done") == 5
+
+
+def test_sections_go_before_the_conclusion():
+    markdown = f"## Intro\n\nText.\n\n## Conclusion\n\nBye.\n\n{CTA}"
+    result = insert_sections(markdown, "```markdown\n## Extra\n\nMore.\n```")
+    assert result.index("## Extra") < result.index("## Conclusion")
+    assert "```" not in result
@@ -0,0 +1,46 @@
+import numpy as np
+
+from pillar_assignment import assign_articles_to_pillars, assign_with_capacity, fill_minimum
+
+PILLARS = [
+    "The Founder's Complete Guide to Go-To-Market Strategy",
+    "AI-Powered Marketing: The Ultimate Playbook for Startups",
+    "The Scrappy Startup's Guide to SEO and Content Marketing",
+    "From Zero to Hero: A Founder's Guide to Building a Powerful Personal Brand",
+    "The Art of the Weekly Marketing Sprint: A System for Consistent Growth",
+]
+
+
+def test_every_article_is_assigned_once():
+    titles = [f"SEO content marketing tactic {n}" for n in range(7)] + [f"GTM strategy step {n}" for n in range(5)]
+    groups = assign_articles_to_pillars(titles, PILLARS)
+    assert sorted(i for group in groups for i in group) == list(range(len(titles)))
+
+
+def test_no_pillar_is_left_empty_when_topics_are_lopsided():
+    # Every title matches the SEO pillar best; the others must still get their share.
+    titles = [f"SEO and content marketing for startups, part {n}" for n in range(12)]
+    groups = assign_articles_to_pillars(titles, PILLARS)
+    assert all(len(group) >= len(titles) // len(PILLARS) for group in groups)
+    assert max(len(group) for group in groups) <= 3 # ceil(12 / 5 * 1.25)
+
+
+def test_fewer_articles_than_pillars_fills_as_many_as_possible():
+    groups = assign_articles_to_pillars(["GTM strategy", "SEO content"], PILLARS)
+    assert sum(len(group) for group in groups) == 2
+
+
+def test_capacity_keeps_the_most_similar_rows():
+    similarity = np.array([[0.9, 0.1], [0.8, 0.2], [0.7, 0.6]])
+    assignment, load = assign_with_capacity(similarity, capacity=2)
+    assert assignment.tolist() == [0, 0, 1]
+    assert load.tolist() == [2, 1]
+
+
+def test_fill_minimum_moves_the_cheapest_row():
+    similarity = np.array([[0.9, 0.0], [0.8, 0.1], [0.5, 0.45]])
+    assignment = np.array([0, 0, 0])
+    load = np.array([3, 0])
+    fill_minimum(similarity, assignment, load, minimum=1)
+    assert assignment.tolist() == [0, 0, 1]
+    assert load.tolist() == [2, 1]
@@ -0,0 +1,51 @@
+import seo_content_automation as sca
+
+LINKED = [
+    {"title": "How to Validate a GTM Channel", "slug": "how-to-validate-a-gtm-channel"},
+    {"title": "Founder-Led LinkedIn in 30 Minutes a Week", "slug": "founder-led-linkedin-in-30-minutes-a-week"},
+]
+
+
+class FakeAI:
+    def __init__(self, body):
+        self.body = body
+        self.prompts = []
+
+    def generate_json(self, prompt, context=None, task='article'):
+        self.prompts.append(prompt)
+        return {"description": "A guide.", "article_body": self.body}, "{}"
+
+    def generate_extra_sections(self, title, outline, short_by):
+        return None
+
+    def generate_image_prompt(self, title, extract):
+        return "An abstract render"
+
+
+def generate(monkeypatch, tmp_path, body):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sca, 'generate_and_upload_image', lambda prompt: (None, None, None))
+    ai = FakeAI(body)
+    result = sca.generate_pillar_page(ai, "The Founder's GTM Guide", LINKED)
+    return ai, result
+
+
+def test_prompt_lists_real_titles_and_slugs(monkeypatch, tmp_path):
+    ai, _ = generate(monkeypatch, tmp_path, "## Intro\n\nSome text.")
+    for article in LINKED:
+        assert f"- [{article['title']}](/{article['slug']})" in ai.prompts[0]
+    assert "[title](/slug)" not in ai.prompts[0]
+
+
+def test_body_links_every_article(monkeypatch, tmp_path):
+    _, (title, description, body, *_) = generate(monkeypatch, tmp_path, "## Intro\n\nSee [this](/how-to-validate-a-gtm-channel).")
+    for article in LINKED:
+        assert f"(/{article['slug']})" in body
+    assert body.count("(/how-to-validate-a-gtm-channel)") == 1
+    written = (tmp_path / "seo_automator" / "generated_content" / "pillar_the-founders-gtm-guide.md").read_text()
+    assert "(/founder-led-linkedin-in-30-minutes-a-week)" in written
+
+
+def test_link_pillar_articles_leaves_complete_bodies_alone():
+    body = "".join(f"[{a['title']}](/{a['slug']})\n" for a in LINKED)
+    assert sca.link_pillar_articles(body, LINKED) == body
@@ -0,0 +1,116 @@
+import pytest
+
+from rate_limiter import AdaptiveRateLimiter, BudgetExceeded, RunBudget, estimate_tokens
+
+
+class FakeClock:
+    """A monotonic clock that only moves when something sleeps on it."""
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def limiter(clock, requests_per_minute=60, **kwargs):
+    return AdaptiveRateLimiter('test', requests_per_minute, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_burst_then_steady_rate():
+    clock = FakeClock()
+    bucket = limiter(clock, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0), pytest.approx(1.0)]
+
+
+def test_429_halves_the_rate_and_empties_the_bucket():
+    clock = FakeClock()
+    bucket = limiter(clock)
+    bucket.on_throttled()
+    assert bucket.rate == pytest.approx(0.5)
+    assert bucket.tokens == 0
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(2.0)]
+    bucket.on_throttled()
+    assert bucket.rate == pytest.approx(0.25)
+
+
+def test_rate_never_drops_below_the_floor():
+    bucket = limiter(FakeClock(), min_requests_per_minute=20)
+    for _ in range(10):
+        bucket.on_throttled()
+    assert bucket.rate * 60 == pytest.approx(20)
+
+
+def test_retry_after_pauses_the_bucket():
+    clock = FakeClock()
+    bucket = limiter(clock)
+    bucket.on_throttled(retry_after=10)
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(10.0)]
+    # The pause refilled the bucket, so the next requests go straight out.
+    bucket.acquire()
+    assert len(clock.sleeps) == 1
+    assert bucket.stats() == {"requests_per_minute": 30.0, "throttled": 1, "waited_seconds": 10.0}
+
+
+def test_successes_recover_the_rate_additively_up_to_the_ceiling():
+    bucket = limiter(FakeClock())
+    bucket.on_throttled()
+    bucket.on_success()
+    assert bucket.rate * 60 == pytest.approx(33)
+    for _ in range(9):
+        bucket.on_success()
+    assert bucket.rate * 60 == pytest.approx(60)
+    bucket.on_success()
+    assert bucket.rate * 60 == pytest.approx(60)
+
+
+def test_budget_reservations_add_up():
+    budget = RunBudget(max_requests=3, max_tokens=100)
+    budget.reserve(requests=1, tokens=60)
+    budget.reserve(requests=1, tokens=40)
+    assert budget.used == {"requests": 2, "tokens": 100, "images": 0}
+    assert not budget.exhausted
+
+
+def test_a_reservation_over_a_limit_is_refused_and_exhausts_the_budget():
+    budget = RunBudget(max_requests=3, max_tokens=100)
+    budget.reserve(requests=1, tokens=90)
+    with pytest.raises(BudgetExceeded, match="tokens"):
+        budget.reserve(requests=1, tokens=20)
+    assert budget.exhausted
+    assert budget.used == {"requests": 1, "tokens": 90, "images": 0}
+    # Calls that do not spend the exhausted resource still go through.
+    budget.reserve(requests=1)
+
+
+def test_unlimited_budget_is_never_exhausted():
+    budget = RunBudget()
+    budget.reserve(requests=1000, tokens=10 ** 9, images=500)
+    budget.record_tokens(10 ** 9)
+    assert not budget.exhausted
+    assert budget.stats() == {"requests": "1000/∞", "tokens": "2000000000/∞", "images": "500/∞"}
+
+
+def test_recorded_tokens_exhaust_the_budget_at_the_limit():
+    budget = RunBudget(max_tokens=100)
+    budget.reserve(tokens=50)
+    budget.record_tokens(49)
+    assert not budget.exhausted
+    budget.record_tokens(1)
+    assert budget.exhausted
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("x" * 400) == 101
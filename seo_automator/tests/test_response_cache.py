@@ -0,0 +1,101 @@
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import response_cache
+from response_cache import DiskCache, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the cache's wall clock with one the test moves by hand."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(response_cache, 'time', SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def stored(cache):
+    with sqlite3.connect(cache.path) as conn:
+        return dict(conn.execute("SELECT key, size FROM entries").fetchall())
+
+
+def test_cache_key_separates_parts():
+    assert cache_key('ab', 'c') != cache_key('a', 'bc')
+    assert cache_key('model', 'prompt') == cache_key('model', 'prompt')
+
+
+def test_least_recently_used_entry_is_evicted_first(tmp_path, clock):
+    cache = DiskCache(str(tmp_path), max_bytes=30)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, 'x' * 10)
+        clock.value += 1
+    assert cache.get('a') == 'x' * 10 # 'a' is now the most recently used
+    clock.value += 1
+    cache.set('d', 'x' * 10)
+    assert set(stored(cache)) == {'a', 'c', 'd'}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_eviction_keeps_the_total_under_max_bytes(tmp_path, clock):
+    cache = DiskCache(str(tmp_path), max_bytes=100)
+    for n in range(20):
+        cache.set(f"k{n}", 'x' * 15)
+        clock.value += 1
+        assert sum(stored(cache).values()) <= 100
+    assert set(stored(cache)) == {f"k{n}" for n in range(14, 20)}
+
+
+def test_an_entry_bigger_than_the_cache_is_still_kept(tmp_path, clock):
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+    cache.set('small', 'x' * 5)
+    cache.set('big', 'x' * 50)
+    assert stored(cache) == {'big': 50}
+
+
+def test_size_counts_utf8_bytes(tmp_path, clock):
+    cache = DiskCache(str(tmp_path))
+    cache.set('emoji', '🚀🚀')
+    assert stored(cache) == {'emoji': 8}
+
+
+def test_expired_entries_are_misses_and_removed(tmp_path, clock):
+    cache = DiskCache(str(tmp_path), ttl_seconds=60)
+    cache.set('k', 'v')
+    clock.value += 60
+    assert cache.get('k') == 'v'
+    clock.value += 1
+    assert cache.get('k') is None
+    assert stored(cache) == {}
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "hit_rate": 0.5}
+
+
+def test_reading_an_entry_does_not_extend_its_ttl(tmp_path, clock):
+    cache = DiskCache(str(tmp_path), ttl_seconds=60)
+    cache.set('k', 'v')
+    clock.value += 50
+    assert cache.get('k') == 'v'
+    clock.value += 20
+    assert cache.get('k') is None
+
+
+def test_each_thread_gets_its_own_connection(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    connections = []
+
+    def work(n):
+        connections.append(cache._conn())
+        for i in range(20):
+            cache.set(f"{n}-{i}", str(i))
+            assert cache.get(f"{n}-{i}") == str(i)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(conn) for conn in connections}) == 4
+    assert cache._conn() not in connections
+    assert len(stored(cache)) == 80
+    assert cache.stats()["hits"] == 80
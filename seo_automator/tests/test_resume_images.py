@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import seo_content_automation as sca
+from run_journal import RunJournal
+
+
+def run_stages(monkeypatch, tmp_path, state, image_url):
+    journal = RunJournal(str(tmp_path))
+    journal.start(["Why GTM Beats Guesswork"], datetime(2026, 1, 1))
+    journal.record('article', 0, "Why GTM Beats Guesswork", state, description="d", body="b",
+                   image_prompt="an abstract render", image_url=image_url, slug="why-gtm-beats-guesswork")
+    written = []
+    monkeypatch.setattr(sca, 'cached_image', lambda prompt: None)
+    monkeypatch.setattr(sca, 'render_image', lambda prompt: "rendered")
+    monkeypatch.setattr(sca, 'transfer_image', lambda source: ("https://cdn/x.png", "x.png", []))
+    monkeypatch.setattr(sca, 'remember_image', lambda *args: None)
+    monkeypatch.setattr(sca, 'write_article_file', lambda title, *args: written.append(args[2]) or "why-gtm-beats-guesswork")
+    stages = sca.build_article_stages(None, datetime(2026, 1, 1), journal, defer_publish=True)
+    article = journal.get('article', 0)
+    for stage in stages:
+        article = stage.run_one(article)
+    return journal.get('article', 0), written
+
+
+def test_resume_retries_a_missing_image_and_rewrites_the_file(monkeypatch, tmp_path):
+    article, written = run_stages(monkeypatch, tmp_path, 'file_written', None)
+    assert article["image_url"] == "https://cdn/x.png"
+    assert article["state"] == 'file_written'
+    assert written == ["https://cdn/x.png"]
+
+
+def test_resume_leaves_published_articles_alone(monkeypatch, tmp_path):
+    article, written = run_stages(monkeypatch, tmp_path, 'published', None)
+    assert article["image_url"] is None
+    assert written == []
+
+
+def test_resume_skips_articles_that_have_their_image(monkeypatch, tmp_path):
+    article, written = run_stages(monkeypatch, tmp_path, 'file_written', "https://cdn/old.png")
+    assert article["image_url"] == "https://cdn/old.png"
+    assert written == []
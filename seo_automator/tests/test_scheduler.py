@@ -0,0 +1,43 @@
+import threading
+
+from scheduler import DependencyScheduler
+
+
+def test_a_task_starts_once_its_own_dependencies_settle():
+    scheduler = DependencyScheduler(workers=2)
+    started = threading.Event()
+    scheduler.add('pillar', lambda results: started.set() or results, deps=[1, 2])
+    scheduler.complete(1, "one")
+    assert not started.wait(0.1)
+    scheduler.complete(2, "two")
+    assert started.wait(1)
+    assert scheduler.finish() == {'pillar': ["one", "two"]}
+
+
+def test_failed_dependencies_are_left_out_and_results_keep_their_order():
+    scheduler = DependencyScheduler(workers=1)
+    scheduler.add('pillar', lambda results: results, deps=[3, 1, 2])
+    for dep, result in [(1, "one"), (2, None), (3, "three")]:
+        scheduler.complete(dep, result)
+    assert scheduler.finish() == {'pillar': ["three", "one"]}
+
+
+def test_dependencies_settled_before_the_task_is_added_count():
+    scheduler = DependencyScheduler(workers=1)
+    scheduler.complete(1, "one")
+    scheduler.complete(1, "ignored") # Only the first report counts
+    scheduler.add('pillar', lambda results: results, deps=[1])
+    assert scheduler.finish() == {'pillar': ["one"]}
+
+
+def test_finish_fails_dependencies_that_never_reported():
+    scheduler = DependencyScheduler(workers=1)
+    scheduler.add('pillar', lambda results: results, deps=[1, 2])
+    scheduler.complete(1, "one")
+    assert scheduler.finish() == {'pillar': ["one"]}
+
+
+def test_a_task_that_raises_maps_to_none():
+    scheduler = DependencyScheduler(workers=1)
+    scheduler.add('pillar', lambda results: 1 / 0, deps=[])
+    assert scheduler.finish() == {'pillar': None}
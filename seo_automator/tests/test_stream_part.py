@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+
+import seo_content_automation as sca
+from run_journal import RunJournal
+
+PART = "seo_automator/generated_content/why-gtm-beats-guesswork.md.part"
+
+
+def text_stage(monkeypatch, tmp_path, stream_article_text):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sca, 'stream_article_text', stream_article_text)
+    journal = RunJournal(str(tmp_path))
+    journal.start(["Why GTM Beats Guesswork"], datetime(2026, 1, 1))
+    stages = sca.build_article_stages(None, datetime(2026, 1, 1), journal, defer_publish=True, stream=True)
+    return stages[0], journal.get('article', 0)
+
+
+def test_a_failed_stream_leaves_no_part_file(monkeypatch, tmp_path):
+    def fails(ai_client, title, on_body_text):
+        on_body_text("The first words of the body ")
+        raise ConnectionError("stream reset")
+
+    stage, article = text_stage(monkeypatch, tmp_path, fails)
+    with pytest.raises(ConnectionError):
+        stage.run_one(article)
+    assert not (tmp_path / PART).exists()
+
+
+def test_an_empty_stream_leaves_no_part_file(monkeypatch, tmp_path):
+    def empty(ai_client, title, on_body_text):
+        on_body_text("Half a body")
+        return None, None
+
+    stage, article = text_stage(monkeypatch, tmp_path, empty)
+    assert stage.run_one(article) is None
+    assert not (tmp_path / PART).exists()
+
+
+def test_a_finished_stream_keeps_its_part_file_for_the_writer(monkeypatch, tmp_path):
+    def finishes(ai_client, title, on_body_text):
+        on_body_text("The whole body.")
+        return "A description", "The whole body."
+
+    stage, article = text_stage(monkeypatch, tmp_path, finishes)
+    assert stage.run_one(article)["body"] == "The whole body."
+    assert (tmp_path / PART).read_text() == "The whole body."
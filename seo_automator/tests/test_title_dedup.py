@@ -0,0 +1,70 @@
+import numpy as np
+
+import seo_content_automation as sca
+from title_dedup import (TitleIndex, filter_duplicate_titles, minhash_signatures, normalize_title,
+                         read_generated_titles)
+
+
+def slugify(title):
+    return '-'.join(normalize_title(title).split())
+
+
+def indexed(tmp_path, titles):
+    index = TitleIndex(str(tmp_path / "title_index.npz"))
+    index.add((title, slugify(title)) for title in titles)
+    return index
+
+
+def test_signatures_are_stable_and_ignore_case_and_punctuation():
+    first, second = minhash_signatures(["How to Build a GTM Plan!", "how to build a gtm plan"])
+    assert np.array_equal(first, second)
+    assert np.array_equal(minhash_signatures(["How to Build a GTM Plan"])[0], first)
+
+
+def test_near_duplicates_of_indexed_and_earlier_titles_are_dropped(tmp_path):
+    index = indexed(tmp_path, ["How to Build a Go-To-Market Plan for Your Startup"])
+    candidates = [
+        "How to Build a Go-To-Market Plan for Your Startups", # Near-duplicate of the indexed title
+        "Why Founders Should Hire a Fractional CMO",
+        "Why Founders Should Hire A Fractional CMO Early", # Near-duplicate of the candidate above
+        "Ten Paid Social Mistakes That Burn Your Budget",
+    ]
+    kept, dropped = filter_duplicate_titles(candidates, index, 0.6, slugify)
+    assert kept == [candidates[1], candidates[3]]
+    assert [(title, match) for title, match, _ in dropped] == [
+        (candidates[0], "How to Build a Go-To-Market Plan for Your Startup"),
+        (candidates[2], candidates[1]),
+    ]
+
+
+def test_an_existing_slug_is_always_a_duplicate(tmp_path):
+    index = indexed(tmp_path, ["Pricing Pages That Convert"])
+    kept, dropped = filter_duplicate_titles(["Pricing pages that convert?"], index, 0.99, slugify)
+    assert kept == [] and dropped[0][2] == 1.0
+
+
+def test_the_index_round_trips_and_skips_known_slugs(tmp_path):
+    index = indexed(tmp_path, ["First Title", "Second Title"])
+    assert index.add([("First Title, Again", "first-title")]) == 0
+    index.save()
+    reloaded = TitleIndex(index.path)
+    assert reloaded.titles == ["First Title", "Second Title"]
+    assert np.array_equal(reloaded.signatures, index.signatures)
+
+
+def test_generated_titles_are_read_from_the_first_line(tmp_path):
+    (tmp_path / "why-gtm.md").write_text("# Why GTM\\nBody")
+    (tmp_path / "pillar_growth-guide.md").write_text("# Growth Guide\n\nBody")
+    (tmp_path / "notes.txt").write_text("# Not an article")
+    assert sorted(read_generated_titles(str(tmp_path))) == [("Growth Guide", "growth-guide"), ("Why GTM", "why-gtm")]
+
+
+def test_written_articles_use_real_newlines(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    slug = sca.write_article_file("Why GTM Beats Guesswork", "A description.", "## Body\n\nText.", "https://cdn/x.png")
+    with open(f"seo_automator/generated_content/{slug}.md", encoding='utf-8') as f:
+        text = f.read()
+    assert "\\n" not in text
+    assert text.startswith("# Why GTM Beats Guesswork\n\n**Description:** A description.\n\n![Generated Image](")
+    assert "\n\n<script type=\"application/ld+json\">\n" in text
+    assert list(read_generated_titles("seo_automator/generated_content")) == [("Why GTM Beats Guesswork", slug)]
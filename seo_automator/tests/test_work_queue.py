@@ -0,0 +1,89 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import work_queue
+from work_queue import WorkQueue
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the queue's wall clock with one the test moves by hand."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(work_queue, 'time', SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def open_queues(tmp_path, **kwargs):
+    path = str(tmp_path / 'journal.db')
+    return WorkQueue(path, worker_id='a', **kwargs), WorkQueue(path, worker_id='b', **kwargs)
+
+
+def test_two_workers_never_claim_the_same_item(tmp_path):
+    a, b = open_queues(tmp_path)
+    a.fill(range(200))
+    claimed = {'a': [], 'b': []}
+
+    def drain(queue, name):
+        while True:
+            got = queue.claim(limit=3)
+            if not got:
+                return
+            claimed[name].extend(got)
+
+    threads = [threading.Thread(target=drain, args=(queue, queue.worker_id)) for queue in (a, b)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not set(claimed['a']) & set(claimed['b'])
+    assert sorted(claimed['a'] + claimed['b']) == list(range(200))
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(tmp_path, clock):
+    a, b = open_queues(tmp_path, lease_seconds=60)
+    a.fill([0])
+    assert a.claim() == [0]
+    assert b.claim() == []
+    clock.value += 61
+    assert b.claim() == [0]
+    # The first worker's late result no longer counts.
+    a.complete(0)
+    assert b.statuses() == {0: 'leased'}
+    b.complete(0)
+    assert a.statuses() == {0: 'done'}
+
+
+def test_item_fails_after_max_attempts(tmp_path, clock):
+    a, b = open_queues(tmp_path, lease_seconds=60, max_attempts=2)
+    a.fill([0])
+    assert a.claim() == [0]
+    a.complete(0, ok=False)
+    assert b.claim() == [0]
+    b.complete(0, ok=False)
+    assert a.statuses() == {0: 'failed'}
+    assert a.claim() == []
+    assert a.drained()
+
+
+def test_expired_lease_with_no_attempts_left_fails(tmp_path, clock):
+    a, b = open_queues(tmp_path, lease_seconds=60, max_attempts=1)
+    a.fill([0])
+    assert a.claim() == [0]
+    clock.value += 61
+    assert b.claim() == []
+    assert b.statuses() == {0: 'failed'}
+
+
+def test_heartbeat_extends_only_its_own_leases(tmp_path, clock):
+    a, b = open_queues(tmp_path, lease_seconds=60)
+    a.fill([0, 1])
+    assert a.claim() == [0]
+    assert b.claim() == [1]
+    clock.value += 50
+    assert a.heartbeat() == 1
+    clock.value += 20
+    # b's lease ran out while a's was renewed, so only item 1 is up for grabs.
+    assert a.claim(limit=2) == [1]
+    assert b.claim() == []
@@ -0,0 +1,175 @@
+import os
+import re
+import zlib
+
+import numpy as np
+
+# MinHash signature length, split into 32 LSH bands of BAND_ROWS rows. Pairs above
+# ~0.5 Jaccard almost always share a band and get compared exactly; unrelated
+# titles rarely do, which keeps lookups sublinear in the size of the index.
+NUM_PERMUTATIONS = 96
+BAND_ROWS = 3
+SHINGLE_SIZE = 4
+
+_rng = np.random.default_rng(20240917) # Fixed seed: signatures must be stable across runs
+_HASH_A = _rng.integers(1, 2**63, NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_HASH_B = _rng.integers(0, 2**63, NUM_PERMUTATIONS, dtype=np.uint64)
+_BAND_MIX = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64)[:BAND_ROWS]
+
+
+def normalize_title(title):
+    """Lowercases, strips punctuation and collapses whitespace."""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', title.lower()).split())
+
+
+def _shingle_hashes(title):
+    text = f" {normalize_title(title)} "
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def minhash_signatures(titles, block=2000):
+    """Returns a (len(titles), NUM_PERMUTATIONS) uint32 array of MinHash signatures."""
+    signatures = np.empty((len(titles), NUM_PERMUTATIONS), dtype=np.uint32)
+    for start in range(0, len(titles), block):
+        hashes = [_shingle_hashes(title) for title in titles[start:start + block]]
+        offsets = np.cumsum([0] + [len(h) for h in hashes[:-1]])
+        flat = np.concatenate(hashes)
+        # Multiply-shift hashing: one multiply/add per permutation for every shingle at once,
+        # wrapping mod 2**64 on purpose, then the minimum per title via reduceat.
+        with np.errstate(over='ignore'):
+            permuted = ((flat[:, None] * _HASH_A + _HASH_B) >> np.uint64(32)).astype(np.uint32)
+        signatures[start:start + len(hashes)] = np.minimum.reduceat(permuted, offsets, axis=0)
+    return signatures
+
+
+def _band_keys(signatures):
+    """Collapses each band of rows into one uint64 key, shape (n, bands)."""
+    bands = signatures.astype(np.uint64).reshape(len(signatures), -1, BAND_ROWS)
+    with np.errstate(over='ignore'):
+        return (bands * _BAND_MIX).sum(axis=2)
+
+
+class TitleIndex:
+    """
+    Persisted MinHash index of titles and slugs that already exist, either as
+    generated files or as live posts, used to reject near-duplicate candidates.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.titles = []
+        self.slugs = []
+        self.signatures = np.empty((0, NUM_PERMUTATIONS), dtype=np.uint32)
+        if os.path.exists(path):
+            data = np.load(path)
+            self.titles = data['titles'].tolist()
+            self.slugs = data['slugs'].tolist()
+            self.signatures = data['signatures']
+        self._known_slugs = set(self.slugs)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, titles_and_slugs):
+        """Adds (title, slug) pairs whose slug is not indexed yet. Returns how many were new."""
+        new = []
+        for title, slug in titles_and_slugs:
+            if slug not in self._known_slugs:
+                self._known_slugs.add(slug)
+                new.append((title, slug))
+        if new:
+            self.titles.extend(title for title, _ in new)
+            self.slugs.extend(slug for _, slug in new)
+            self.signatures = np.vstack([self.signatures, minhash_signatures([title for title, _ in new])])
+        return len(new)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        np.savez(self.path, titles=np.array(self.titles, dtype=str),
+                 slugs=np.array(self.slugs, dtype=str), signatures=self.signatures)
+
+    def best_matches(self, signatures):
+        """
+        For each query signature, returns (index of the most similar indexed title
+        or -1, estimated Jaccard similarity). Only pairs that share an LSH band
+        are compared, so lookups stay fast with tens of thousands of titles.
+        """
+        best_index = np.full(len(signatures), -1)
+        best_score = np.zeros(len(signatures))
+        if not len(self.titles) or not len(signatures):
+            return best_index, best_score
+
+        indexed_keys = _band_keys(self.signatures)
+        query_keys = _band_keys(signatures)
+        query_ids, indexed_ids = [], []
+        for band in range(indexed_keys.shape[1]):
+            order = np.argsort(indexed_keys[:, band], kind='stable')
+            sorted_keys = indexed_keys[order, band]
+            lefts = np.searchsorted(sorted_keys, query_keys[:, band], 'left')
+            rights = np.searchsorted(sorted_keys, query_keys[:, band], 'right')
+            for query, (left, right) in enumerate(zip(lefts, rights)):
+                if right > left:
+                    query_ids.append(np.full(right - left, query, dtype=np.int64))
+                    indexed_ids.append(order[left:right])
+        if not query_ids:
+            return best_index, best_score
+
+        # A pair usually collides in several bands; encode pairs as one int64 to dedupe them cheaply.
+        pairs = np.unique(np.concatenate(query_ids) * len(self.titles) + np.concatenate(indexed_ids))
+        queries, indexed = np.divmod(pairs, len(self.titles))
+        scores = (signatures[queries] == self.signatures[indexed]).mean(axis=1)
+        # Keep the highest-scoring pair per query: sort by score, last write wins.
+        order = np.argsort(scores, kind='stable')
+        best_index[queries[order]] = indexed[order]
+        best_score[queries[order]] = scores[order]
+        return best_index, best_score
+
+
+def read_generated_titles(content_dir):
+    """Yields (title, slug) for every generated markdown file, from its '# Title' first line."""
+    if not os.path.isdir(content_dir):
+        return
+    for name in os.listdir(content_dir):
+        if not name.endswith('.md'):
+            continue
+        with open(os.path.join(content_dir, name), encoding='utf-8') as f:
+            first_line = f.readline()
+        # Files written before the writers were fixed have a literal "\n" after the title.
+        title = first_line.split('\\n')[0].lstrip('#').strip()
+        slug = name[:-len('.md')]
+        if slug.startswith('pillar_'):
+            slug = slug[len('pillar_'):]
+        if title:
+            yield title, slug
+
+
+def filter_duplicate_titles(candidates, index, threshold, slugify):
+    """
+    Drops candidates that are near-duplicates of an indexed title or of an
+    earlier candidate. Returns (kept, dropped) where dropped holds
+    (title, matching title, similarity) tuples.
+    """
+    signatures = minhash_signatures(candidates)
+    match_index, match_score = index.best_matches(signatures)
+
+    kept, kept_rows, dropped = [], [], []
+    seen_slugs = set(index.slugs)
+    for row, title in enumerate(candidates):
+        slug = slugify(title)
+        if slug in seen_slugs:
+            dropped.append((title, title, 1.0))
+            continue
+        if match_score[row] >= threshold:
+            dropped.append((title, index.titles[match_index[row]], float(match_score[row])))
+            continue
+        if kept_rows:
+            # A run only has ~100 candidates, so comparing against every kept one is cheap.
+            scores = (signatures[kept_rows] == signatures[row]).mean(axis=1)
+            closest = int(np.argmax(scores))
+            if scores[closest] >= threshold:
+                dropped.append((title, kept[closest], float(scores[closest])))
+                continue
+        kept.append(title)
+        kept_rows.append(row)
+        seen_slugs.add(slug)
+    return kept, dropped
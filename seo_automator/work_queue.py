@@ -0,0 +1,175 @@
+import os
+import time
+import socket
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    A queue of article indexes shared by many worker processes, stored as a
+    table in the run journal's SQLite file so results and queue live in one
+    manifest. Works on one host or across hosts sharing a filesystem.
+
+    A worker claims items under a time-limited lease and keeps its leases alive
+    with heartbeats. If a worker dies, its leases expire and the items become
+    claimable again, up to max_attempts claims per item. Lease times are wall
+    clock, so hosts need roughly synchronized clocks.
+    """
+    def __init__(self, path, worker_id=None, lease_seconds=600, max_attempts=3):
+        self.path = path
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._heartbeat = None
+        self._stopped = threading.Event()
+        # Autocommit mode, with explicit BEGIN IMMEDIATE around every claim so
+        # two processes can never lease the same item.
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=60)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS queue (
+                idx INTEGER PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'ready',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def fill(self, indexes):
+        """Enqueues item indexes not already queued; items that ran out of attempts are given another round."""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO queue (idx, updated_at) VALUES (?, ?)", [(i, now) for i in indexes]
+            )
+            self.conn.execute(
+                "UPDATE queue SET status = 'ready', attempts = 0, worker = NULL, updated_at = ? WHERE status = 'failed'",
+                (now,)
+            )
+            self.conn.execute("COMMIT")
+
+    def claim(self, limit=1):
+        """
+        Leases up to `limit` items to this worker, oldest index first. An item
+        is claimable if it is ready, or leased but its lease has expired.
+        Returns the claimed indexes, possibly none.
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            rows = self.conn.execute(
+                """SELECT idx, status, worker FROM queue
+                   WHERE attempts < ? AND (status = 'ready' OR (status = 'leased' AND lease_expires < ?))
+                   ORDER BY idx LIMIT ?""",
+                (self.max_attempts, now, limit)
+            ).fetchall()
+            self.conn.executemany(
+                """UPDATE queue SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1,
+                   updated_at = ? WHERE idx = ?""",
+                [(self.worker_id, now + self.lease_seconds, now, idx) for idx, _, _ in rows]
+            )
+            # Leases that expired with no attempts left will never finish; give up on them.
+            self.conn.execute(
+                """UPDATE queue SET status = 'failed', updated_at = ?
+                   WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                (now, now, self.max_attempts)
+            )
+            self.conn.execute("COMMIT")
+        for idx, status, worker in rows:
+            if status == 'leased':
+                logger.warning(f"⏰ Lease on item {idx} held by {worker} expired; reclaiming it.")
+        return [idx for idx, _, _ in rows]
+
+    def complete(self, index, ok=True):
+        """
+        Marks a leased item done, or on failure makes it claimable again until it
+        runs out of attempts. Ignored if this worker no longer holds the lease.
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                """UPDATE queue SET status = CASE WHEN ? THEN 'done' WHEN attempts >= ? THEN 'failed' ELSE 'ready' END,
+                   worker = NULL, lease_expires = NULL, updated_at = ?
+                   WHERE idx = ? AND status = 'leased' AND worker = ?""",
+                (ok, self.max_attempts, now, index, self.worker_id)
+            )
+
+    def heartbeat(self):
+        """Extends every lease this worker holds. Returns how many were extended."""
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE queue SET lease_expires = ?, updated_at = ? WHERE status = 'leased' AND worker = ?",
+                (now + self.lease_seconds, now, self.worker_id)
+            )
+        return cursor.rowcount
+
+    def start_heartbeat(self, interval=None):
+        """Sends heartbeats from a background thread, by default three per lease period."""
+        interval = interval or self.lease_seconds / 3
+
+        def beat():
+            while not self._stopped.wait(interval):
+                try:
+                    self.heartbeat()
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ Work queue heartbeat failed: {e}")
+
+        self._heartbeat = threading.Thread(target=beat, name='queue-heartbeat', daemon=True)
+        self._heartbeat.start()
+
+    def release(self):
+        """Hands this worker's unfinished leases back to the queue without using up an attempt."""
+        with self._lock:
+            self.conn.execute(
+                """UPDATE queue SET status = 'ready', worker = NULL, lease_expires = NULL,
+                   attempts = MAX(0, attempts - 1), updated_at = ? WHERE status = 'leased' AND worker = ?""",
+                (time.time(), self.worker_id)
+            )
+
+    def close(self):
+        self._stopped.set()
+        self.release()
+
+    def statuses(self):
+        """Returns {index: status} for every queued item."""
+        with self._lock:
+            return dict(self.conn.execute("SELECT idx, status FROM queue").fetchall())
+
+    def counts(self):
+        """Counts items per status, e.g. {'done': 950, 'leased': 40, 'ready': 10}."""
+        with self._lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM queue GROUP BY status").fetchall())
+
+    def drained(self):
+        """True once every item is done or failed for good."""
+        with self._lock:
+            row = self.conn.execute("SELECT COUNT(*) FROM queue WHERE status IN ('ready', 'leased')").fetchone()
+        return row[0] == 0
+
+    def items(self, poll_interval=5.0, stop=None):
+        """
+        Yields claimed indexes one at a time, for as long as there is work.
+        When nothing is claimable but other workers still hold leases, it polls,
+        so an expired lease is picked up here, until the queue is drained or
+        stop() returns True.
+        """
+        while not (stop and stop()):
+            claimed = self.claim()
+            if claimed:
+                yield claimed[0]
+            elif self.drained():
+                return
+            else:
+                self._stopped.wait(poll_interval)